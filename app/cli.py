@@ -0,0 +1,185 @@
+"""Command-line tools: ``viridion <command> ...`` or ``python -m app.cli <command> ...``"""
+import argparse
+import sys
+import time
+from datetime import datetime
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+# ------------------------------
+# 📤 export
+# ------------------------------
+def cmd_export(args) -> int:
+    from app.services import export_service
+
+    started = time.perf_counter()
+    try:
+        rows = export_service.write_export(
+            args.output,
+            args.dataset,
+            fmt=args.format,
+            plant_id=args.plant_id,
+            start=args.start,
+            end=args.end,
+            chunk_size=args.chunk_size,
+        )
+    except export_service.ExportUnavailable as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    elapsed = time.perf_counter() - started
+    print(f"📤 Exported {rows} {args.dataset} rows → {args.output} ({elapsed:.1f}s)")
+    return 0
+
+
+# ------------------------------
+# 🧮 compile-model
+# ------------------------------
+def cmd_compile_model(args) -> int:
+    import pickle
+    import numpy as np
+    from app.models.tree_model import CompiledTreeModel
+
+    started = time.perf_counter()
+    with open(args.source, "rb") as f:
+        original = pickle.load(f)
+    pickle_load = time.perf_counter() - started
+
+    compiled = CompiledTreeModel.from_booster(original)
+    compiled.save(args.output)
+
+    started = time.perf_counter()
+    compiled = CompiledTreeModel.load(args.output)
+    compiled_load = time.perf_counter() - started
+
+    # Parity check on random rows spanning the sensor ranges (plus missing values)
+    rng = np.random.default_rng(args.seed)
+    X = np.column_stack([
+        rng.uniform(0, 100, args.check_rows),   # soil moisture %
+        rng.uniform(0, 100, args.check_rows),   # humidity %
+        rng.uniform(-10, 50, args.check_rows),  # temperature °C
+    ])[:, :compiled.num_feature]
+    X[rng.random(X.shape) < 0.01] = np.nan
+
+    started = time.perf_counter()
+    expected = np.asarray(original.predict_proba(X))
+    original_time = time.perf_counter() - started
+    started = time.perf_counter()
+    actual = compiled.predict_proba(X)
+    compiled_time = time.perf_counter() - started
+
+    max_diff = float(np.abs(expected - actual).max())
+    class_mismatches = int((expected.argmax(axis=1) != actual.argmax(axis=1)).sum())
+
+    print(f"🧮 Compiled {len(compiled.left)} trees (depth ≤ {compiled.max_depth}) → {args.output}")
+    print(f"   load:    pickle {pickle_load * 1000:.1f} ms | compiled {compiled_load * 1000:.1f} ms")
+    print(f"   predict: original {original_time / args.check_rows * 1e6:.2f} µs/row | "
+          f"compiled {compiled_time / args.check_rows * 1e6:.2f} µs/row ({args.check_rows} rows)")
+    print(f"   parity:  max |Δp| = {max_diff:.2e}, class mismatches = {class_mismatches}")
+
+    if max_diff > args.tolerance or class_mismatches:
+        print("❌ Compiled model does not match the original", file=sys.stderr)
+        return 1
+    print("✅ Compiled model matches the original")
+    return 0
+
+
+# ------------------------------
+# 💧 backfill-usage
+# ------------------------------
+def cmd_backfill_usage(args) -> int:
+    from app.database.database import Base, run_additive_migrations, sync_engine
+    from app.services import watering_service
+
+    started = time.perf_counter()
+    Base.metadata.create_all(sync_engine)
+    with sync_engine.begin() as conn:
+        run_additive_migrations(conn)
+        rows = watering_service.backfill_daily_usage(conn)
+    elapsed = time.perf_counter() - started
+    print(f"💧 Rebuilt {rows} daily watering usage rows ({elapsed:.1f}s)")
+    return 0
+
+
+# ------------------------------
+# 🗜️ compact-readings
+# ------------------------------
+def cmd_compact_readings(args) -> int:
+    from app.config import settings
+    from app.database.database import Base, run_additive_migrations, sync_engine
+    from app.services.chunk_store import ChunkCompactor
+
+    if not settings.chunk_storage_enabled:
+        # Reads only merge chunks while the flag is on — compacting now would hide readings
+        print("❌ Chunk storage is disabled (set CHUNK_STORAGE_ENABLED=true)", file=sys.stderr)
+        return 1
+
+    started = time.perf_counter()
+    Base.metadata.create_all(sync_engine)
+    with sync_engine.begin() as conn:
+        run_additive_migrations(conn)
+    compactor = ChunkCompactor(seal_delay_s=args.seal_delay)
+    totals = compactor.run_once(max_windows=args.max_windows)
+    elapsed = time.perf_counter() - started
+
+    per_reading = totals["bytes"] / totals["readings"] if totals["readings"] else 0
+    print(f"🗜️ Compacted {totals['readings']} readings from {totals['windows']} windows "
+          f"into {totals['chunks']} chunks ({elapsed:.1f}s)")
+    print(f"   {totals['bytes']} bytes written, {per_reading:.1f} bytes/reading")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="viridion", description="Viridion API tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Export history to Parquet / Arrow IPC")
+    export.add_argument("dataset", choices=["sensor_readings", "predictions"])
+    export.add_argument("output", help="Destination file")
+    export.add_argument("--format", choices=["parquet", "arrow"], default="parquet")
+    export.add_argument("--plant-id", default=None)
+    export.add_argument("--start", type=_parse_time, default=None, help="ISO timestamp (inclusive)")
+    export.add_argument("--end", type=_parse_time, default=None, help="ISO timestamp (exclusive)")
+    export.add_argument("--chunk-size", type=int, default=None)
+    export.set_defaults(func=cmd_export)
+
+    compile_model = commands.add_parser(
+        "compile-model", help="Convert a pickled XGBoost model to the pickle-free .npz format"
+    )
+    compile_model.add_argument("source", help="Pickled model, e.g. app/models/xgb_watering_model.pkl")
+    compile_model.add_argument("output", help="Destination .npz file")
+    compile_model.add_argument("--check-rows", type=int, default=10000)
+    compile_model.add_argument("--tolerance", type=float, default=1e-6)
+    compile_model.add_argument("--seed", type=int, default=0)
+    compile_model.set_defaults(func=cmd_compile_model)
+
+    backfill_usage = commands.add_parser(
+        "backfill-usage", help="Rebuild watering_daily_usage from existing watering events"
+    )
+    backfill_usage.set_defaults(func=cmd_backfill_usage)
+
+    compact_readings = commands.add_parser(
+        "compact-readings", help="Move closed windows of sensor readings into compressed chunks"
+    )
+    compact_readings.add_argument(
+        "--max-windows", type=int, default=0, help="Stop after this many windows (0 = all)"
+    )
+    compact_readings.add_argument(
+        "--seal-delay", type=float, default=None,
+        help="Seconds a window must have ended (default: CHUNK_SEAL_DELAY_S)",
+    )
+    compact_readings.set_defaults(func=cmd_compact_readings)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
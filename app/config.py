@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import Dict, List
 
 class Settings(BaseSettings):
     """Application settings"""
@@ -19,11 +19,85 @@ class Settings(BaseSettings):
     api_port: int = 8000
     debug: bool = False
 
+    # Startup / health
+    startup_db_retries: int = 10
+    startup_db_base_delay: float = 0.5
+    startup_db_max_delay: float = 5.0
+    readiness_requires_mqtt: bool = False
+
+    # Auto-watering (decisions on sensor ingest)
+    auto_watering_enabled: bool = False  # master switch; SystemStatus row can also disable
+    auto_watering_debounce_s: float = 2.0
+    auto_watering_cooldown_s: float = 900.0
+    auto_watering_hysteresis: float = 5.0  # moisture points above threshold to re-arm
+    auto_watering_min_confidence: float = 0.6
+    auto_watering_config_ttl_s: float = 30.0
+
+    # Ingest spool (readings are spooled to disk while the DB is down / slow)
+    ingest_spool_enabled: bool = True
+    ingest_spool_dir: str = "spool"
+    ingest_spool_segment_bytes: int = 8 * 1024 * 1024
+    ingest_spool_max_bytes: int = 512 * 1024 * 1024
+    ingest_spool_replay_batch: int = 5000
+    ingest_spool_fsync: bool = False  # fsync every record (survives power loss, slower)
+    ingest_slow_insert_ms: float = 2000
+    ingest_breaker_base_s: float = 1.0
+    ingest_breaker_max_s: float = 30.0
+
+    # Compressed chunk storage (opt-in: closed windows of readings → sensor_chunks)
+    chunk_storage_enabled: bool = False  # keep on once chunks exist: reads only merge them while on
+    chunk_window_s: int = 3600  # one chunk per plant per window
+    chunk_seal_delay_s: float = 600.0  # compact a window this long after it ends (late readings)
+    chunk_compact_interval_s: float = 300.0
+    chunk_compact_max_windows: int = 24  # windows per background compaction run
+
+    # Conditional GETs (ETag / 304); version stamps are per process → single worker only
+    etags_enabled: bool = True
+
+    # Watering command pipeline
+    command_ack_timeout_s: float = 5.0  # per publish attempt
+    command_max_retries: int = 1
+    command_latency_window: int = 256  # recent ack latencies kept per plant for /commands
+
+    # Watering usage
+    pump_flow_lpm: float | None = None  # liters/min; estimates water_amount when not reported
+
+    # Bulk watering
+    plant_groups: Dict[str, List[str]] = {}  # JSON, e.g. {"zoneA": ["plant1", "plant2"]}
+    bulk_watering_max_plants: int = 1000
+    bulk_watering_concurrency: int = 32  # concurrent MQTT publishes
+
+    # Profiling (opt-in)
+    profiling_enabled: bool = False
+    admin_token: str | None = None  # required as X-Admin-Token when set
+    profile_interval_ms: float = 5.0
+    profile_dir: str = "profiles"
+    slow_request_threshold_ms: float = 0  # 0 = no automatic slow-request profiles
+    slow_request_max_profile_s: float = 30.0
+
     # CORS
     cors_origins: str = "http://localhost:5173"
 
+    # Bulk ingest
+    bulk_ingest_chunk_size: int = 5000
+    bulk_ingest_max_errors: int = 20
+
+    # Columnar export
+    export_chunk_size: int = 50000
+
     # ML Model
     model_path: str = "app/models/xgb_watering_model.pkl"
+    feature_window_s: float = 3600.0  # rolling-feature window per plant
+    feature_window_capacity: int = 720  # max samples kept per window
+    model_watch_interval: float = 0  # seconds between model file checks (0 = off)
+    inference_max_batch_size: int = 64
+    inference_max_wait_ms: float = 2.0
+    inference_workers: int = 1
+    prediction_cache_size: int = 4096
+    prediction_cache_resolution: float = 0.1  # 0 disables the feature-keyed cache
+    prediction_flush_interval_s: float = 1.0  # write-behind flush period
+    prediction_flush_batch_size: int = 500
+    prediction_max_pending: int = 50000
     timezone: str = "America/El_Salvador"
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -1,8 +1,12 @@
 from datetime import datetime
+from typing import Optional
 from zoneinfo import ZoneInfo
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy import Column, Integer, Float, DateTime, Boolean, String, create_engine
+from sqlalchemy import (
+    Column, Integer, Float, Date, DateTime, Boolean, Index, LargeBinary, String,
+    create_engine, text,
+)
 from app.config import settings
 
 # ============================================================
@@ -13,6 +17,13 @@ def get_local_time():
     return datetime.now(ZoneInfo(settings.timezone))
 
 
+def as_local(timestamp: Optional[datetime]) -> Optional[datetime]:
+    """Read a naive datetime as local time (settings.timezone); aware ones are kept."""
+    if timestamp is None or timestamp.tzinfo is not None:
+        return timestamp
+    return timestamp.replace(tzinfo=ZoneInfo(settings.timezone))
+
+
 # ============================================================
 # ⚙️  ASYNC ENGINE (for FastAPI routes)
 # ============================================================
@@ -69,20 +80,53 @@ class SensorReading(Base):
     pressure = Column(Float,nullable = True)
   
 
+class SensorChunk(Base):
+    """One plant's readings for one closed time window, compressed (app/services/chunk_codec.py)."""
+    __tablename__ = "sensor_chunks"
+    __table_args__ = (
+        # All-plants newest-first scans: ORDER BY start_time DESC, plant_id DESC
+        Index("ix_sensor_chunks_start_time", "start_time", "plant_id"),
+    )
+
+    plant_id = Column(String, primary_key=True)
+    start_time = Column(DateTime(timezone=True), primary_key=True)  # window start (UTC-aligned)
+    end_time = Column(DateTime(timezone=True), nullable=False)  # window end (exclusive)
+    readings = Column(Integer, nullable=False)
+    codec = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+
+
 class WateringEvent(Base):
     __tablename__ = "watering_events"
+    __table_args__ = (
+        # Per-plant history / keyset pagination: WHERE plant_id = ? ORDER BY timestamp DESC, id DESC
+        Index("ix_watering_events_plant_timestamp", "plant_id", "timestamp", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
+    plant_id = Column(String, nullable=True)  # NULL for events recorded before per-plant tracking
     timestamp = Column(DateTime(timezone=True), default=get_local_time, index=True, nullable=False)
     duration = Column(Integer, nullable=False)
     water_amount = Column(Float, nullable=True)
     triggered_by = Column(String, nullable=False)  # manual/scheduled/ml_prediction
 
 
+class WateringDailyUsage(Base):
+    """Per-plant, per-day watering totals, maintained on every event insert."""
+    __tablename__ = "watering_daily_usage"
+
+    plant_id = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)  # local day (settings.timezone)
+    events = Column(Integer, nullable=False, default=0)
+    total_duration = Column(Integer, nullable=False, default=0)  # seconds
+    water_amount = Column(Float, nullable=False, default=0.0)  # liters (recorded or estimated)
+
+
 class Prediction(Base):
     __tablename__ = "predictions"
 
     id = Column(Integer, primary_key=True, index=True)
+    plant_id = Column(String, index=True, nullable=True)
     timestamp = Column(DateTime(timezone=True), default=get_local_time, index=True, nullable=False)
     should_water = Column(Boolean, nullable=False)
     confidence = Column(Float, nullable=False)
@@ -101,6 +145,26 @@ class SystemStatus(Base):
     duration_setting = Column(Integer, default=10)
     threshold_setting = Column(Integer, default=30)
 
+# ============================================================
+# 🔧  Additive migrations
+# ============================================================
+# create_all() only creates missing tables; columns/indexes added to
+# existing tables are applied here. Every statement must be idempotent.
+ADDITIVE_MIGRATIONS = [
+    "ALTER TABLE predictions ADD COLUMN IF NOT EXISTS plant_id VARCHAR",
+    "CREATE INDEX IF NOT EXISTS ix_predictions_plant_id ON predictions (plant_id)",
+    "ALTER TABLE watering_events ADD COLUMN IF NOT EXISTS plant_id VARCHAR",
+    "CREATE INDEX IF NOT EXISTS ix_watering_events_plant_timestamp "
+    "ON watering_events (plant_id, timestamp, id)",
+]
+
+
+def run_additive_migrations(conn):
+    """Apply ADDITIVE_MIGRATIONS (use with ``conn.run_sync``)."""
+    for statement in ADDITIVE_MIGRATIONS:
+        conn.execute(text(statement))
+
+
 # ============================================================
 # 🧩  Dependencies
 # ============================================================
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 
 # ----------------------------
@@ -19,6 +19,28 @@ class SensorReadingCreate(SensorReadingBase):
     pass
 
 
+class SensorReadingBulkItem(SensorReadingCreate):
+    """Schema for one reading inside a bulk upload"""
+    plant_id: str = Field(..., min_length=1, description="Plant ID the reading belongs to")
+    timestamp: Optional[datetime] = Field(None, description="Reading time (defaults to upload time)")
+
+
+class BulkIngestError(BaseModel):
+    index: int = Field(..., description="Position of the rejected reading in the upload")
+    message: str
+
+
+class BulkIngestSummary(BaseModel):
+    """Summary returned by the bulk ingest endpoint"""
+    received: int
+    inserted: int
+    rejected: int
+    plants: List[str] = []
+    first_timestamp: Optional[datetime] = None
+    last_timestamp: Optional[datetime] = None
+    errors: List[BulkIngestError] = []
+
+
 class SensorReadingResponse(SensorReadingBase):
     """Schema for returning a sensor reading"""
     id: int
@@ -63,6 +85,11 @@ class PredictionBase(BaseModel):
 class PredictionCreate(PredictionBase):
     pass
 
+class ModelPathRequest(BaseModel):
+    model_path: Optional[str] = Field(
+        default=None, description="Model file (.pkl or .npz); defaults to the active model's path"
+    )
+
 class WateringRequest(BaseModel):
     plant_id: str = Field(default="plant1", description="Plant ID to get predictions for")
 
@@ -72,6 +99,23 @@ class WateringPredictionResponse(BaseModel):
     method: str
 
 
+class BatchWateringRequest(BaseModel):
+    plant_ids: Optional[List[str]] = Field(
+        default=None, description="Plants to predict for (omit for every plant with readings)"
+    )
+
+
+class PlantWateringPrediction(WateringPredictionResponse):
+    plant_id: str
+    reading_timestamp: datetime
+
+
+class BatchWateringPredictionResponse(BaseModel):
+    predictions: List[PlantWateringPrediction]
+    missing: List[str] = Field(default=[], description="Requested plants with no sensor data")
+    incomplete: List[str] = Field(default=[], description="Plants whose latest reading lacks a required field")
+
+
 # -----------------------
 # Watering Toggle (simple endpoint)
 # ----------------------------
@@ -80,6 +124,49 @@ class WateringToggle(BaseModel):
     status: bool
     plant_id: Optional[str] = None
     duration: int = Field(default=10, ge=1, le=600, description="Duration in seconds")
+    wait_for_ack: bool = Field(False, description="Wait for the ESP32 to acknowledge the command")
+    ack_timeout: Optional[float] = Field(
+        None, gt=0, le=60, description="Max seconds to wait for the acknowledgement"
+    )
+
+
+class BulkWateringTarget(BaseModel):
+    plant_id: str = Field(..., min_length=1)
+    duration: Optional[int] = Field(None, ge=1, le=600, description="Overrides the request duration")
+
+
+class BulkWateringRequest(BaseModel):
+    """Water many plants at once: give ``plants`` or a ``selector``"""
+    plants: Optional[List[BulkWateringTarget]] = Field(None, description="Explicit plants (with optional durations)")
+    selector: Optional[str] = Field(
+        None, description="Glob over known plants (e.g. 'plant1*') or 'group:<name>' from PLANT_GROUPS"
+    )
+    duration: int = Field(default=10, ge=1, le=600, description="Default duration in seconds")
+    stagger_ms: int = Field(
+        default=0, ge=0, le=60000, description="Delay between consecutive commands (pump/pressure load)"
+    )
+    wait_for_ack: bool = Field(False, description="Wait for every ESP32 acknowledgement")
+    ack_timeout: Optional[float] = Field(None, gt=0, le=60)
+
+
+class BulkWateringResult(BaseModel):
+    plant_id: str
+    duration: int
+    command_id: Optional[str] = None
+    published: bool
+    acknowledged: bool = False
+    ack_ms: Optional[float] = None
+    outcome: str
+    error: Optional[str] = None
+
+
+class BulkWateringSummary(BaseModel):
+    requested: int
+    published: int
+    acknowledged: int
+    failed: int
+    events_recorded: int
+    results: List[BulkWateringResult]
 
 # ----------------------------
 # System Status
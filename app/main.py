@@ -1,12 +1,19 @@
-import time
 import asyncio
-from sqlalchemy.exc import OperationalError
-from app.database.database import Base, engine
-from app.mqtt.mqtt_handler import start_mqtt
+from app.services.startup_service import (
+    begin_startup, cancel_startup, startup_state, stop_chunk_compactor,
+)
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.config import settings
-from app.routers import sensors, watering, predictions
+from app.middleware import MetricsMiddleware, SlowRequestProfilerMiddleware
+from app.services.metrics import REGISTRY
+from app.services.inference_executor import inference_batcher
+from app.services.prediction_recorder import prediction_recorder
+from app.services.command_pipeline import command_pipeline
+from app.services.ingest_spool import ingest_spool
+from app.services.auto_watering import auto_watering
+from app.routers import sensors, watering, predictions, export, health, models, admin
 
 app = FastAPI(
     title="Smart Garden API",
@@ -22,37 +29,36 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(SlowRequestProfilerMiddleware)
 
 app.include_router(sensors.router, prefix="/api/sensors", tags=["Sensors"])
 app.include_router(watering.router, prefix="/api/watering", tags=["Watering"])
 app.include_router(predictions.router, prefix="/api/predictions", tags=["ML Predictions"])
+app.include_router(models.router, prefix="/api/models", tags=["Model Registry"])
+app.include_router(export.router, prefix="/api/export", tags=["Export"])
+app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
+app.include_router(health.router, prefix="/health", tags=["Health"])
 
 @app.on_event("startup")
 async def on_startup():
     print("🚀 Starting Smart Garden API...")
 
-    # Ensure database is ready
-    for i in range(10):
-        try:
-            async with engine.begin() as conn:
-                await conn.run_sync(Base.metadata.create_all)
-            print("🗄️ Database ready.")
-            break
-        except OperationalError:
-            print(f"⏳ Waiting for database... ({i+1}/10)")
-            time.sleep(3)
-    else:
-        print("❌ Database connection failed after retries.")
-        raise
-
-    # Start MQTT background listener
-    loop = asyncio.get_running_loop()
-    start_mqtt(loop)
-    print("📡 MQTT bridge initialized.")
+    # Database wait (async backoff), model load and MQTT connect run in the
+    # background so the server starts answering immediately.
+    # Progress is reported by /health/ready.
+    begin_startup()
 
 @app.on_event("shutdown")
-def on_shutdown():
+async def on_shutdown():
     print("🛑 Shutting down Smart Garden API...")
+    await cancel_startup()
+    await auto_watering.stop()  # evaluations use the batcher and the command pipeline
+    await inference_batcher.stop()
+    await prediction_recorder.stop()
+    await command_pipeline.stop()
+    await asyncio.to_thread(ingest_spool.stop)
+    await asyncio.to_thread(stop_chunk_compactor)
 
 @app.get("/")
 def root():
@@ -60,5 +66,10 @@ def root():
         "message": "Smart Garden API",
         "version": "0.1.0",
         "docs": "/docs",
-        "status": "operational"
+        "status": "operational" if startup_state.complete else "starting"
     }
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,88 @@
+import asyncio
+import time
+from app.config import settings
+from app.services import profiler
+from app.services.metrics import HTTP_REQUEST_SECONDS
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording handler latency per route template.
+
+    The route is read after the request is handled (FastAPI stores the
+    matched route in the scope), so labels are templates like
+    ``/api/sensors/ws/{plant_id}`` rather than raw paths.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.labels(scope["method"], path, status).observe(
+                time.perf_counter() - started
+            )
+
+
+class SlowRequestProfilerMiddleware:
+    """
+    Records a sampling profile for requests slower than a threshold.
+
+    Nothing runs for fast requests except a cancelled timer. Once a request
+    passes ``slow_request_threshold_ms`` the sampler starts (if no other
+    profile is running) and stops when the response completes; the stacks are
+    written to ``profile_dir`` as a .folded file.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        threshold_ms = settings.slow_request_threshold_ms
+        if scope["type"] != "http" or not settings.profiling_enabled or threshold_ms <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        capture = {}
+
+        def start_capture():
+            if profiler.profile_lock.acquire(blocking=False):
+                sampler = profiler.SamplingProfiler(
+                    max_duration_s=settings.slow_request_max_profile_s
+                )
+                sampler.start()
+                capture["profiler"] = sampler
+
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        timer = loop.call_later(threshold_ms / 1000, start_capture)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            timer.cancel()
+            sampler = capture.get("profiler")
+            if sampler:
+                sampler.stop()
+                profiler.profile_lock.release()
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                route = getattr(scope.get("route"), "path", scope.get("path", ""))
+                label = f"slow-{scope['method']}-{route.strip('/').replace('/', '_')}-{elapsed_ms:.0f}ms"
+                path = await asyncio.to_thread(profiler.save_profile, sampler, label)
+                print(f"🐢 Slow request {scope['method']} {route} ({elapsed_ms:.0f} ms) → profile {path}")
@@ -1,8 +1,15 @@
 import pickle
-import numpy as np
+import threading
+import time
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Optional, Sequence
 from app.config import settings
+from app.services.metrics import PREDICTION_SECONDS, PREDICTIONS
+
+_model_seconds = PREDICTION_SECONDS.labels("model")
+_model_rows = PREDICTIONS.labels("model")
+_fallback_seconds = PREDICTION_SECONDS.labels("fallback")
+_fallback_rows = PREDICTIONS.labels("fallback")
 
 
 class GardenPredictor:
@@ -10,10 +17,35 @@ class GardenPredictor:
 
     FEATURES = ["Soil Moisture", "Soil Humidity", "Temperature"]
 
-    def __init__(self, model_path: str = "app/models/xgb_watering_model.pkl"):
+    def __init__(self, model_path: Optional[str] = None, autoload: bool = True):
         self.model_path = model_path or settings.model_path
         self.model = None
-        self._load_model()
+        # not_loaded → loading → loaded | fallback (no file) | failed (corrupt)
+        self.status = "not_loaded"
+        self.load_seconds: Optional[float] = None
+        self._load_lock = threading.Lock()
+        if autoload:
+            self.load()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.status in ("loaded", "fallback", "failed")
+
+    def load(self):
+        """
+        Load the model once. Safe to call from several threads; callers
+        arriving while another thread is loading wait for it to finish.
+        """
+        if self.is_loaded:
+            return
+        with self._load_lock:
+            if self.is_loaded:
+                return
+            self.status = "loading"
+            started = time.perf_counter()
+            self._load_model()
+            self.load_seconds = time.perf_counter() - started
+            print(f"⏱ Model stage finished in {self.load_seconds:.2f}s ({self.status})")
 
     # ------------------------------------------------------------------
     # Load Model Safely (no crash if missing or corrupt)
@@ -28,41 +60,115 @@ class GardenPredictor:
         if not file.exists():
             print("⚠ Model not found — fallback rules ENABLED")
             self.model = None
+            self.status = "fallback"
             return
 
         try:
-            with open(file, "rb") as f:
-                self.model = pickle.load(f)
-
-            print(f"🔥 Model loaded successfully → {self.model_path}")
+            if file.suffix == ".npz":
+                # Compiled, pickle-free format (see `viridion compile-model`)
+                from app.models.tree_model import CompiledTreeModel
+                self.model = CompiledTreeModel.load(file)
+            else:
+                # Unpickling pulls in numpy / xgboost / sklearn — only done here
+                with open(file, "rb") as f:
+                    self.model = pickle.load(f)
+
+            self.status = "loaded"
+            print(f"🔥 Model loaded successfully → {self.model_path} ({type(self.model).__name__})")
             print(f"📦 Using features → {self.FEATURES}")
 
         except Exception as e:
             print(f"❌ Failed to load model → fallback active\n{e}")
             self.model = None
+            self.status = "failed"
 
     # ------------------------------------------------------------------
     # Predict from 3 features
     # ------------------------------------------------------------------
     def predict(self, soil_moisture: float, soil_humidity: float, temperature: float) -> Dict:
+        return self.predict_batch([(soil_moisture, soil_humidity, temperature)])[0]
+
+    # ------------------------------------------------------------------
+    # Vectorized prediction over an (n x 3) feature matrix
+    # ------------------------------------------------------------------
+    def predict_batch(self, features: Sequence[Sequence[float]]) -> List[Dict]:
+        """
+        Predict for many rows of (soil_moisture, soil_humidity, temperature),
+        each optionally followed by rolling features (see FeatureStore).
+
+        A single predict_proba call over the whole matrix gives both the
+        class (argmax) and the confidence (max probability).
+        """
+        if not self.is_loaded:
+            self.load()
+
+        import numpy as np
+
+        started = time.perf_counter()
+        X = self._feature_matrix(features)
+        if len(X) == 0:
+            return []
 
         # ========= ML Prediction =========
         if self.model:
             try:
-                X = np.array([[soil_moisture, soil_humidity, temperature]])
-                pred = self.model.predict(X)[0]
-                conf = self.model.predict_proba(X)[0].max()
-
-                return {
-                    "should_water": bool(pred),
-                    "confidence": round(float(conf), 3),
-                    "method": "xgboost_model"
-                }
+                proba = self.model.predict_proba(X)
+                best = proba.argmax(axis=1)
+                classes = getattr(self.model, "classes_", None)
+                labels = classes[best] if classes is not None else best
+                conf = proba[np.arange(len(X)), best]
+
+                results = [
+                    {
+                        "should_water": bool(label),
+                        "confidence": round(float(c), 3),
+                        "method": "xgboost_model"
+                    }
+                    for label, c in zip(labels, conf)
+                ]
+                _model_seconds.observe(time.perf_counter() - started)
+                _model_rows.inc(len(results))
+                return results
             except Exception as e:
                 print(f"⚠ Model prediction failed → {e}")
 
         # ========= FALLBACK =============
-        if soil_moisture < 30 or soil_humidity < 35:
+        dry = (X[:, 0] < 30) | (X[:, 1] < 35)
+        results = [self._fallback(bool(d)) for d in dry]
+        _fallback_seconds.observe(time.perf_counter() - started)
+        _fallback_rows.inc(len(results))
+        return results
+
+    @property
+    def n_features(self) -> int:
+        """Number of input columns the loaded model expects (3 base + any rolling features)."""
+        return int(getattr(self.model, "n_features_in_", None) or len(self.FEATURES))
+
+    def _feature_matrix(self, features: Sequence[Sequence[float]]):
+        """
+        Build the model input matrix. Rows are the 3 base features optionally
+        followed by FeatureStore rolling features; extra columns the model does
+        not use are dropped and missing ones are NaN (treated as missing).
+        """
+        import numpy as np
+
+        width = self.n_features
+        try:
+            X = np.asarray(features, dtype=float)
+            if X.ndim == 2 and X.shape[1] == width:
+                return X
+        except ValueError:
+            pass  # ragged rows
+
+        X = np.full((len(features), width), np.nan)
+        for i, row in enumerate(features):
+            k = min(len(row), width)
+            X[i, :k] = row[:k]
+        return X
+
+    @staticmethod
+    def _fallback(dry: bool) -> Dict:
+        if dry:
             return {
                 "should_water": True,
                 "confidence": 0.70,
@@ -79,4 +185,6 @@ class GardenPredictor:
 # ----------------------------------------------------------------------
 # GLOBAL INSTANCE (used by API)
 # ----------------------------------------------------------------------
-predictor = GardenPredictor()
+# Not loaded at import time: startup loads it in the background, and the
+# first predict() loads it on demand if that has not happened yet.
+predictor = GardenPredictor(autoload=False)
@@ -0,0 +1,230 @@
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+from app.config import settings
+from app.models.predictor import GardenPredictor, predictor
+
+
+class ModelLoadError(RuntimeError):
+    """Raised when a new model version cannot be loaded (nothing is swapped)."""
+
+
+class ShadowStats:
+    """
+    Agreement / latency of a candidate model scored alongside the active one.
+
+    Updated from the shadow thread, so every change goes through the lock.
+    Results of a model other than the current ``candidate`` (still running
+    when it was promoted or replaced) are dropped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self, candidate: Optional[GardenPredictor] = None):
+        with self._lock:
+            self.candidate = candidate
+            self.compared = 0
+            self.agreements = 0
+            self.errors = 0
+            self.active_ms_total = 0.0
+            self.candidate_ms_total = 0.0
+            self.candidate_ms_max = 0.0
+            self.confidence_delta_total = 0.0
+
+    def record(
+        self,
+        model: GardenPredictor,
+        active: List[Dict],
+        candidate: List[Dict],
+        active_ms: float,
+        candidate_ms: float,
+    ):
+        with self._lock:
+            if model is not self.candidate:
+                return
+            self.compared += len(active)
+            self.agreements += sum(
+                a["should_water"] == c["should_water"] for a, c in zip(active, candidate)
+            )
+            self.confidence_delta_total += sum(
+                abs(a["confidence"] - c["confidence"]) for a, c in zip(active, candidate)
+            )
+            self.active_ms_total += active_ms
+            self.candidate_ms_total += candidate_ms
+            self.candidate_ms_max = max(self.candidate_ms_max, candidate_ms)
+
+    def record_error(self, model: GardenPredictor):
+        with self._lock:
+            if model is self.candidate:
+                self.errors += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            n = self.compared
+            return {
+                "compared": n,
+                "agreement_rate": round(self.agreements / n, 4) if n else None,
+                "mean_confidence_delta": round(self.confidence_delta_total / n, 4) if n else None,
+                "active_ms_total": round(self.active_ms_total, 3),
+                "candidate_ms_total": round(self.candidate_ms_total, 3),
+                "candidate_ms_max": round(self.candidate_ms_max, 3),
+                "errors": self.errors,
+            }
+
+
+class ModelRegistry:
+    """
+    Holds the active GardenPredictor and swaps in new versions without restarts.
+
+    New versions are loaded on a worker thread and published with a single
+    reference assignment, so in-flight predictions finish on the model they
+    started with. A staged candidate is shadow-scored on live traffic until
+    it is promoted or discarded.
+    """
+
+    def __init__(self, initial: GardenPredictor):
+        self.active = initial
+        self.version = 1
+        self.activated_at = datetime.utcnow()
+        self.candidate: Optional[GardenPredictor] = None
+        self.shadow = ShadowStats()
+        self._reload_lock = asyncio.Lock()
+        self._watch_task: Optional[asyncio.Task] = None
+        self._watched_mtime: Optional[float] = None
+
+    # ------------------------------------------------------------------
+    # Prediction (called from inference worker threads)
+    # ------------------------------------------------------------------
+    def predict_batch(self, features: Sequence[Sequence[float]]) -> List[Dict]:
+        model = self.active  # one read: the whole batch uses the same version
+        return model.predict_batch(features)
+
+    def shadow_score(self, features: Sequence[Sequence[float]], active_results: List[Dict], active_ms: float):
+        candidate = self.candidate
+        if candidate is None:
+            return
+        try:
+            started = time.perf_counter()
+            results = candidate.predict_batch(features)
+            candidate_ms = (time.perf_counter() - started) * 1000
+            self.shadow.record(candidate, active_results, results, active_ms, candidate_ms)
+        except Exception as e:
+            self.shadow.record_error(candidate)
+            print(f"⚠ Shadow scoring failed → {e}")
+
+    # ------------------------------------------------------------------
+    # Loading / swapping
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _load(path: str) -> GardenPredictor:
+        candidate = GardenPredictor(path, autoload=True)
+        if candidate.status != "loaded":
+            raise ModelLoadError(f"Could not load model at {path} (status: {candidate.status})")
+        return candidate
+
+    async def reload(self, path: Optional[str] = None) -> Dict:
+        """Load ``path`` (default: the active model's path) and make it active."""
+        async with self._reload_lock:
+            path = path or self.active.model_path
+            new_model = await asyncio.to_thread(self._load, path)
+            self._activate(new_model)
+            return self.status()
+
+    async def stage_candidate(self, path: str) -> Dict:
+        async with self._reload_lock:
+            candidate = await asyncio.to_thread(self._load, path)
+            self.shadow.reset(candidate)
+            self.candidate = candidate
+            print(f"🧪 Candidate model staged for shadow scoring → {path}")
+            return self.status()
+
+    def promote_candidate(self) -> Dict:
+        if self.candidate is None:
+            raise ModelLoadError("No candidate model is staged")
+        self._activate(self.candidate)
+        self.candidate = None
+        self.shadow.reset()  # the numbers described the previous active/candidate pair
+        return self.status()
+
+    def discard_candidate(self):
+        self.candidate = None
+        self.shadow.reset()
+
+    def _activate(self, new_model: GardenPredictor):
+        self.active = new_model
+        self.version += 1
+        self.activated_at = datetime.utcnow()
+        self._watched_mtime = self._mtime(new_model.model_path)
+        print(f"🔁 Model v{self.version} active → {new_model.model_path}")
+
+    # ------------------------------------------------------------------
+    # File watcher
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _mtime(path: str) -> Optional[float]:
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+
+    async def watch(self, interval: float):
+        """Reload when the active model file changes on disk."""
+        self._watched_mtime = self._mtime(self.active.model_path)
+        while True:
+            await asyncio.sleep(interval)
+            mtime = self._mtime(self.active.model_path)
+            if mtime is None or mtime == self._watched_mtime:
+                continue
+            # Let the writer finish before loading
+            await asyncio.sleep(min(interval, 1.0))
+            try:
+                await self.reload()
+            except ModelLoadError as e:
+                print(f"⚠ Model file changed but reload failed → {e}")
+                self._watched_mtime = mtime
+
+    def start_watching(self):
+        interval = settings.model_watch_interval
+        if interval > 0 and (self._watch_task is None or self._watch_task.done()):
+            self._watch_task = asyncio.get_running_loop().create_task(self.watch(interval))
+            print(f"👀 Watching {self.active.model_path} for new model versions")
+
+    async def stop_watching(self):
+        if self._watch_task:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    # ------------------------------------------------------------------
+    # Status
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _describe(model: GardenPredictor) -> Dict:
+        return {
+            "model_path": model.model_path,
+            "status": model.status,
+            "type": type(model.model).__name__ if model.model is not None else None,
+            "load_seconds": model.load_seconds,
+        }
+
+    def status(self) -> Dict:
+        return {
+            "version": self.version,
+            "activated_at": self.activated_at.isoformat(),
+            "active": self._describe(self.active),
+            "candidate": self._describe(self.candidate) if self.candidate else None,
+            "shadow": self.shadow.snapshot() if self.candidate else None,
+            "watching": bool(self._watch_task and not self._watch_task.done()),
+        }
+
+
+# Global registry (used by API)
+model_registry = ModelRegistry(predictor)
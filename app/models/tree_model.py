@@ -0,0 +1,230 @@
+import json
+from pathlib import Path
+from typing import Dict, List, Union
+import numpy as np
+
+
+SUPPORTED_OBJECTIVES = ("binary:logistic", "binary:logitraw", "multi:softprob", "multi:softmax")
+
+
+def _parse_base_score(value: Union[str, float]) -> List[float]:
+    """XGBoost >= 3 writes base_score as "[5E-1]" (one entry per target)."""
+    if isinstance(value, (int, float)):
+        return [float(value)]
+    return [float(v) for v in str(value).strip("[]").split(",") if v.strip()]
+
+
+class CompiledTreeModel:
+    """
+    Gradient-boosted tree ensemble evaluated with plain NumPy.
+
+    Trees are flattened into padded (n_trees x max_nodes) arrays and all
+    rows x trees are walked one level per step, so prediction cost is
+    ``max_depth`` vectorized gathers regardless of batch size. Splits follow
+    XGBoost semantics: float32 ``x < threshold`` goes left, NaN follows the
+    node's default direction, and margins are accumulated tree by tree in
+    float32 — results match the original booster.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(
+        self,
+        left: np.ndarray,
+        right: np.ndarray,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        default_left: np.ndarray,
+        value: np.ndarray,
+        tree_group: np.ndarray,
+        max_depth: int,
+        base_margin: np.ndarray,
+        objective: str,
+        num_class: int,
+        num_feature: int,
+    ):
+        self.left = left.astype(np.int32)
+        self.right = right.astype(np.int32)
+        self.feature = feature.astype(np.int32)
+        self.threshold = threshold.astype(np.float32)
+        self.default_left = default_left.astype(bool)
+        self.value = value.astype(np.float32)
+        self.tree_group = tree_group.astype(np.int32)
+        self.max_depth = int(max_depth)
+        self.base_margin = base_margin.astype(np.float32)
+        self.objective = objective
+        self.num_class = int(num_class)
+        self.num_feature = int(num_feature)
+
+        # sklearn-style attributes used by GardenPredictor
+        self.classes_ = np.arange(max(self.num_class, 2))
+        self.n_features_in_ = self.num_feature
+        self._tree_index = np.arange(len(self.left))
+
+    # ------------------------------------------------------------------
+    # Build from an XGBoost model
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_xgboost_json(cls, model: Dict) -> "CompiledTreeModel":
+        """Compile the JSON document produced by ``Booster.save_raw("json")``."""
+        learner = model["learner"]
+        booster = learner["gradient_booster"]
+        if booster.get("name") != "gbtree":
+            raise ValueError(f"Only gbtree boosters are supported, got {booster.get('name')}")
+
+        objective = learner["objective"]["name"]
+        if objective not in SUPPORTED_OBJECTIVES:
+            raise ValueError(f"Unsupported objective: {objective}")
+
+        params = learner["learner_model_param"]
+        num_class = int(params.get("num_class", 0))
+        num_feature = int(params["num_feature"])
+        n_groups = max(num_class, 1)
+
+        trees = booster["model"]["trees"]
+        tree_info = booster["model"]["tree_info"]
+
+        # Honour early stopping the way predict_proba does
+        best_iteration = learner.get("attributes", {}).get("best_iteration")
+        if best_iteration is not None:
+            num_parallel = int(booster["model"]["gbtree_model_param"].get("num_parallel_tree", 1))
+            keep = (int(best_iteration) + 1) * num_parallel * n_groups
+            trees, tree_info = trees[:keep], tree_info[:keep]
+
+        max_nodes = max(len(t["left_children"]) for t in trees)
+        n_trees = len(trees)
+        left = np.full((n_trees, max_nodes), -1, dtype=np.int32)
+        right = np.full((n_trees, max_nodes), -1, dtype=np.int32)
+        feature = np.zeros((n_trees, max_nodes), dtype=np.int32)
+        threshold = np.zeros((n_trees, max_nodes), dtype=np.float32)
+        default_left = np.zeros((n_trees, max_nodes), dtype=bool)
+        value = np.zeros((n_trees, max_nodes), dtype=np.float32)
+
+        depth = 0
+        for t, tree in enumerate(trees):
+            if tree.get("categories_nodes"):
+                raise ValueError("Categorical splits are not supported")
+            n = len(tree["left_children"])
+            left[t, :n] = tree["left_children"]
+            right[t, :n] = tree["right_children"]
+            feature[t, :n] = tree["split_indices"]
+            # For leaves, split_conditions holds the leaf value
+            conditions = np.asarray(tree["split_conditions"], dtype=np.float32)
+            threshold[t, :n] = conditions
+            value[t, :n] = conditions
+            default_left[t, :n] = np.asarray(tree["default_left"], dtype=bool)
+            feature[t, :n][left[t, :n] == -1] = 0
+            depth = max(depth, cls._tree_depth(left[t], right[t]))
+
+        base = np.asarray(_parse_base_score(params["base_score"]), dtype=np.float64)
+        if objective == "binary:logistic":
+            base = np.log(base / (1 - base))  # stored in probability space
+        base_margin = np.broadcast_to(base, (n_groups,)).copy()
+
+        return cls(
+            left, right, feature, threshold, default_left, value,
+            np.asarray(tree_info, dtype=np.int32), depth, base_margin,
+            objective, num_class, num_feature,
+        )
+
+    @classmethod
+    def from_booster(cls, booster) -> "CompiledTreeModel":
+        """Compile an ``xgboost.Booster`` (or a model exposing ``get_booster()``)."""
+        if hasattr(booster, "get_booster"):
+            booster = booster.get_booster()
+        raw = booster.save_raw(raw_format="json")
+        return cls.from_xgboost_json(json.loads(bytes(raw)))
+
+    @staticmethod
+    def _tree_depth(left: np.ndarray, right: np.ndarray) -> int:
+        depth, frontier = 0, [0]
+        while frontier:
+            children = [c for n in frontier for c in (left[n], right[n]) if c != -1]
+            if not children:
+                break
+            depth += 1
+            frontier = children
+        return depth
+
+    # ------------------------------------------------------------------
+    # Serialization (.npz, no pickle)
+    # ------------------------------------------------------------------
+    def save(self, path: Union[str, Path]):
+        meta = {
+            "format_version": self.FORMAT_VERSION,
+            "objective": self.objective,
+            "num_class": self.num_class,
+            "num_feature": self.num_feature,
+            "max_depth": self.max_depth,
+        }
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8),
+                left=self.left,
+                right=self.right,
+                feature=self.feature,
+                threshold=self.threshold,
+                default_left=self.default_left,
+                value=self.value,
+                tree_group=self.tree_group,
+                base_margin=self.base_margin,
+            )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "CompiledTreeModel":
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(data["meta"].tobytes().decode())
+            if meta["format_version"] != cls.FORMAT_VERSION:
+                raise ValueError(f"Unsupported compiled model version {meta['format_version']}")
+            return cls(
+                data["left"], data["right"], data["feature"], data["threshold"],
+                data["default_left"], data["value"], data["tree_group"],
+                meta["max_depth"], data["base_margin"], meta["objective"],
+                meta["num_class"], meta["num_feature"],
+            )
+
+    # ------------------------------------------------------------------
+    # Prediction
+    # ------------------------------------------------------------------
+    def leaf_values(self, X: np.ndarray) -> np.ndarray:
+        """(n_rows x n_trees) leaf value reached by each row in each tree."""
+        X = np.asarray(X, dtype=np.float32)
+        n = len(X)
+        trees = self._tree_index
+        rows = np.arange(n)[:, None]
+        node = np.zeros((n, len(trees)), dtype=np.int32)
+
+        for _ in range(self.max_depth):
+            fvalue = X[rows, self.feature[trees, node]]
+            go_left = np.where(
+                np.isnan(fvalue),
+                self.default_left[trees, node],
+                fvalue < self.threshold[trees, node],
+            )
+            child = np.where(go_left, self.left[trees, node], self.right[trees, node])
+            node = np.where(child == -1, node, child)
+
+        return self.value[trees, node]
+
+    def predict_margin(self, X: np.ndarray) -> np.ndarray:
+        leaves = self.leaf_values(X)
+        n_groups = len(self.base_margin)
+        margin = np.empty((len(leaves), n_groups), dtype=np.float32)
+        margin[:] = self.base_margin
+        # Sequential float32 accumulation, same order as XGBoost
+        for t in range(leaves.shape[1]):
+            margin[:, self.tree_group[t]] += leaves[:, t]
+        return margin
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        margin = self.predict_margin(X)
+        if self.objective.startswith("binary:"):
+            p = (1.0 / (1.0 + np.exp(-margin[:, 0]))).astype(np.float32)
+            return np.column_stack([1 - p, p])
+        shifted = margin - margin.max(axis=1, keepdims=True)
+        e = np.exp(shifted)
+        return (e / e.sum(axis=1, keepdims=True)).astype(np.float32)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
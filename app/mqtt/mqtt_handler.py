@@ -1,10 +1,20 @@
 import asyncio
 import json
 import re
+import time
+import traceback
 import paho.mqtt.client as mqtt
 from datetime import datetime
+from typing import Optional
 from zoneinfo import ZoneInfo
+from app.config import settings
 from app.database.database import SessionLocal, SensorReading
+from app.services.feature_buffer import feature_store
+from app.services.ingest_spool import ingest_spool
+from app.services.metrics import (
+    BUFFER_MERGES, DB_INSERT_FAILURES, DB_INSERT_SECONDS, MQTT_MESSAGES,
+)
+from app.services.versioning import versions
 from app.services.websocket_manager import ws_manager
 
 BROKER = "viridion_mqtt"
@@ -27,6 +37,32 @@ watering_states = {}
 # 👇 Water tank state tracker
 water_tank_states = {}
 
+# Pre-resolved metric children (hot path)
+_msg_watering = MQTT_MESSAGES.labels("watering_status")
+_msg_tank = MQTT_MESSAGES.labels("tank_status")
+_msg_sensor = MQTT_MESSAGES.labels("sensor")
+_msg_ignored = MQTT_MESSAGES.labels("ignored")
+_msg_invalid = MQTT_MESSAGES.labels("invalid")
+
+# Callbacks run (on the MQTT thread) whenever a plant's merged buffer changes
+buffer_listeners = []
+
+
+# Callbacks run (on the MQTT thread) for every watering status report
+watering_status_listeners = []
+
+
+def add_buffer_listener(callback):
+    """Register ``callback(plant_id, buffer_snapshot)`` for buffer changes."""
+    if callback not in buffer_listeners:
+        buffer_listeners.append(callback)
+
+
+def add_watering_status_listener(callback):
+    """Register ``callback(plant_id, report)`` for ESP32 watering status reports."""
+    if callback not in watering_status_listeners:
+        watering_status_listeners.append(callback)
+
 def get_or_create_buffer(plant_id: str):
     if plant_id not in sensor_buffers:
         sensor_buffers[plant_id] = {
@@ -58,16 +94,19 @@ def on_message(client, userdata, msg):
 
     # Handle watering status updates
     if "/watering/status" in topic:
+        _msg_watering.inc()
         handle_watering_status(topic, payload)
         return
     
     if "/tank/status" in topic:
+        _msg_tank.inc()
         handle_water_tank_status(topic, payload)
         return
 
     # Handle sensor data
     match = re.match(r"smartgarden/(plant\d+)/", topic)
     if not match:
+        _msg_ignored.inc()
         print(f"⚠️ Ignoring message with no plant ID: {topic}")
         return
 
@@ -75,8 +114,10 @@ def on_message(client, userdata, msg):
 
     try:
         data = json.loads(payload)
+        _msg_sensor.inc()
         update_sensor_buffer(plant_id, data)
     except Exception as e:
+        _msg_invalid.inc()
         print(f"⚠️ Error parsing message for {plant_id}: {e}")
 
 
@@ -98,9 +139,19 @@ def handle_watering_status(topic: str, payload: str):
             "last_update": datetime.now(ZoneInfo("America/El_Salvador")).isoformat()
         }
 
+        versions.bump("watering", plant_id)
+        if is_watering:
+            feature_store.record_watering(plant_id)
+
         print(f"💧 [{plant_id}] Watering status updated: {status} (active: {is_watering})")
         print(f"   Stored state: {watering_states[plant_id]}")
 
+        for listener in watering_status_listeners:
+            try:
+                listener(plant_id, data)
+            except Exception as e:
+                print(f"⚠️ Watering status listener failed for {plant_id}: {e}")
+
         # Broadcast watering update via WebSocket
         if event_loop:
             asyncio.run_coroutine_threadsafe(
@@ -129,6 +180,7 @@ def handle_water_tank_status(topic: str, payload: str):
             "last_update": datetime.now(ZoneInfo("America/El_Salvador")).isoformat()
         }
 
+        versions.bump("tank", plant_id)
         print(f"💧 [{plant_id}] Water tank status updated: {'HAS WATER' if has_water else 'EMPTY'}")
         print(f"   Stored state: {water_tank_states[plant_id]}")
 
@@ -173,13 +225,16 @@ def update_sensor_buffer(plant_id: str, data: dict):
     buffer = get_or_create_buffer(plant_id)
     updated = False
 
+    changed = {}
     for key, value in data.items():
         if key in buffer:
-            buffer[key] = float(value)
+            buffer[key] = changed[key] = float(value)
             updated = True
 
     if updated:
+        BUFFER_MERGES.inc()
         buffer["last_update"] = datetime.utcnow()
+        feature_store.update(plant_id, changed)
         print(f"🧩 Updated buffer for {plant_id}: {buffer}")
 
         # Broadcast sensor update via WebSocket
@@ -194,36 +249,57 @@ def update_sensor_buffer(plant_id: str, data: dict):
     if all(buffer[k] is not None for k in required):
         save_combined_reading(plant_id, buffer)
 
+        if updated:
+            snapshot = dict(buffer)
+            for listener in buffer_listeners:
+                try:
+                    listener(plant_id, snapshot)
+                except Exception as e:
+                    print(f"⚠️ Buffer listener failed for {plant_id}: {e}")
+
 
 # -----------------------------
 # DATABASE LOGIC
 # -----------------------------
-import traceback
-
 def save_combined_reading(plant_id: str, buffer: dict):
+    row = {
+        "plant_id": plant_id,
+        "timestamp": datetime.now(ZoneInfo("America/El_Salvador")),
+        "temperature": buffer.get("temperature"),
+        "humidity": buffer.get("humidity"),
+        "soil_moisture": buffer.get("soil_moisture"),
+        "light_level": buffer.get("light_level"),
+        "pressure": buffer.get("pressure"),
+    }
+
+    # DB down / slow, or older readings still waiting → keep order via the spool
+    if ingest_spool.should_spool():
+        ingest_spool.append(row)
+        return
+
+    started = time.perf_counter()
     db = SessionLocal()
     try:
-        reading = SensorReading(
-            plant_id=plant_id,
-            timestamp=datetime.now(ZoneInfo("America/El_Salvador")),
-            temperature=buffer.get("temperature"),
-            humidity=buffer.get("humidity"),
-            soil_moisture=buffer.get("soil_moisture"),
-            light_level=buffer.get("light_level"),
-            pressure=buffer.get("pressure"),
-        )
+        reading = SensorReading(**row)
 
         db.add(reading)
         db.commit()
+        elapsed = time.perf_counter() - started
+        DB_INSERT_SECONDS.observe(elapsed)
+        ingest_spool.record_insert(elapsed)
+        versions.bump("readings", plant_id)
         print("💾 SUCCESS — Row saved to DB:", reading.id)
 
     except Exception as e:
+        DB_INSERT_FAILURES.inc()
         db.rollback()
         print("\n🚨 DATABASE INSERT FAILED 🚨")
-        print("Error:", e)
-        print("-------- FULL TRACEBACK --------")
-        print(traceback.format_exc())
-        print("--------------------------------\n")
+        print("Error:", str(e).splitlines()[0])
+        if settings.ingest_spool_enabled:
+            ingest_spool.trip("insert failed")
+            ingest_spool.append(row)
+        else:
+            print(traceback.format_exc())
 
     finally:
         db.close()
@@ -232,18 +308,25 @@ def save_combined_reading(plant_id: str, buffer: dict):
 # -----------------------------
 # PUBLISH COMMAND (for API)
 # -----------------------------
-def publish_watering_command(plant_id: str, status: bool, duration: int = 10):
-    """Send watering command to ESP32"""
+def publish_watering_command(
+    plant_id: str, status: bool, duration: int = 10, command_id: Optional[str] = None
+):
+    """Send watering command to ESP32 (``command_id`` is echoed back in its status report)"""
     topic = f"smartgarden/{plant_id}/watering/command"
-    payload = json.dumps({
+    message = {
         "status": status,
         "duration": duration
-    })
+    }
+    if command_id:
+        message["command_id"] = command_id
+    payload = json.dumps(message)
     
     result = mqtt_client.publish(topic, payload, qos=1)
     
     if result.rc == mqtt.MQTT_ERR_SUCCESS:
         print(f"📤 Published to {topic}: {payload}")
+        if status:
+            feature_store.record_watering(plant_id)
         return True
     else:
         print(f"❌ Failed to publish command, rc: {result.rc}")
@@ -258,11 +341,17 @@ def start_mqtt(loop: asyncio.AbstractEventLoop):
     event_loop = loop  # Store for WebSocket broadcasts
     mqtt_client.on_connect = on_connect
     mqtt_client.on_message = on_message
-    mqtt_client.connect(BROKER, PORT, 60)
+    # connect_async: the network thread performs (and retries) the connect,
+    # so startup never blocks on DNS / TCP to the broker
+    mqtt_client.connect_async(settings.mqtt_broker or BROKER, settings.mqtt_port or PORT, 60)
     mqtt_client.loop_start()
     print("🚀 MQTT listener started (WebSocket broadcasting enabled)")
 
 
+def is_mqtt_connected() -> bool:
+    return mqtt_client.is_connected()
+
+
 # -----------------------------
 # EXPORT CLIENT (for router use)
 # -----------------------------
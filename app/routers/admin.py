@@ -0,0 +1,50 @@
+import asyncio
+from datetime import datetime
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from app.config import settings
+from app.services import profiler
+
+router = APIRouter()
+
+
+def require_admin(x_admin_token: str | None = Header(None)):
+    """Admin endpoints are opt-in and optionally protected by ADMIN_TOKEN."""
+    if not settings.profiling_enabled:
+        raise HTTPException(status_code=404, detail="Profiling is disabled (PROFILING_ENABLED)")
+    if settings.admin_token and x_admin_token != settings.admin_token:
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+# ------------------------------
+# 🔥 On-demand sampling profile
+# ------------------------------
+@router.post("/profile", dependencies=[Depends(require_admin)])
+async def capture_profile(
+    seconds: float = Query(10, gt=0, le=300, description="How long to sample"),
+    interval_ms: float = Query(None, ge=1, le=1000, description="Sampling interval"),
+):
+    """
+    Sample every thread (event loop, MQTT loop, worker pools) for N seconds
+    and return the collapsed stacks (flamegraph.pl / speedscope input).
+    """
+    if not profiler.profile_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="A profile is already being captured")
+    try:
+        result = await asyncio.to_thread(
+            profiler.profile_for, seconds, interval_ms / 1000 if interval_ms else None
+        )
+    finally:
+        profiler.profile_lock.release()
+
+    summary = result.summary()
+    print(f"🔥 Profile captured: {summary}")
+    filename = f"profile-{datetime.utcnow():%Y%m%dT%H%M%S}.folded"
+    return PlainTextResponse(
+        result.collapsed(),
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Profile-Samples": str(summary["samples"]),
+            "X-Profile-Duration": str(summary["duration_s"]),
+        },
+    )
@@ -0,0 +1,49 @@
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from app.services import export_service
+
+router = APIRouter()
+
+
+# ------------------------------
+# 📤 Columnar history export
+# ------------------------------
+@router.get("/{dataset}")
+def export_dataset(
+    dataset: str,
+    format: str = Query("parquet", description="parquet or arrow (IPC stream)"),
+    plant_id: str | None = Query(None, description="Filter by plant ID"),
+    start: datetime | None = Query(None, description="Inclusive start of the time range"),
+    end: datetime | None = Query(None, description="Exclusive end of the time range"),
+):
+    """
+    Stream sensor_readings or predictions as Parquet / Arrow IPC.
+
+    Rows are read from Postgres in chunks and encoded batch by batch, so the
+    export size is not limited by memory.
+    """
+    if dataset not in export_service.EXPORT_DATASETS:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown dataset '{dataset}'. Choose from {list(export_service.EXPORT_DATASETS)}",
+        )
+    if format not in export_service.EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown format '{format}'. Choose from {list(export_service.EXPORT_FORMATS)}",
+        )
+
+    try:
+        # Fail fast (before the response starts) if pyarrow is missing
+        export_service.arrow_schema(dataset)
+    except export_service.ExportUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+    extension = "parquet" if format == "parquet" else "arrows"
+    filename = f"{dataset}-{plant_id or 'all'}.{extension}"
+    return StreamingResponse(
+        export_service.stream_export(dataset, format, plant_id, start, end),
+        media_type=export_service.EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,61 @@
+import asyncio
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from app.config import settings
+from app.database.database import engine
+from app.models.registry import model_registry
+from app.mqtt.mqtt_handler import is_mqtt_connected
+from app.services.ingest_spool import ingest_spool
+from app.services.startup_service import startup_state
+
+router = APIRouter()
+
+
+async def _ping_database() -> bool:
+    try:
+        async with engine.connect() as conn:
+            await asyncio.wait_for(conn.execute(text("SELECT 1")), timeout=2)
+        return True
+    except Exception:
+        return False
+
+
+# ------------------------------
+# 💓 Liveness — the process is up and the event loop responds
+# ------------------------------
+@router.get("/live")
+async def liveness():
+    return {"status": "alive", **startup_state.snapshot()}
+
+
+# ------------------------------
+# ✅ Readiness — DB, model (and optionally MQTT) are usable
+# ------------------------------
+@router.get("/ready")
+async def readiness():
+    db_ok = startup_state.db_ready and await _ping_database()
+    mqtt_ok = is_mqtt_connected()
+    predictor = model_registry.active
+    model_ok = predictor.is_loaded
+
+    ready = db_ok and model_ok and (mqtt_ok or not settings.readiness_requires_mqtt)
+    body = {
+        "status": "ready" if ready else "starting" if not startup_state.complete else "degraded",
+        "checks": {
+            "database": {"ok": db_ok, "error": None if db_ok else startup_state.db_error},
+            "mqtt": {"ok": mqtt_ok, "error": startup_state.mqtt_error},
+            "model": {
+                "ok": model_ok,
+                "status": predictor.status,
+                "load_seconds": predictor.load_seconds,
+                "version": model_registry.version,
+            },
+        },
+        "ingest_spool": ingest_spool.stats(),
+        "startup": startup_state.snapshot(),
+    }
+    if settings.chunk_storage_enabled:
+        from app.services.chunk_store import chunk_compactor  # numpy; only with chunk storage on
+        body["chunk_storage"] = chunk_compactor.stats()
+    return JSONResponse(body, status_code=200 if ready else 503)
@@ -0,0 +1,53 @@
+from fastapi import APIRouter, HTTPException
+from app.database.schemas import ModelPathRequest
+from app.models.registry import ModelLoadError, model_registry
+
+router = APIRouter()
+
+
+# ------------------------------
+# 🤖 Active / candidate model status
+# ------------------------------
+@router.get("/")
+async def model_status():
+    return model_registry.status()
+
+
+# ------------------------------
+# 🔁 Hot reload (atomic swap)
+# ------------------------------
+@router.post("/reload")
+async def reload_model(data: ModelPathRequest):
+    """Load a model version in the background and swap it in without a restart."""
+    try:
+        return await model_registry.reload(data.model_path)
+    except ModelLoadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# ------------------------------
+# 🧪 Shadow candidate
+# ------------------------------
+@router.post("/candidate")
+async def stage_candidate(data: ModelPathRequest):
+    """Stage a candidate model; it is scored on live traffic but never answers."""
+    if not data.model_path:
+        raise HTTPException(status_code=400, detail="model_path is required for a candidate")
+    try:
+        return await model_registry.stage_candidate(data.model_path)
+    except ModelLoadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/candidate/promote")
+async def promote_candidate():
+    try:
+        return model_registry.promote_candidate()
+    except ModelLoadError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.delete("/candidate")
+async def discard_candidate():
+    model_registry.discard_candidate()
+    return model_registry.status()
@@ -1,8 +1,17 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database.database import get_db
-from app.database.schemas import WateringRequest, WateringPredictionResponse
+from app.database.schemas import (
+    BatchWateringPredictionResponse,
+    BatchWateringRequest,
+    WateringPredictionResponse,
+    WateringRequest,
+)
 from app.services.prediction_service import PredictionService
+from app.services.feature_buffer import feature_store
+from app.services.inference_executor import inference_batcher
+from app.services.prediction_cache import feature_cache, reading_cache
+from app.services.prediction_recorder import prediction_recorder
 
 router = APIRouter()
 
@@ -16,3 +25,37 @@ async def watering_prediction(
     """
     _, result = await PredictionService.predict_and_save(db, data.plant_id)
     return result
+
+
+@router.post("/watering/batch", response_model=BatchWateringPredictionResponse)
+async def watering_prediction_batch(
+    data: BatchWateringRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Make watering predictions for several plants (or all plants) in one call.
+    """
+    return await PredictionService.predict_batch_and_save(db, data.plant_ids)
+
+
+@router.get("/features/{plant_id}")
+async def rolling_features(plant_id: str):
+    """
+    Current rolling-window features for a plant (from the in-memory ring buffers).
+    """
+    return {"plant_id": plant_id, "features": feature_store.features(plant_id)}
+
+
+@router.get("/stats")
+async def prediction_stats():
+    """
+    Runtime statistics of the prediction pipeline.
+    """
+    return {
+        "executor": inference_batcher.stats(),
+        "recorder": prediction_recorder.stats(),
+        "cache": {
+            "reading": reading_cache.stats(),
+            "features": feature_cache.stats(),
+        },
+    }
@@ -1,8 +1,22 @@
-from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect
+import heapq
+import json
+from fastapi import (
+    APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect,
+)
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
 from app.database.database import get_db, SensorReading
-from app.database.schemas import SensorReadingCreate, SensorReadingResponse, WaterTankStatus
+from app.database.schemas import (
+    BulkIngestSummary,
+    SensorReadingCreate,
+    SensorReadingResponse,
+    WaterTankStatus,
+)
 from app.services import sensor_service
+from app.services.serialization import FastJSONResponse, rows_response
+from app.services.versioning import cache_headers, check_not_modified, versions
 from app.services.websocket_manager import ws_manager
 
 router = APIRouter()
@@ -17,85 +31,225 @@ async def add_sensor_reading(data: SensorReadingCreate, db: AsyncSession = Depen
     db.add(reading)
     await db.commit()
     await db.refresh(reading)
+    versions.bump("readings", reading.plant_id)
     return reading
 
 
+# ------------------------------
+# 📦 Bulk upload (JSON array or NDJSON)
+# ------------------------------
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+@router.post("/bulk", response_model=BulkIngestSummary)
+async def bulk_ingest_readings(request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Ingest many readings at once (e.g. a gateway flushing its offline buffer).
+
+    Body is either a JSON array of readings or an NDJSON stream (one reading
+    per line, Content-Type ``application/x-ndjson``). Every reading needs a
+    ``plant_id``; ``timestamp`` is optional. Readings are validated per chunk
+    and inserted with multi-row INSERTs inside a single transaction; invalid
+    readings are skipped and reported in the summary.
+    """
+    tracker = sensor_service.BulkIngestTracker()
+    chunk_size = settings.bulk_ingest_chunk_size
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    async def flush(rows: list, offset: int):
+        valid, errors = sensor_service.validate_bulk_readings(rows, offset)
+        tracker.add(len(rows), valid, errors)
+        tracker.inserted += await sensor_service.bulk_insert_readings(db, valid, chunk_size)
+
+    try:
+        if content_type in NDJSON_TYPES:
+            # Stream line by line so memory stays bounded by one chunk
+            pending, rows, offset = b"", [], 0
+            async for block in request.stream():
+                pending += block
+                *lines, pending = pending.split(b"\n")
+                for line in lines:
+                    if not line.strip():
+                        continue
+                    try:
+                        rows.append(json.loads(line))
+                    except ValueError as e:
+                        # Keep the position so the error index is accurate
+                        rows.append(None)
+                        print(f"⚠️ Bulk ingest: bad NDJSON line {offset + len(rows) - 1}: {e}")
+                    if len(rows) >= chunk_size:
+                        await flush(rows, offset)
+                        offset += len(rows)
+                        rows = []
+            if pending.strip():
+                try:
+                    rows.append(json.loads(pending))
+                except ValueError:
+                    rows.append(None)
+            if rows:
+                await flush(rows, offset)
+        else:
+            try:
+                payload = json.loads(await request.body())
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}")
+            if not isinstance(payload, list):
+                raise HTTPException(status_code=400, detail="Expected a JSON array of readings")
+            for start in range(0, len(payload), chunk_size):
+                await flush(payload[start:start + chunk_size], start)
+
+        await db.commit()
+    except SQLAlchemyError as e:
+        await db.rollback()
+        print(f"🚨 Bulk ingest failed after {tracker.received} readings: {e}")
+        raise HTTPException(status_code=503, detail="Database unavailable, nothing was stored")
+
+    versions.bump_many("readings", tracker.plants)
+    print(f"📦 Bulk ingest: {tracker.inserted} stored, {tracker.rejected} rejected")
+    return tracker.summary()
+
+
 # ------------------------------
 # 📊 Get full reading list
 # ------------------------------
-@router.get("/", response_model=list[SensorReadingResponse])
-async def list_readings(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(SensorReading))
-    return result.scalars().all()
+# Column order of the fast path; matches SensorReadingResponse
+READING_COLUMNS = (
+    "id", "timestamp", "temperature", "humidity", "soil_moisture", "light_level", "pressure",
+)
+FORMAT_QUERY = Query(
+    "rows", pattern="^(rows|columnar)$", description="rows (list of objects) or columnar (arrays)"
+)
+
+
+@router.get("/", response_model=list[SensorReadingResponse], response_class=FastJSONResponse)
+async def list_readings(
+    request: Request, format: str = FORMAT_QUERY, db: AsyncSession = Depends(get_db)
+):
+    etag, not_modified = check_not_modified(request, "readings")
+    if not_modified:
+        return not_modified
+    # Plain column tuples straight into the encoder: no ORM objects, no re-validation.
+    # Always (timestamp, id) order, whichever store a reading is in.
+    result = await db.execute(
+        select(*(getattr(SensorReading, column) for column in READING_COLUMNS))
+        .order_by(SensorReading.timestamp, SensorReading.id)
+    )
+    rows = result.all()
+    if settings.chunk_storage_enabled:
+        from app.services import chunk_store  # pulls in numpy — only with chunk storage on
+        # Both lists are sorted: merge them, skipping readings compacted since the query above
+        stored = {row[0] for row in rows}
+        chunked = await chunk_store.all_chunk_rows(db, READING_COLUMNS)
+        chunked = [row for row in chunked if row[0] not in stored]
+        rows = list(heapq.merge(chunked, rows, key=lambda row: (row[1], row[0])))
+    return rows_response(rows, READING_COLUMNS, format, headers=cache_headers(etag))
 
 
 # ------------------------------
 # 🌾 Soil Moisture History
 # ------------------------------
-@router.get("/soil")
+@router.get("/soil", response_class=FastJSONResponse)
 async def get_soil_history(
+    request: Request,
     plant_id: str | None = Query(None, description="Filter by plant ID"),
     limit: int = Query(50, ge=1, le=500),
+    format: str = FORMAT_QUERY,
     db: AsyncSession = Depends(get_db)
 ):
-    return await sensor_service.get_soil_history(db, plant_id, limit)
+    etag, not_modified = check_not_modified(request, "readings", plant_id)
+    if not_modified:
+        return not_modified
+    rows = await sensor_service.get_history_rows(db, "soil_moisture", plant_id, limit)
+    return rows_response(rows, ("timestamp", "soil_moisture"), format, headers=cache_headers(etag))
 
 
 # ------------------------------
-#  Air Temperature History
+# 🌡️ Air Temperature History
 # ------------------------------
-@router.get("/temperature")
+@router.get("/temperature", response_class=FastJSONResponse)
 async def get_temperature_history(
+    request: Request,
     plant_id: str | None = Query(None, description="Filter by plant ID"),
     limit: int = Query(50, ge=1, le=500),
+    format: str = FORMAT_QUERY,
     db: AsyncSession = Depends(get_db)
 ):
-    return await sensor_service.get_temperature_history(db, plant_id, limit)
+    etag, not_modified = check_not_modified(request, "readings", plant_id)
+    if not_modified:
+        return not_modified
+    rows = await sensor_service.get_history_rows(db, "temperature", plant_id, limit)
+    return rows_response(rows, ("timestamp", "temperature"), format, headers=cache_headers(etag))
 
 
 # ------------------------------
-#  Air Humidity History
+# 💨 Air Humidity History
 # ------------------------------
-@router.get("/humidity")
+@router.get("/humidity", response_class=FastJSONResponse)
 async def get_humidity_history(
+    request: Request,
     plant_id: str | None = Query(None, description="Filter by plant ID"),
     limit: int = Query(50, ge=1, le=500),
+    format: str = FORMAT_QUERY,
     db: AsyncSession = Depends(get_db)
 ):
-    return await sensor_service.get_humidity_history(db, plant_id, limit)
+    etag, not_modified = check_not_modified(request, "readings", plant_id)
+    if not_modified:
+        return not_modified
+    rows = await sensor_service.get_history_rows(db, "humidity", plant_id, limit)
+    return rows_response(rows, ("timestamp", "humidity"), format, headers=cache_headers(etag))
+
 
 # ------------------------------
-#  Air Humidity History
+# 🧭 Air Pressure History
 # ------------------------------
-@router.get("/pressure")
-async def pressure_history(
+@router.get("/pressure", response_class=FastJSONResponse)
+async def get_pressure_history(
+    request: Request,
     plant_id: str | None = Query(None, description="Filter by plant ID"),
     limit: int = Query(50, ge=1, le=500),
+    format: str = FORMAT_QUERY,
     db: AsyncSession = Depends(get_db)
 ):
-    return await sensor_service.get_pressure_history(db, plant_id, limit)
+    etag, not_modified = check_not_modified(request, "readings", plant_id)
+    if not_modified:
+        return not_modified
+    rows = await sensor_service.get_history_rows(db, "pressure", plant_id, limit)
+    return rows_response(rows, ("timestamp", "pressure"), format, headers=cache_headers(etag))
+
 
 # ------------------------------
-#  Light Level History
+# ☀️ Light Level History
 # ------------------------------
-
-@router.get("/light")
-async def pressure_history(
+@router.get("/light", response_class=FastJSONResponse)
+async def get_light_history(
+    request: Request,
     plant_id: str | None = Query(None, description="Filter by plant ID"),
     limit: int = Query(50, ge=1, le=500),
+    format: str = FORMAT_QUERY,
     db: AsyncSession = Depends(get_db)
 ):
-    return await sensor_service.get_light_history(db, plant_id, limit)
+    etag, not_modified = check_not_modified(request, "readings", plant_id)
+    if not_modified:
+        return not_modified
+    rows = await sensor_service.get_history_rows(db, "light_level", plant_id, limit)
+    return rows_response(rows, ("timestamp", "light_level"), format, headers=cache_headers(etag))
+
 
 # ------------------------------
 # 💧 Water Tank Status
 # ------------------------------
 @router.get("/tank/status", response_model=WaterTankStatus)
 async def get_tank_status(
+    request: Request,
+    response: Response,
     plant_id: str = Query("plant1", description="Plant ID to check water tank status")
 ):
     """Get current water tank status (has water or not)"""
+    etag, not_modified = check_not_modified(request, "tank", plant_id)
+    if not_modified:
+        return not_modified
     status_data = await sensor_service.get_water_tank_status(plant_id)
+    response.headers.update(cache_headers(etag))
     return WaterTankStatus(**status_data)
 
 
@@ -1,55 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
-from app.database.database import get_db, WateringEvent, SystemStatus
-from app.database.schemas import WateringToggle
-from app.mqtt.mqtt_handler import publish_watering_command  , get_watering_state
-from datetime import datetime
+from app.database.database import get_db, get_local_time
+from app.config import settings
+from app.database.schemas import BulkWateringRequest, BulkWateringSummary, WateringToggle
+from app.mqtt.mqtt_handler import get_watering_state
+from app.services import watering_service
+from app.services.auto_watering import auto_watering
+from app.services.command_pipeline import command_pipeline
+from app.services.serialization import FastJSONResponse, rows_response
+from app.services.versioning import cache_headers, check_not_modified, versions
+from datetime import date
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# In-memory runtime state
-watering_state = {
-    "active": False,
-    "schedule": {
-        "enabled": True,
-        "duration": 10,
-        "threshold": 30
-    }
-}
-
-
 @router.post("/toggle")
 async def toggle_watering(data: WateringToggle, db: AsyncSession = Depends(get_db)):
-    """Toggle watering on/off and send command to ESP32 via MQTT"""
-    
-    # Update in-memory state
-    watering_state["active"] = data.status
+    """
+    Toggle watering on/off and send command to ESP32 via MQTT.
+
+    The command is published without blocking the event loop and tracked
+    until the ESP32 reports back; set ``wait_for_ack`` to wait for that.
+    """
     
     # Send MQTT command to ESP32
     plant_id = data.plant_id or "plant1"
     duration =  data.duration
+
+    # Update in-memory state
+    watering_service.get_plant_state(plant_id)["active"] = data.status
+    versions.bump("watering", plant_id)
     
-    mqtt_sent = publish_watering_command(
+    command = await command_pipeline.send(
         plant_id=plant_id,
         status=data.status,
-        duration=duration
+        duration=duration,
+        wait_for_ack=data.wait_for_ack,
+        ack_timeout=data.ack_timeout,
     )
+    mqtt_sent = command["published"]
     
     if not mqtt_sent:
         logger.warning("⚠️ Failed to send MQTT command")
     
     # Log watering event to database
     if data.status:
-        event = WateringEvent(
-            duration=duration ,  
-            triggered_by="manual",
-            timestamp=datetime.utcnow()
+        await watering_service.record_watering_events(
+            db, [{"plant_id": plant_id, "duration": duration, "triggered_by": "manual"}]
         )
-        db.add(event)
         await db.commit()
+        versions.bump("watering_events", plant_id)
     
     return {
         "success": True,
@@ -57,42 +58,153 @@ async def toggle_watering(data: WateringToggle, db: AsyncSession = Depends(get_d
         "mqtt_sent": mqtt_sent,
         "plant_id": plant_id,
         "duration": duration,
+        "command_id": command["command_id"],
+        "acknowledged": command["acknowledged"],
+        "ack_ms": command["ack_ms"],
         "message": f"💧 Watering {'started' if data.status else 'stopped'}"
     }
 
 
+@router.post("/bulk", response_model=BulkWateringSummary)
+async def bulk_watering(data: BulkWateringRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Water a list of plants or a group selector in one call.
+
+    Commands are published concurrently (optionally staggered by
+    ``stagger_ms``), all events are stored with one INSERT, and the response
+    has a per-plant result.
+    """
+    if (data.plants is None) == (data.selector is None):
+        raise HTTPException(status_code=400, detail="Provide either 'plants' or 'selector'")
+
+    if data.plants is not None:
+        durations = {}
+        for target in data.plants:
+            durations.setdefault(target.plant_id, target.duration or data.duration)
+    else:
+        try:
+            plant_ids = await watering_service.resolve_selector(db, data.selector)
+        except watering_service.PlantSelectionError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        durations = dict.fromkeys(plant_ids, data.duration)
+
+    if not durations:
+        raise HTTPException(status_code=404, detail="No plants matched the request")
+    if len(durations) > settings.bulk_watering_max_plants:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many plants ({len(durations)} > {settings.bulk_watering_max_plants})",
+        )
+
+    summary = await watering_service.bulk_water(
+        db,
+        list(durations.items()),
+        stagger_ms=data.stagger_ms,
+        wait_for_ack=data.wait_for_ack,
+        ack_timeout=data.ack_timeout,
+    )
+    print(f"💧 Bulk watering: {summary['published']}/{summary['requested']} commands sent")
+    return summary
+
+
 @router.get("/status")
-async def get_watering_status(plant_id: str = "plant1"):
+async def get_watering_status(request: Request, response: Response, plant_id: str = "plant1"):
     """Get current watering status from ESP32 via MQTT"""
+    etag, not_modified = check_not_modified(request, "watering", plant_id)
+    if not_modified:
+        return not_modified
+    response.headers.update(cache_headers(etag))
+
     # Get real-time status from MQTT handler
     mqtt_state = get_watering_state(plant_id)
     
     # Update in-memory state with MQTT state if available
+    state = watering_service.get_plant_state(plant_id)
     if mqtt_state.get("status") != "unknown":
-        watering_state["active"] = mqtt_state.get("active", False)
+        state["active"] = mqtt_state.get("active", False)
     
     return {
-        "wateringStatus": watering_state["active"],
-        "schedule": watering_state["schedule"],
+        "plant_id": plant_id,
+        "wateringStatus": state["active"],
+        "schedule": state["schedule"],
         "mqtt_status": mqtt_state.get("status"),
         "last_update": mqtt_state.get("last_update")
     }
 
 
-@router.get("/history")
-async def get_watering_history(limit: int = 50, db: AsyncSession = Depends(get_db)):
-    """Get watering event history"""
-    result = await db.execute(
-        select(WateringEvent).order_by(desc(WateringEvent.timestamp)).limit(limit)
+@router.get("/commands")
+async def get_watering_commands():
+    """Pending watering commands, outcomes and per-plant command→ack latency"""
+    return command_pipeline.stats()
+
+
+@router.get("/auto")
+async def get_auto_watering_status():
+    """Get automatic (ML-driven) watering state per plant"""
+    return auto_watering.status()
+
+
+@router.get("/history", response_class=FastJSONResponse)
+async def get_watering_history(
+    request: Request,
+    plant_id: str | None = Query(None, description="Filter by plant ID"),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = Query(None, description="X-Next-Cursor value from the previous page"),
+    format: str = Query("rows", pattern="^(rows|columnar)$"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get watering event history, newest first (next page cursor in X-Next-Cursor)"""
+    etag, not_modified = check_not_modified(request, "watering_events", plant_id)
+    if not_modified:
+        return not_modified
+    try:
+        rows, next_cursor = await watering_service.get_watering_history_rows(
+            db, plant_id, limit, cursor
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    response = rows_response(
+        rows, watering_service.HISTORY_COLUMNS, format, headers=cache_headers(etag)
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+
+@router.get("/usage")
+async def get_watering_usage(
+    request: Request,
+    response: Response,
+    plant_id: list[str] | None = Query(None, description="One or more plant IDs"),
+    group: str | None = Query(None, description="Plant group from PLANT_GROUPS"),
+    start: date | None = Query(None, description="First day (default: first of this month)"),
+    end: date | None = Query(None, description="Last day, inclusive (default: today)"),
+    daily: bool = Query(False, description="Include per-day rows"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Water usage and watering time per plant from the daily rollup"""
+    if plant_id and group:
+        raise HTTPException(status_code=400, detail="Use either 'plant_id' or 'group'")
+    plant_ids = plant_id
+    if group:
+        if group not in settings.plant_groups:
+            raise HTTPException(status_code=404, detail=f"Unknown plant group '{group}'")
+        plant_ids = settings.plant_groups[group]
+
+    today = get_local_time().date()
+    end = end or today
+    start = start or end.replace(day=1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="'start' must not be after 'end'")
+
+    # One plant → its own stamp; several plants / a group → the all-plants stamp.
+    # The effective window is part of the ETag: the defaults move at midnight.
+    single = plant_ids[0] if plant_ids and len(plant_ids) == 1 else None
+    etag, not_modified = check_not_modified(
+        request, "watering_events", single, variant=f"{start.isoformat()}/{end.isoformat()}"
     )
-    events = result.scalars().all()
-
-    return [
-        {
-            "id": event.id,
-            "timestamp": event.timestamp.isoformat(),
-            "duration": event.duration,
-            "triggered_by": event.triggered_by
-        }
-        for event in events
-    ]
\ No newline at end of file
+    if not_modified:
+        return not_modified
+    response.headers.update(cache_headers(etag))
+    return await watering_service.get_daily_usage(db, plant_ids, start, end, daily)
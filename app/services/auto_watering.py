@@ -0,0 +1,207 @@
+import asyncio
+import time
+from typing import Dict, Optional, Set
+from sqlalchemy import select
+from app.config import settings
+from app.database.database import SystemStatus, async_session
+from app.mqtt import mqtt_handler
+from app.models.registry import model_registry
+from app.services import watering_service
+from app.services.command_pipeline import command_pipeline
+from app.services.feature_buffer import feature_store
+from app.services.inference_executor import inference_batcher
+from app.services.versioning import versions
+
+# How long stop() lets in-flight evaluations finish before cancelling them
+STOP_TIMEOUT_S = 5.0
+
+
+class PlantDecisionState:
+    """Per-plant debounce / hysteresis / cooldown bookkeeping."""
+
+    def __init__(self):
+        self.latest: Optional[dict] = None
+        self.pending: Optional[asyncio.TimerHandle] = None
+        self.lock = asyncio.Lock()
+        # Disarmed after a watering command; re-armed once moisture recovers
+        self.armed = True
+        self.last_command_at: Optional[float] = None
+        self.last_decision: Optional[Dict] = None
+        self.commands = 0
+
+    def snapshot(self) -> Dict:
+        return {
+            "armed": self.armed,
+            "pending": self.pending is not None,
+            "commands": self.commands,
+            "seconds_since_command": (
+                round(time.monotonic() - self.last_command_at, 1) if self.last_command_at else None
+            ),
+            "last_decision": self.last_decision,
+        }
+
+
+class AutoWateringController:
+    """
+    Turns sensor ingest into watering decisions without client polling.
+
+    The MQTT thread reports every merged-buffer change; evaluation is
+    debounced per plant, then the active model decides. A plant is only
+    watered when the model says so with enough confidence, the controller is
+    armed (hysteresis: after watering, moisture has to climb back above
+    ``threshold_setting + auto_watering_hysteresis`` first), the cooldown has
+    elapsed and the tank is not reported empty.
+    """
+
+    def __init__(self):
+        self.plants: Dict[str, PlantDecisionState] = {}
+        self._config: Optional[Dict] = None
+        self._config_loaded_at = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Running evaluations: the loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        mqtt_handler.add_buffer_listener(self.notify)
+        print("🤖 Auto-watering decisions attached to sensor ingest")
+
+    async def stop(self):
+        """Drop debounced evaluations and let running ones finish (then cancel them)."""
+        self._loop = None
+        for state in self.plants.values():
+            if state.pending:
+                state.pending.cancel()
+                state.pending = None
+        tasks = list(self._tasks)
+        if not tasks:
+            return
+        _, running = await asyncio.wait(tasks, timeout=STOP_TIMEOUT_S)
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+    # ------------------------------------------------------------------
+    # Ingest hook (MQTT thread)
+    # ------------------------------------------------------------------
+    def notify(self, plant_id: str, snapshot: dict):
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._schedule, plant_id, snapshot)
+
+    def _schedule(self, plant_id: str, snapshot: dict):
+        if not self._loop:
+            return  # stopped after this callback was queued
+        state = self.plants.setdefault(plant_id, PlantDecisionState())
+        state.latest = snapshot
+        if state.pending:
+            state.pending.cancel()
+        state.pending = self._loop.call_later(
+            settings.auto_watering_debounce_s, self._start_evaluation, plant_id
+        )
+
+    def _start_evaluation(self, plant_id: str):
+        task = asyncio.get_running_loop().create_task(self._evaluate(plant_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._evaluation_done)
+
+    def _evaluation_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            print(f"⚠️ Auto-watering evaluation crashed: {task.exception()}")
+
+    # ------------------------------------------------------------------
+    # System settings (SystemStatus row, cached)
+    # ------------------------------------------------------------------
+    async def _load_config(self) -> Dict:
+        now = time.monotonic()
+        if self._config and now - self._config_loaded_at < settings.auto_watering_config_ttl_s:
+            return self._config
+
+        async with async_session() as db:
+            result = await db.execute(select(SystemStatus).order_by(SystemStatus.id.desc()).limit(1))
+            row = result.scalar_one_or_none()
+
+        self._config = {
+            "enabled": row.auto_watering_enabled if row else True,
+            "threshold": row.threshold_setting if row else 30,
+            "duration": row.duration_setting if row else 10,
+        }
+        self._config_loaded_at = now
+        return self._config
+
+    # ------------------------------------------------------------------
+    # Decision
+    # ------------------------------------------------------------------
+    async def _evaluate(self, plant_id: str):
+        state = self.plants[plant_id]
+        state.pending = None
+        # Serialize per plant so two evaluations cannot both pass the cooldown
+        async with state.lock:
+            await self._decide(plant_id, state, state.latest)
+
+    async def _decide(self, plant_id: str, state: PlantDecisionState, reading: dict):
+        try:
+            config = await self._load_config()
+            if not config["enabled"]:
+                return
+
+            moisture = reading["soil_moisture"]
+            if not state.armed:
+                if moisture < config["threshold"] + settings.auto_watering_hysteresis:
+                    return
+                state.armed = True
+                print(f"🤖 [{plant_id}] Moisture recovered ({moisture}) — auto-watering re-armed")
+
+            model = model_registry.active
+            result = await inference_batcher.predict(
+                soil_moisture=moisture,
+                soil_humidity=reading["humidity"],
+                temperature=reading["temperature"],
+                extra=feature_store.vector(plant_id, limit=model.n_features - len(model.FEATURES)),
+            )
+            state.last_decision = {**result, "soil_moisture": moisture}
+
+            if not result["should_water"] or result["confidence"] < settings.auto_watering_min_confidence:
+                return
+
+            if state.last_command_at and (
+                time.monotonic() - state.last_command_at < settings.auto_watering_cooldown_s
+            ):
+                return
+
+            tank = mqtt_handler.get_water_tank_state(plant_id)
+            if tank.get("status") == "empty":
+                print(f"🤖 [{plant_id}] Would water, but the tank is empty")
+                return
+
+            await self._water(plant_id, config["duration"], state)
+        except Exception as e:
+            print(f"⚠️ Auto-watering evaluation failed for {plant_id}: {e}")
+
+    async def _water(self, plant_id: str, duration: int, state: PlantDecisionState):
+        command = await command_pipeline.send(plant_id, True, duration)
+        if not command["published"]:
+            return
+
+        state.armed = False
+        state.last_command_at = time.monotonic()
+        state.commands += 1
+        print(f"🤖💧 [{plant_id}] Auto-watering for {duration}s (command {command['command_id']})")
+
+        async with async_session() as db:
+            await watering_service.record_watering_events(
+                db, [{"plant_id": plant_id, "duration": duration, "triggered_by": "ml_prediction"}]
+            )
+            await db.commit()
+        versions.bump("watering_events", plant_id)
+
+    def status(self) -> Dict:
+        return {
+            "enabled": settings.auto_watering_enabled,
+            "config": self._config,
+            "plants": {plant_id: s.snapshot() for plant_id, s in self.plants.items()},
+        }
+
+
+# Global controller instance
+auto_watering = AutoWateringController()
@@ -0,0 +1,187 @@
+import struct
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+# --------------------------------------------
+# 🗜️ Sensor chunk codec
+# --------------------------------------------
+# A chunk holds every reading of one plant in one time window, column by column:
+#
+#   timestamp   µs since epoch → delta-of-delta → zigzag → narrowest unsigned int
+#   id          delta → zigzag → narrowest unsigned int
+#   fields      float64 bits XOR the previous value (Gorilla-style), missing = NaN
+#
+# Each column is byte-shuffled (all first bytes, then all second bytes, ...) so
+# the zero bytes of regular timestamps and slowly changing values end up in
+# long runs, then deflated on its own: readers only inflate the columns they use.
+#
+# Layout: HEADER, one SECTION length per column, then the compressed columns.
+
+CODEC_VERSION = 1
+FIELDS = ("temperature", "humidity", "soil_moisture", "light_level", "pressure")
+COLUMNS = ("timestamp", "id", *FIELDS)
+
+HEADER = struct.Struct("<BBI")  # codec version, column count, row count
+SECTION = struct.Struct("<I")  # compressed column length
+INTEGERS = struct.Struct("<qqB")  # first value, first delta, packed width (bytes)
+ZLIB_LEVEL = 6
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+_UNSIGNED = {1: np.uint8, 2: np.uint16, 4: np.uint32, 8: np.uint64}
+
+
+class ChunkFormatError(ValueError):
+    """Raised when a chunk was written by an unknown codec version or is damaged."""
+
+
+# ------------------------------------------------------------------
+# Byte shuffle
+# ------------------------------------------------------------------
+def _shuffle(values: np.ndarray) -> bytes:
+    width = values.dtype.itemsize
+    return np.ascontiguousarray(values).view(np.uint8).reshape(-1, width).T.tobytes()
+
+
+def _unshuffle(raw: bytes, dtype, count: int) -> np.ndarray:
+    width = np.dtype(dtype).itemsize
+    planes = np.frombuffer(raw, dtype=np.uint8, count=width * count).reshape(width, count)
+    return planes.T.copy().view(dtype).reshape(count)
+
+
+# ------------------------------------------------------------------
+# Integers (delta / delta-of-delta)
+# ------------------------------------------------------------------
+def _pack_integers(values: np.ndarray, order: int) -> bytes:
+    values = values.astype(np.int64)
+    first = int(values[0]) if len(values) else 0
+    deltas = np.diff(values)
+    first_delta = int(deltas[0]) if order == 2 and len(deltas) else 0
+    residuals = np.diff(deltas) if order == 2 else deltas
+
+    zigzag = ((residuals << 1) ^ (residuals >> 63)).view(np.uint64)
+    largest = int(zigzag.max()) if len(zigzag) else 0
+    width = next(w for w, dtype in _UNSIGNED.items() if largest <= np.iinfo(dtype).max)
+    packed = zigzag.astype(_UNSIGNED[width])
+    return INTEGERS.pack(first, first_delta, width) + _shuffle(packed)
+
+
+def _unpack_integers(raw: bytes, count: int, order: int) -> np.ndarray:
+    first, first_delta, width = INTEGERS.unpack_from(raw)
+    residual_count = max(count - order, 0)
+    zigzag = _unshuffle(raw[INTEGERS.size:], _UNSIGNED[width], residual_count).astype(np.uint64)
+    sign = -(zigzag & np.uint64(1)).astype(np.int64)
+    residuals = (zigzag >> np.uint64(1)).astype(np.int64) ^ sign
+
+    if order == 2:
+        deltas = first_delta + np.concatenate(([0], np.cumsum(residuals)))[:max(count - 1, 0)]
+    else:
+        deltas = residuals
+    return first + np.concatenate(([0], np.cumsum(deltas, dtype=np.int64)))[:count]
+
+
+# ------------------------------------------------------------------
+# Floats (XOR with the previous value)
+# ------------------------------------------------------------------
+def _pack_floats(values: np.ndarray) -> bytes:
+    bits = np.ascontiguousarray(values, dtype=np.float64).view(np.uint64)
+    xored = bits.copy()
+    xored[1:] ^= bits[:-1]
+    return _shuffle(xored)
+
+
+def _unpack_floats(raw: bytes, count: int) -> np.ndarray:
+    xored = _unshuffle(raw, np.uint64, count)
+    return np.bitwise_xor.accumulate(xored).view(np.float64)
+
+
+# ------------------------------------------------------------------
+# Chunks
+# ------------------------------------------------------------------
+def encode_chunk(columns: Dict[str, np.ndarray]) -> bytes:
+    """
+    Encode one window of readings. ``columns`` maps every name in COLUMNS to
+    an array of equal length: int64 µs timestamps, int64 ids, float64 fields
+    (NaN for missing values). Rows should already be sorted by (timestamp, id).
+    """
+    count = len(columns["timestamp"])
+    sections = [
+        _pack_integers(columns["timestamp"], order=2),
+        _pack_integers(columns["id"], order=1),
+        *(_pack_floats(columns[field]) for field in FIELDS),
+    ]
+    compressed = [zlib.compress(section, ZLIB_LEVEL) for section in sections]
+    lengths = b"".join(SECTION.pack(len(section)) for section in compressed)
+    return HEADER.pack(CODEC_VERSION, len(compressed), count) + lengths + b"".join(compressed)
+
+
+def chunk_length(data: bytes) -> int:
+    """Number of readings in an encoded chunk (reads only the header)."""
+    return HEADER.unpack_from(data)[2]
+
+
+def decode_chunk(data: bytes, columns: Sequence[str] = COLUMNS) -> Dict[str, np.ndarray]:
+    """Decode the requested columns of a chunk (others are not even inflated)."""
+    version, section_count, count = HEADER.unpack_from(data)
+    if version != CODEC_VERSION or section_count != len(COLUMNS):
+        raise ChunkFormatError(
+            f"Unsupported sensor chunk (codec {version}, {section_count} columns)"
+        )
+
+    lengths = [
+        SECTION.unpack_from(data, HEADER.size + i * SECTION.size)[0] for i in range(section_count)
+    ]
+    position = HEADER.size + section_count * SECTION.size
+    spans: Dict[str, Tuple[int, int]] = {}
+    for name, length in zip(COLUMNS, lengths):
+        spans[name] = (position, position + length)
+        position += length
+
+    decoded = {}
+    for name in columns:
+        start, end = spans[name]
+        raw = zlib.decompress(data[start:end])
+        if name == "timestamp":
+            decoded[name] = _unpack_integers(raw, count, order=2)
+        elif name == "id":
+            decoded[name] = _unpack_integers(raw, count, order=1)
+        else:
+            decoded[name] = _unpack_floats(raw, count)
+    return decoded
+
+
+# ------------------------------------------------------------------
+# Conversions to / from DB rows
+# ------------------------------------------------------------------
+def to_microseconds(timestamp: datetime) -> int:
+    return (timestamp - EPOCH) // _MICROSECOND
+
+
+def columns_from_rows(rows: Sequence[Sequence]) -> Dict[str, np.ndarray]:
+    """Row tuples in COLUMNS order → codec arrays, sorted by (timestamp, id)."""
+    count = len(rows)
+    transposed = list(zip(*rows)) if rows else [() for _ in COLUMNS]
+    columns = {
+        "timestamp": np.fromiter((to_microseconds(t) for t in transposed[0]), np.int64, count),
+        "id": np.fromiter(transposed[1], np.int64, count),
+    }
+    for field, values in zip(FIELDS, transposed[2:]):
+        columns[field] = np.array(values, dtype=np.float64)  # None → NaN
+    return sort_columns(columns)
+
+
+def sort_columns(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    order = np.lexsort((columns["id"], columns["timestamp"]))
+    return {name: values[order] for name, values in columns.items()}
+
+
+def to_datetimes(microseconds: np.ndarray) -> List[datetime]:
+    """µs since epoch → timezone-aware UTC datetimes (like asyncpg returns them)."""
+    naive = microseconds.astype("datetime64[us]").astype(object)
+    return [t.replace(tzinfo=timezone.utc) for t in naive]
+
+
+def to_values(values: np.ndarray) -> List[Optional[float]]:
+    return [None if v != v else v for v in values.tolist()]  # NaN → None
@@ -0,0 +1,382 @@
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database.database import (
+    SensorChunk, SensorReading, SessionLocal, as_local, get_local_time,
+)
+from app.services.chunk_codec import (
+    CODEC_VERSION, COLUMNS, EPOCH, FIELDS, columns_from_rows, decode_chunk, encode_chunk,
+    sort_columns, to_datetimes, to_microseconds, to_values,
+)
+from app.services.metrics import Counter
+from app.services.versioning import versions
+
+# --------------------------------------------
+# 🗜️ Compressed chunk storage (opt-in)
+# --------------------------------------------
+# With settings.chunk_storage_enabled, ChunkCompactor moves every closed
+# window (settings.chunk_window_s) of sensor_readings into one sensor_chunks
+# row per plant. Recent readings stay in the row store; the readers below
+# decode chunks in bulk so history, list and export responses look the same
+# either way. Chunk rows keep their original reading ids, which is what lets
+# readers drop a reading that shows up in both stores mid-compaction.
+
+# Chunks fetched per query when scanning newest-first
+CHUNK_PAGE = 64
+
+COMPACTED = Counter(
+    "viridion_chunk_compacted_readings_total", "Readings moved from sensor_readings into chunks"
+)
+CHUNK_BYTES = Counter("viridion_chunk_written_bytes_total", "Compressed chunk bytes written")
+
+
+def window_start(timestamp: datetime, window_s: Optional[int] = None) -> datetime:
+    """Start of the (epoch-aligned, UTC) window containing ``timestamp``."""
+    window_s = window_s or settings.chunk_window_s
+    seconds = to_microseconds(timestamp) // 1_000_000
+    return EPOCH + timedelta(seconds=seconds - seconds % window_s)
+
+
+# ------------------------------------------------------------------
+# Decoding
+# ------------------------------------------------------------------
+def _decode(plant_id: str, data: bytes, columns: Sequence[str]) -> Dict[str, np.ndarray]:
+    """Decode ``columns`` (plus timestamp/id, needed for ordering) of one chunk."""
+    wanted = {"timestamp", "id", *columns} - {"plant_id"}
+    decoded = decode_chunk(data, [name for name in COLUMNS if name in wanted])
+    if "plant_id" in columns:
+        decoded["plant_id"] = np.full(len(decoded["id"]), plant_id, dtype=object)
+    return decoded
+
+
+def _concat(parts: List[Dict[str, np.ndarray]], columns: Sequence[str]) -> Dict[str, np.ndarray]:
+    names = {"timestamp", "id", *columns}
+    if not parts:
+        return {name: np.empty(0, dtype=object if name == "plant_id" else None) for name in names}
+    return {name: np.concatenate([part[name] for part in parts]) for name in names}
+
+
+def _rows(arrays: Dict[str, np.ndarray], columns: Sequence[str]) -> List[Tuple]:
+    """Arrays → row tuples in ``columns`` order, with the row-store Python types."""
+    converted = []
+    for name in columns:
+        values = arrays[name]
+        if name == "timestamp":
+            converted.append(to_datetimes(values.astype(np.int64)))
+        elif name in FIELDS:
+            converted.append(to_values(values))
+        else:
+            converted.append(values.tolist())
+    return list(zip(*converted))
+
+
+# ------------------------------------------------------------------
+# Reading (API)
+# ------------------------------------------------------------------
+async def newest_chunk_rows(
+    db: AsyncSession,
+    columns: Sequence[str],
+    plant_id: Optional[str] = None,
+    limit: int = 50,
+    newer_than: Optional[datetime] = None,
+) -> List[Tuple]:
+    """
+    Newest ``limit`` chunked readings as tuples in ``columns`` order, newest first.
+
+    Windows are read newest first and decoding stops at the first window
+    boundary once ``limit`` readings are in hand. Windows ending before
+    ``newer_than`` are skipped without being read.
+    """
+    parts: List[Dict[str, np.ndarray]] = []
+    found = 0
+    window = None
+    keyset = None
+    done = False
+    while not done:
+        stmt = select(SensorChunk.plant_id, SensorChunk.start_time, SensorChunk.data)
+        if plant_id:
+            stmt = stmt.where(SensorChunk.plant_id == plant_id)
+        if newer_than is not None:
+            stmt = stmt.where(SensorChunk.end_time > newer_than)
+        if keyset is not None:
+            stmt = stmt.where(tuple_(SensorChunk.start_time, SensorChunk.plant_id) < keyset)
+        stmt = stmt.order_by(SensorChunk.start_time.desc(), SensorChunk.plant_id.desc())
+        page = (await db.execute(stmt.limit(CHUNK_PAGE))).all()
+
+        done = len(page) < CHUNK_PAGE
+        for chunk_plant, start_time, data in page:
+            if found >= limit and start_time != window:
+                done = True  # older windows only hold older readings
+                break
+            window = start_time
+            decoded = _decode(chunk_plant, data, columns)
+            parts.append(decoded)
+            found += len(decoded["id"])
+        if page:
+            keyset = tuple_(page[-1][1], page[-1][0])
+
+    arrays = _concat(parts, columns)
+    newest = np.lexsort((arrays["id"], arrays["timestamp"]))[::-1][:limit]
+    return _rows({name: values[newest] for name, values in arrays.items()}, columns)
+
+
+async def all_chunk_rows(
+    db: AsyncSession, columns: Sequence[str], plant_id: Optional[str] = None
+) -> List[Tuple]:
+    """Every chunked reading as tuples in ``columns`` order, sorted by (timestamp, id)."""
+    stmt = select(SensorChunk.plant_id, SensorChunk.data)
+    if plant_id:
+        stmt = stmt.where(SensorChunk.plant_id == plant_id)
+    stmt = stmt.order_by(SensorChunk.start_time, SensorChunk.plant_id)
+    result = await db.execute(stmt)
+    parts = [_decode(chunk_plant, data, columns) for chunk_plant, data in result.all()]
+    return _rows(sort_columns(_concat(parts, columns)), columns)
+
+
+def merge_newest(raw_rows: Sequence[Tuple], chunk_rows: Sequence[Tuple], limit: int) -> List[Tuple]:
+    """
+    Newest ``limit`` rows of both stores, newest first. Rows start with
+    (id, timestamp); a reading present in both (compacted between the two
+    queries) is returned once.
+    """
+    merged = {row[0]: row for row in chunk_rows}
+    merged.update((row[0], row) for row in raw_rows)
+    return sorted(merged.values(), key=lambda row: (row[1], row[0]), reverse=True)[:limit]
+
+
+# ------------------------------------------------------------------
+# Reading (export, sync session)
+# ------------------------------------------------------------------
+def iter_chunk_windows(
+    db,
+    columns: Sequence[str],
+    plant_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Iterator[Tuple[datetime, datetime, Dict[str, np.ndarray]]]:
+    """
+    (window start, window end, arrays) for every window with chunked readings,
+    in window order. The arrays hold the window's readings of every selected
+    plant, trimmed to [start, end) and sorted by (timestamp, id).
+    """
+    # Naive bounds are local time (settings.timezone), like uploaded readings
+    start, end = as_local(start), as_local(end)
+
+    stmt = select(
+        SensorChunk.plant_id, SensorChunk.start_time, SensorChunk.end_time, SensorChunk.data
+    )
+    if plant_id:
+        stmt = stmt.where(SensorChunk.plant_id == plant_id)
+    if start:
+        stmt = stmt.where(SensorChunk.end_time > start)
+    if end:
+        stmt = stmt.where(SensorChunk.start_time < end)
+    stmt = stmt.order_by(SensorChunk.start_time, SensorChunk.plant_id)
+    stmt = stmt.execution_options(yield_per=CHUNK_PAGE)
+
+    def window(bounds, parts):
+        arrays = sort_columns(_concat(parts, columns))
+        mask = np.ones(len(arrays["id"]), dtype=bool)
+        if start:
+            mask &= arrays["timestamp"] >= to_microseconds(start)
+        if end:
+            mask &= arrays["timestamp"] < to_microseconds(end)
+        return (*bounds, {name: values[mask] for name, values in arrays.items()})
+
+    bounds, parts = None, []
+    for chunk_plant, start_time, end_time, data in db.execute(stmt):
+        if parts and start_time != bounds[0]:
+            yield window(bounds, parts)
+            parts = []
+        bounds = (start_time, end_time)
+        parts.append(_decode(chunk_plant, data, columns))
+    if parts:
+        yield window(bounds, parts)
+
+
+# ------------------------------------------------------------------
+# Compaction
+# ------------------------------------------------------------------
+class ChunkCompactor:
+    """
+    Moves closed windows of sensor_readings into sensor_chunks.
+
+    A window is compacted once it ended ``seal_delay_s`` ago. Each step takes
+    the oldest such window that still has row-store readings, encodes one
+    chunk per plant (merged into the existing chunk when late readings
+    arrived after it was written) and deletes the rows it encoded, all in
+    one transaction, so readers never miss a reading.
+    """
+
+    def __init__(
+        self,
+        window_s: Optional[int] = None,
+        seal_delay_s: Optional[float] = None,
+        interval_s: Optional[float] = None,
+        max_windows: Optional[int] = None,
+    ):
+        self.window_s = window_s or settings.chunk_window_s
+        self.seal_delay_s = (
+            seal_delay_s if seal_delay_s is not None else settings.chunk_seal_delay_s
+        )
+        self.interval_s = interval_s or settings.chunk_compact_interval_s
+        self.max_windows = max_windows or settings.chunk_compact_max_windows
+
+        self._lock = threading.Lock()  # one compaction at a time
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Stats
+        self.runs = 0
+        self.windows = 0
+        self.readings = 0
+        self.chunks = 0
+        self.bytes_written = 0
+        self.failures = 0
+        self.last_run_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def sealed_before(self) -> datetime:
+        """Windows starting before this have all ended at least seal_delay_s ago."""
+        return window_start(get_local_time() - timedelta(seconds=self.seal_delay_s), self.window_s)
+
+    def compact_window(self, db, sealed_before: datetime) -> Optional[Dict]:
+        """Compact the oldest sealed window with row-store readings (caller commits)."""
+        oldest = db.execute(
+            select(func.min(SensorReading.timestamp)).where(SensorReading.timestamp < sealed_before)
+        ).scalar()
+        if oldest is None:
+            return None
+        start = window_start(oldest, self.window_s)
+        end = start + timedelta(seconds=self.window_s)
+
+        rows = db.execute(
+            select(SensorReading.plant_id, *(getattr(SensorReading, name) for name in COLUMNS))
+            .where(SensorReading.timestamp >= start, SensorReading.timestamp < end)
+        ).all()
+        by_plant: Dict[str, List[Tuple]] = defaultdict(list)
+        for plant_id, *reading in rows:
+            by_plant[plant_id].append(reading)
+
+        existing = {
+            chunk.plant_id: chunk
+            for chunk in db.execute(
+                select(SensorChunk).where(
+                    SensorChunk.start_time == start, SensorChunk.plant_id.in_(list(by_plant))
+                )
+            ).scalars()
+        }
+        written = 0
+        for plant_id, readings in by_plant.items():
+            columns = columns_from_rows(readings)
+            chunk = existing.get(plant_id)
+            if chunk is None:
+                chunk = SensorChunk(plant_id=plant_id, start_time=start, end_time=end)
+                db.add(chunk)
+            else:
+                # Late readings for a window that was already compacted
+                previous = decode_chunk(chunk.data)
+                merged = {name: np.concatenate([previous[name], columns[name]]) for name in COLUMNS}
+                _, unique = np.unique(merged["id"], return_index=True)
+                columns = sort_columns({name: values[unique] for name, values in merged.items()})
+            chunk.data = encode_chunk(columns)
+            chunk.readings = len(columns["id"])
+            chunk.codec = CODEC_VERSION
+            written += len(chunk.data)
+
+        ids = [row[2] for row in rows]
+        db.execute(
+            delete(SensorReading).where(SensorReading.id.in_(ids)),
+            execution_options={"synchronize_session": False},
+        )
+        return {"start": start, "readings": len(ids), "chunks": len(by_plant),
+                "bytes": written, "plants": set(by_plant)}
+
+    def run_once(self, max_windows: Optional[int] = None) -> Dict:
+        """
+        Compact up to ``max_windows`` sealed windows (default: the configured
+        batch; 0 = all of them), one transaction per window.
+        """
+        limit = self.max_windows if max_windows is None else max_windows
+        totals = {"windows": 0, "readings": 0, "chunks": 0, "bytes": 0}
+        started = time.perf_counter()
+        with self._lock:
+            sealed_before = self.sealed_before()
+            while not limit or totals["windows"] < limit:
+                with SessionLocal() as db:
+                    result = self.compact_window(db, sealed_before)
+                    if result is None:
+                        break
+                    db.commit()
+                versions.bump_many("readings", result["plants"])
+                totals["windows"] += 1
+                for key in ("readings", "chunks", "bytes"):
+                    totals[key] += result[key]
+                COMPACTED.inc(result["readings"])
+                CHUNK_BYTES.inc(result["bytes"])
+
+            self.runs += 1
+            self.windows += totals["windows"]
+            self.readings += totals["readings"]
+            self.chunks += totals["chunks"]
+            self.bytes_written += totals["bytes"]
+            self.last_run_ms = round((time.perf_counter() - started) * 1000, 1)
+        return totals
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                totals = self.run_once()
+                if totals["windows"]:
+                    print(
+                        f"🗜️ Compacted {totals['readings']} readings from {totals['windows']} "
+                        f"windows into {totals['chunks']} chunks ({totals['bytes']} bytes)"
+                    )
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e).splitlines()[0]
+                print(f"⚠️ Chunk compaction failed: {self.last_error}")
+            self._stop.wait(self.interval_s)
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def start(self):
+        if not settings.chunk_storage_enabled or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="chunk-compactor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=30)
+            self._thread = None
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": settings.chunk_storage_enabled,
+            "window_s": self.window_s,
+            "runs": self.runs,
+            "windows": self.windows,
+            "readings": self.readings,
+            "chunks": self.chunks,
+            "bytes_written": self.bytes_written,
+            "bytes_per_reading": (
+                round(self.bytes_written / self.readings, 2) if self.readings else None
+            ),
+            "failures": self.failures,
+            "last_run_ms": self.last_run_ms,
+            "last_error": self.last_error,
+        }
+
+
+# Global compactor (background job, started once the database is ready)
+chunk_compactor = ChunkCompactor()
@@ -0,0 +1,253 @@
+import asyncio
+import time
+import uuid
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set
+from app.config import settings
+from app.mqtt import mqtt_handler
+from app.services.metrics import COMMAND_ACK_SECONDS, WATERING_COMMANDS
+
+# Plants get their own metric series / latency stats only once seen over MQTT,
+# and only up to MAX_PLANT_LABELS of them; anything else is reported as "other"
+MAX_PLANT_LABELS = 256
+OTHER_PLANTS = "other"
+
+
+class WateringCommand:
+    """One watering command tracked from publish until the ESP32 reports back."""
+
+    def __init__(self, plant_id: str, status: bool, duration: int, future: asyncio.Future):
+        self.command_id = uuid.uuid4().hex[:12]
+        self.plant_id = plant_id
+        self.status = status
+        self.duration = duration
+        self.future = future
+        self.attempts = 0
+        self.published = False
+        self.first_sent_at: Optional[float] = None
+        self.outcome = "pending"  # pending → acked | timeout | failed
+        self.ack_seconds: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def summary(self) -> Dict:
+        return {
+            "command_id": self.command_id,
+            "plant_id": self.plant_id,
+            "status": self.status,
+            "duration": self.duration,
+            "published": self.published,
+            "attempts": self.attempts,
+            "outcome": self.outcome,
+            "acknowledged": self.outcome == "acked",
+            "ack_ms": round(self.ack_seconds * 1000, 1) if self.ack_seconds is not None else None,
+        }
+
+
+class CommandPipeline:
+    """
+    Publishes watering commands off the event loop and correlates acks.
+
+    Every command gets a ``command_id`` that is sent in the MQTT payload. The
+    ESP32's ``watering/status`` report acknowledges it by ``command_id``. Only
+    for plants whose firmware has never echoed an id, a report without one
+    acknowledges the oldest command for that plant published before the report
+    arrived whose on/off state matches ``is_watering``. Unacknowledged commands are
+    re-published (same id) every ``ack_timeout_s`` up to ``max_retries`` times,
+    then marked as timed out. Command→ack latency goes to the
+    ``viridion_watering_command_ack_seconds{plant_id}`` histogram.
+    """
+
+    def __init__(
+        self,
+        ack_timeout_s: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        latency_window: Optional[int] = None,
+    ):
+        self.ack_timeout_s = ack_timeout_s or settings.command_ack_timeout_s
+        self.max_retries = settings.command_max_retries if max_retries is None else max_retries
+        self.latency_window = latency_window or settings.command_latency_window
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[str, WateringCommand] = {}
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._outcomes: Dict[str, int] = {"acked": 0, "timeout": 0, "failed": 0, "unmatched_acks": 0}
+        self._echoing_plants: Set[str] = set()  # firmware echoes command_id
+        self._labels: Set[str] = set()
+        self.retries = 0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        if self._loop:
+            return
+        self._loop = loop or asyncio.get_running_loop()
+        mqtt_handler.add_watering_status_listener(self.on_status_report)
+
+    async def stop(self):
+        tasks = [c.task for c in self._pending.values() if c.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ------------------------------------------------------------------
+    # Sending
+    # ------------------------------------------------------------------
+    async def send(
+        self,
+        plant_id: str,
+        status: bool,
+        duration: int = 10,
+        wait_for_ack: bool = False,
+        ack_timeout: Optional[float] = None,
+    ) -> Dict:
+        """Publish a command and, with ``wait_for_ack``, wait for it (see wait_ack)."""
+        command = await self.publish(plant_id, status, duration)
+        if wait_for_ack:
+            return await self.wait_ack(command, ack_timeout)
+        return command.summary()
+
+    async def publish(self, plant_id: str, status: bool, duration: int = 10) -> WateringCommand:
+        """Publish a command and track it; retries and time-out run in the background."""
+        self.start()
+        command = WateringCommand(plant_id, status, duration, self._loop.create_future())
+        self._pending[command.command_id] = command
+
+        command.published = await self._publish(command)
+        if not command.published and self.max_retries == 0:
+            self._finish(command, "failed")
+        else:
+            command.task = self._loop.create_task(self._supervise(command))
+        return command
+
+    async def wait_ack(self, command: WateringCommand, ack_timeout: Optional[float] = None) -> Dict:
+        """
+        Return once the device acknowledges, the retry policy gives up, or
+        ``ack_timeout`` elapses (the command keeps being tracked after that).
+        """
+        if not command.future.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(command.future), ack_timeout)
+            except asyncio.TimeoutError:
+                pass
+        return command.summary()
+
+    async def _publish(self, command: WateringCommand) -> bool:
+        command.attempts += 1
+        if command.first_sent_at is None:
+            command.first_sent_at = time.monotonic()
+        try:
+            return await asyncio.to_thread(
+                mqtt_handler.publish_watering_command,
+                command.plant_id, command.status, command.duration, command.command_id,
+            )
+        except Exception as e:
+            print(f"❌ [{command.plant_id}] Publishing command {command.command_id} failed: {e}")
+            return False
+
+    async def _supervise(self, command: WateringCommand):
+        """Retry / time out policy for one command."""
+        while True:
+            try:
+                await asyncio.wait_for(asyncio.shield(command.future), self.ack_timeout_s)
+                return
+            except asyncio.TimeoutError:
+                pass
+            if command.attempts > self.max_retries:
+                outcome = "timeout" if command.published else "failed"
+                print(f"⏱️ [{command.plant_id}] Command {command.command_id} not acknowledged "
+                      f"after {command.attempts} attempt(s)")
+                self._finish(command, outcome)
+                return
+            self.retries += 1
+            print(f"🔁 [{command.plant_id}] Re-sending command {command.command_id} "
+                  f"(attempt {command.attempts + 1})")
+            command.published = await self._publish(command) or command.published
+
+    def _finish(self, command: WateringCommand, outcome: str):
+        self._pending.pop(command.command_id, None)
+        command.outcome = outcome
+        self._outcomes[outcome] += 1
+        WATERING_COMMANDS.labels(self._plant_label(command.plant_id), outcome).inc()
+        if not command.future.done():
+            command.future.set_result(command.summary())
+
+    # ------------------------------------------------------------------
+    # Acknowledgements (MQTT thread → event loop)
+    # ------------------------------------------------------------------
+    def on_status_report(self, plant_id: str, report: dict):
+        if self._loop:
+            self._loop.call_soon_threadsafe(
+                self._acknowledge, plant_id, report, time.monotonic()
+            )
+
+    def _match(self, plant_id: str, report: dict, received_at: float) -> Optional[WateringCommand]:
+        command_id = report.get("command_id")
+        if command_id:
+            self._echoing_plants.add(plant_id)
+            command = self._pending.get(command_id)
+            return command if command and command.plant_id == plant_id else None
+        if plant_id in self._echoing_plants:
+            return None  # a periodic / stale report, not an ack
+        is_watering = bool(report.get("is_watering", False))
+        return next(
+            (
+                c for c in self._pending.values()
+                if c.plant_id == plant_id and c.status == is_watering
+                and c.first_sent_at is not None and c.first_sent_at < received_at
+            ),
+            None,
+        )
+
+    def _acknowledge(self, plant_id: str, report: dict, received_at: float):
+        command = self._match(plant_id, report, received_at)
+        if command is None:
+            self._outcomes["unmatched_acks"] += 1
+            return
+
+        command.ack_seconds = received_at - command.first_sent_at
+        label = self._plant_label(plant_id)
+        COMMAND_ACK_SECONDS.labels(label).observe(command.ack_seconds)
+        self._latencies.setdefault(label, deque(maxlen=self.latency_window)).append(
+            command.ack_seconds
+        )
+        print(f"✅ [{plant_id}] Command {command.command_id} acknowledged "
+              f"in {command.ack_seconds * 1000:.0f} ms")
+        self._finish(command, "acked")
+
+    # ------------------------------------------------------------------
+    # Stats
+    # ------------------------------------------------------------------
+    def _plant_label(self, plant_id: str) -> str:
+        """Bounded metric label: plant ids come from API requests, not just devices."""
+        if plant_id in self._labels:
+            return plant_id
+        seen = plant_id in mqtt_handler.watering_states or plant_id in mqtt_handler.sensor_buffers
+        if seen and len(self._labels) < MAX_PLANT_LABELS:
+            self._labels.add(plant_id)
+            return plant_id
+        return OTHER_PLANTS
+
+    @staticmethod
+    def _latency_summary(samples: List[float]) -> Dict:
+        ordered = sorted(samples)
+
+        def pick(pct: float) -> float:
+            return round(ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))] * 1000, 1)
+
+        return {"count": len(ordered), "p50_ms": pick(50), "p95_ms": pick(95), "max_ms": pick(100)}
+
+    def stats(self) -> Dict:
+        return {
+            "pending": [c.summary() for c in self._pending.values()],
+            "retries": self.retries,
+            **self._outcomes,
+            "ack_latency": {
+                plant_id: self._latency_summary(list(samples))
+                for plant_id, samples in self._latencies.items()
+                if samples
+            },
+        }
+
+
+# Global pipeline instance
+command_pipeline = CommandPipeline()
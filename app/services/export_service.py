@@ -0,0 +1,291 @@
+import io
+from datetime import datetime
+from typing import Iterator, Optional
+from sqlalchemy import select
+from app.config import settings
+from app.database.database import SessionLocal, SensorReading, Prediction, as_local
+
+# --------------------------------------------
+# 📤 Columnar export (Parquet / Arrow IPC)
+# --------------------------------------------
+# pyarrow is an optional dependency: pip install -e ".[export]"
+
+EXPORT_FORMATS = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+# dataset -> (ORM model, [(column, arrow type name)])
+EXPORT_DATASETS = {
+    "sensor_readings": (
+        SensorReading,
+        [
+            ("id", "int64"),
+            ("plant_id", "string"),
+            ("timestamp", "timestamp"),
+            ("temperature", "float64"),
+            ("humidity", "float64"),
+            ("soil_moisture", "float64"),
+            ("light_level", "float64"),
+            ("pressure", "float64"),
+        ],
+    ),
+    "predictions": (
+        Prediction,
+        [
+            ("id", "int64"),
+            ("plant_id", "string"),
+            ("timestamp", "timestamp"),
+            ("should_water", "bool"),
+            ("confidence", "float64"),
+            ("temperature", "float64"),
+            ("humidity", "float64"),
+            ("soil_moisture", "float64"),
+        ],
+    ),
+}
+
+
+class ExportUnavailable(RuntimeError):
+    """Raised when pyarrow is not installed."""
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ExportUnavailable(
+            "Columnar export needs pyarrow — install with: pip install -e \".[export]\""
+        ) from e
+    return pa
+
+
+def arrow_schema(dataset: str):
+    pa = _require_pyarrow()
+    types = {
+        "int64": pa.int64(),
+        "string": pa.string(),
+        "float64": pa.float64(),
+        "bool": pa.bool_(),
+        "timestamp": pa.timestamp("us", tz="UTC"),
+    }
+    _, columns = EXPORT_DATASETS[dataset]
+    return pa.schema([(name, types[kind]) for name, kind in columns])
+
+
+def iter_record_batches(
+    dataset: str,
+    plant_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    chunk_size: Optional[int] = None,
+) -> Iterator:
+    """
+    Stream a plant/time-range slice as Arrow record batches.
+
+    Uses a server-side cursor (``yield_per``) so only one chunk of rows is
+    held in memory at a time. Rows come out in (timestamp, id) order. Naive
+    ``start`` / ``end`` are local time (settings.timezone).
+    """
+    pa = _require_pyarrow()
+    model, columns = EXPORT_DATASETS[dataset]
+    schema = arrow_schema(dataset)
+    chunk_size = chunk_size or settings.export_chunk_size
+    # Same cutoffs for the row store and the chunks (a naive value would be read
+    # in the DB session time zone by Postgres, but as local time by the chunks)
+    start, end = as_local(start), as_local(end)
+
+    stmt = select(*[getattr(model, name) for name, _ in columns])
+    if plant_id:
+        stmt = stmt.where(model.plant_id == plant_id)
+    if start:
+        stmt = stmt.where(model.timestamp >= start)
+    if end:
+        stmt = stmt.where(model.timestamp < end)
+    stmt = stmt.order_by(model.timestamp, model.id).execution_options(yield_per=chunk_size)
+
+    db = SessionLocal()
+    try:
+        if dataset == "sensor_readings" and settings.chunk_storage_enabled:
+            # Both scans must see one snapshot: compaction moves rows into a chunk
+            # in a single transaction, so a reading compacted between the chunk
+            # scan and the row-store scan would otherwise be missing from both.
+            db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+            yield from _merged_record_batches(db, stmt, schema, plant_id, start, end, chunk_size)
+            return
+        result = db.execute(stmt)
+        for rows in result.partitions():
+            # Transpose row tuples into typed columns
+            arrays = [
+                pa.array(list(values), type=field.type)
+                for values, field in zip(zip(*rows), schema)
+            ]
+            yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+    finally:
+        db.close()
+
+
+def _merged_record_batches(db, stmt, schema, plant_id, start, end, chunk_size: int) -> Iterator:
+    """
+    Record batches of chunked and row-store readings in (timestamp, id) order.
+
+    Chunks are decoded window by window (no per-row Python objects). Row-store
+    readings before a window are emitted ahead of it, and late readings inside
+    a window (not compacted yet) are sorted into it.
+    """
+    import numpy as np
+    from app.services import chunk_store
+    from app.services.chunk_codec import FIELDS, sort_columns, to_microseconds
+
+    pa = _require_pyarrow()
+    names = schema.names
+
+    def row_arrays():
+        # Row-store partitions (already in timestamp order) → codec-style arrays
+        for rows in db.execute(stmt).partitions():
+            arrays = {}
+            for name, values in zip(names, zip(*rows)):
+                if name == "timestamp":
+                    arrays[name] = np.fromiter(map(to_microseconds, values), np.int64, len(rows))
+                elif name in FIELDS:
+                    arrays[name] = np.array(values, dtype=np.float64)  # None → NaN
+                else:
+                    arrays[name] = np.array(values, dtype=np.int64 if name == "id" else object)
+            yield arrays
+
+    raw = row_arrays()
+    pending = None  # row-store readings fetched but not emitted yet
+
+    def raw_before(limit):
+        """Row-store arrays with timestamps before ``limit`` (µs; None = all)."""
+        nonlocal pending
+        while True:
+            if pending is None:
+                pending = next(raw, None)
+                if pending is None:
+                    return
+            timestamps = pending["timestamp"]
+            cut = len(timestamps) if limit is None else np.searchsorted(timestamps, limit)
+            if cut:
+                yield {name: values[:cut] for name, values in pending.items()}
+            if cut < len(timestamps):
+                pending = {name: values[cut:] for name, values in pending.items()}
+                return
+            pending = None
+
+    def to_batch(parts):
+        arrays = []
+        for field in schema:
+            values = np.concatenate([part[field.name] for part in parts])
+            if pa.types.is_timestamp(field.type):
+                values = values.astype("datetime64[us]")  # µs since epoch, UTC
+            arrays.append(pa.array(values, type=field.type, from_pandas=True))  # NaN → null
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    def ordered():
+        windows = chunk_store.iter_chunk_windows(db, names, plant_id, start, end)
+        for window_start, window_end, arrays in windows:
+            yield from raw_before(to_microseconds(window_start))
+            late = list(raw_before(to_microseconds(window_end)))
+            if late:
+                parts = [arrays, *late]
+                arrays = sort_columns(
+                    {name: np.concatenate([part[name] for part in parts]) for name in names}
+                )
+            yield arrays
+        yield from raw_before(None)
+
+    parts, rows = [], 0
+    for arrays in ordered():
+        if not len(arrays["id"]):
+            continue
+        parts.append(arrays)
+        rows += len(arrays["id"])
+        if rows >= chunk_size:
+            yield to_batch(parts)
+            parts, rows = [], 0
+    if parts:
+        yield to_batch(parts)
+
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only file object whose buffered bytes can be drained between batches."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _open_writer(sink, dataset: str, fmt: str):
+    _require_pyarrow()
+    schema = arrow_schema(dataset)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(sink, schema, compression="zstd")
+    if fmt == "arrow":
+        import pyarrow as pa
+        return pa.ipc.new_stream(sink, schema)
+    raise ValueError(f"Unknown export format: {fmt}")
+
+
+def stream_export(
+    dataset: str,
+    fmt: str = "parquet",
+    plant_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    chunk_size: Optional[int] = None,
+) -> Iterator[bytes]:
+    """Yield the encoded file piece by piece (for HTTP streaming responses)."""
+    sink = _DrainableSink()
+    writer = _open_writer(sink, dataset, fmt)
+    try:
+        for batch in iter_record_batches(dataset, plant_id, start, end, chunk_size):
+            writer.write_batch(batch)
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    data = sink.drain()
+    if data:
+        yield data
+
+
+def write_export(
+    path: str,
+    dataset: str,
+    fmt: str = "parquet",
+    plant_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    chunk_size: Optional[int] = None,
+) -> int:
+    """Write an export file to ``path``. Returns the number of rows written."""
+    rows = 0
+    with open(path, "wb") as f:
+        writer = _open_writer(f, dataset, fmt)
+        try:
+            for batch in iter_record_batches(dataset, plant_id, start, end, chunk_size):
+                writer.write_batch(batch)
+                rows += batch.num_rows
+        finally:
+            writer.close()
+    return rows
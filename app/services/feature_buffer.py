@@ -0,0 +1,211 @@
+import math
+import threading
+import time
+from array import array
+from collections import deque
+from typing import Dict, List, Optional
+from app.config import settings
+
+
+class RollingWindow:
+    """
+    Fixed-capacity ring buffer of (t, value) samples with O(1) aggregates.
+
+    Samples older than ``window_s`` (or beyond ``capacity``) are evicted on
+    append. Mean and least-squares slope come from running sums; min/max
+    from monotonic deques (amortized O(1)). Running sums are rebuilt from
+    the buffer once per ``capacity`` evictions to bound float drift.
+    """
+
+    def __init__(self, capacity: int, window_s: float):
+        self.capacity = capacity
+        self.window_s = window_s
+        self._t = array("d", bytes(8 * capacity))
+        self._v = array("d", bytes(8 * capacity))
+        self._head = 0   # index of the oldest sample
+        self._size = 0
+        self._seq = 0    # sequence number of the next sample
+        self._anchor = 0.0
+        self._evictions = 0
+        self._sum_t = self._sum_v = self._sum_tt = self._sum_tv = 0.0
+        self._min: deque = deque()  # (seq, value), values increasing
+        self._max: deque = deque()  # (seq, value), values decreasing
+
+    def __len__(self):
+        return self._size
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+    def append(self, t: float, value: float):
+        while self._size and t - self._t[self._head] > self.window_s:
+            self._pop_oldest()
+        if self._size == self.capacity:
+            self._pop_oldest()
+        if self._size == 0:
+            self._anchor = t
+
+        idx = (self._head + self._size) % self.capacity
+        self._t[idx] = t
+        self._v[idx] = value
+        self._size += 1
+
+        x = t - self._anchor
+        self._sum_t += x
+        self._sum_v += value
+        self._sum_tt += x * x
+        self._sum_tv += x * value
+
+        seq = self._seq
+        self._seq += 1
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((seq, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((seq, value))
+
+    def _pop_oldest(self):
+        oldest_seq = self._seq - self._size
+        x = self._t[self._head] - self._anchor
+        value = self._v[self._head]
+        self._sum_t -= x
+        self._sum_v -= value
+        self._sum_tt -= x * x
+        self._sum_tv -= x * value
+        self._head = (self._head + 1) % self.capacity
+        self._size -= 1
+
+        if self._min and self._min[0][0] == oldest_seq:
+            self._min.popleft()
+        if self._max and self._max[0][0] == oldest_seq:
+            self._max.popleft()
+
+        self._evictions += 1
+        if self._evictions >= self.capacity:
+            self._rebuild_sums()
+
+    def _rebuild_sums(self):
+        self._evictions = 0
+        self._sum_t = self._sum_v = self._sum_tt = self._sum_tv = 0.0
+        if not self._size:
+            return
+        self._anchor = self._t[self._head]
+        for i in range(self._size):
+            idx = (self._head + i) % self.capacity
+            x = self._t[idx] - self._anchor
+            value = self._v[idx]
+            self._sum_t += x
+            self._sum_v += value
+            self._sum_tt += x * x
+            self._sum_tv += x * value
+
+    # ------------------------------------------------------------------
+    # Aggregates (NaN when undefined)
+    # ------------------------------------------------------------------
+    def mean(self) -> float:
+        return self._sum_v / self._size if self._size else math.nan
+
+    def min(self) -> float:
+        return self._min[0][1] if self._min else math.nan
+
+    def max(self) -> float:
+        return self._max[0][1] if self._max else math.nan
+
+    def slope(self) -> float:
+        """Least-squares slope in value units per second."""
+        n = self._size
+        if n < 2:
+            return math.nan
+        denom = n * self._sum_tt - self._sum_t * self._sum_t
+        if denom <= 0:
+            return math.nan
+        return (n * self._sum_tv - self._sum_t * self._sum_v) / denom
+
+
+class PlantFeatures:
+    """Rolling windows for one plant plus the time of its last watering."""
+
+    TRACKED = ("soil_moisture", "humidity", "temperature")
+
+    def __init__(self, capacity: int, window_s: float):
+        self.windows = {name: RollingWindow(capacity, window_s) for name in self.TRACKED}
+        self.last_watering: Optional[float] = None
+
+    def vector(self, now: float) -> List[float]:
+        moisture = self.windows["soil_moisture"]
+        return [
+            moisture.mean(),
+            moisture.min(),
+            moisture.max(),
+            moisture.slope() * 3600,
+            self.windows["humidity"].mean(),
+            self.windows["temperature"].mean(),
+            (now - self.last_watering) / 60 if self.last_watering else math.nan,
+        ]
+
+
+class FeatureStore:
+    """Per-plant rolling features, written by ingest and read by the predictor."""
+
+    # Order of the values returned by vector(); appended after the 3 base features
+    FEATURES = [
+        "Soil Moisture Mean",
+        "Soil Moisture Min",
+        "Soil Moisture Max",
+        "Soil Moisture Slope (per h)",
+        "Humidity Mean",
+        "Temperature Mean",
+        "Minutes Since Watering",
+    ]
+
+    def __init__(self, capacity: Optional[int] = None, window_s: Optional[float] = None):
+        self.capacity = capacity or settings.feature_window_capacity
+        self.window_s = window_s or settings.feature_window_s
+        self._plants: Dict[str, PlantFeatures] = {}
+        self._lock = threading.Lock()
+
+    def _plant(self, plant_id: str) -> PlantFeatures:
+        plant = self._plants.get(plant_id)
+        if plant is None:
+            plant = self._plants[plant_id] = PlantFeatures(self.capacity, self.window_s)
+        return plant
+
+    def update(self, plant_id: str, values: Dict[str, float], t: Optional[float] = None):
+        t = time.time() if t is None else t
+        with self._lock:
+            plant = self._plant(plant_id)
+            for name, window in plant.windows.items():
+                value = values.get(name)
+                if value is not None:
+                    window.append(t, float(value))
+
+    def record_watering(self, plant_id: str, t: Optional[float] = None):
+        with self._lock:
+            self._plant(plant_id).last_watering = time.time() if t is None else t
+
+    def vector(
+        self, plant_id: str, now: Optional[float] = None, limit: Optional[int] = None
+    ) -> List[float]:
+        """
+        Extra feature values for ``plant_id`` (NaN where undefined). ``limit``
+        keeps only the first N — pass the number of extra columns the model uses.
+        """
+        if limit is not None and limit <= 0:
+            return []
+        now = time.time() if now is None else now
+        with self._lock:
+            plant = self._plants.get(plant_id)
+            values = plant.vector(now) if plant else [math.nan] * len(self.FEATURES)
+        return values[:limit]
+
+    def features(self, plant_id: str) -> Dict[str, Optional[float]]:
+        """Named, JSON-safe view of vector()."""
+        return {
+            name: None if math.isnan(value) else round(value, 4)
+            for name, value in zip(self.FEATURES, self.vector(plant_id))
+        }
+
+
+# Global store (fed by MQTT ingest)
+feature_store = FeatureStore()
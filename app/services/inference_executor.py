@@ -0,0 +1,200 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+from app.config import settings
+from app.models.registry import model_registry
+
+
+def _fail(batch: List[Tuple[tuple, asyncio.Future]], error: Exception):
+    for _, fut in batch:
+        if not fut.done():
+            fut.set_exception(error)
+
+
+class InferenceBatcher:
+    """
+    Runs model inference off the event loop with micro-batching.
+
+    Concurrent predict() calls that arrive within ``max_wait_ms`` of each
+    other (up to ``max_batch_size``) are combined into one predict_batch()
+    call on a worker thread; each caller gets its own row of the result.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        workers: Optional[int] = None,
+    ):
+        self.max_batch_size = max_batch_size or settings.inference_max_batch_size
+        self.max_wait = (
+            max_wait_ms if max_wait_ms is not None else settings.inference_max_wait_ms
+        ) / 1000
+        self.workers = workers or settings.inference_workers
+
+        self._pool: Optional[ThreadPoolExecutor] = None
+        # Candidate (shadow) scoring gets its own thread so it never takes a live worker
+        self._shadow_pool: Optional[ThreadPoolExecutor] = None
+        self._shadow_busy = threading.Lock()
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Stats
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self.shadow_skipped = 0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def start(self):
+        loop = asyncio.get_running_loop()
+        if self._collector and not self._collector.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._pool = self._pool or ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="inference"
+        )
+        self._shadow_pool = self._shadow_pool or ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="shadow"
+        )
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.workers)
+        self._collector = loop.create_task(self._collect())
+
+    async def stop(self):
+        if self._collector:
+            self._collector.cancel()
+            try:
+                await self._collector
+            except asyncio.CancelledError:
+                pass
+            self._collector = None
+
+        # Fail anything still queued so callers do not hang
+        while self._queue and not self._queue.empty():
+            _fail([self._queue.get_nowait()], RuntimeError("Inference executor stopped"))
+
+        if self._pool:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+        if self._shadow_pool:
+            self._shadow_pool.shutdown(wait=False)
+            self._shadow_pool = None
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    async def predict(
+        self,
+        soil_moisture: float,
+        soil_humidity: float,
+        temperature: float,
+        extra: Sequence[float] = (),
+    ) -> Dict:
+        """Queue one prediction and wait for the batch it lands in."""
+        self.start()
+        fut = self._loop.create_future()
+        self._queue.put_nowait(((soil_moisture, soil_humidity, temperature, *extra), fut))
+        return await fut
+
+    async def predict_many(self, features: Sequence[Sequence[float]]) -> List[Dict]:
+        """Run an already-batched feature matrix on the worker pool."""
+        self.start()
+        async with self._slots:
+            return await self._loop.run_in_executor(self._pool, self._run_model, features)
+
+    def stats(self) -> Dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "batches": self.batches,
+            "predictions": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0,
+            "largest_batch": self.largest_batch,
+            "shadow_skipped": self.shadow_skipped,
+        }
+
+    def _run_model(self, features: Sequence[Sequence[float]]) -> List[Dict]:
+        """Worker-thread body: score with the active model, then queue shadow scoring."""
+        started = time.perf_counter()
+        results = model_registry.predict_batch(features)
+        if model_registry.candidate is not None:
+            active_ms = (time.perf_counter() - started) * 1000
+            self._submit_shadow(features, results, active_ms)
+        return results
+
+    def _submit_shadow(self, features, results: List[Dict], active_ms: float):
+        """
+        Not awaited: the candidate never delays the caller. Batches arriving
+        while the shadow thread is still busy (or after stop()) are skipped.
+        """
+        pool = self._shadow_pool
+        if pool is None or not self._shadow_busy.acquire(blocking=False):
+            self.shadow_skipped += 1
+            return
+        try:
+            future = pool.submit(model_registry.shadow_score, features, results, active_ms)
+        except RuntimeError:  # pool shut down by stop()
+            self._shadow_busy.release()
+            self.shadow_skipped += 1
+            return
+        future.add_done_callback(lambda _: self._shadow_busy.release())
+
+    # ------------------------------------------------------------------
+    # Batching loop
+    # ------------------------------------------------------------------
+    async def _collect(self):
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                deadline = self._loop.time() + self.max_wait
+
+                while len(batch) < self.max_batch_size:
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    timeout = deadline - self._loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                # Wait for a free worker; requests keep queueing meanwhile and
+                # form the next (larger) batch
+                await self._slots.acquire()
+            except asyncio.CancelledError:
+                # stop(): this batch already left the queue, so fail it here
+                _fail(batch, RuntimeError("Inference executor stopped"))
+                raise
+            self._loop.create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch: List[Tuple[tuple, asyncio.Future]]):
+        try:
+            features = [features for features, _ in batch]
+            results = await self._loop.run_in_executor(self._pool, self._run_model, features)
+        except Exception as e:
+            _fail(batch, e)
+            return
+        finally:
+            self._slots.release()
+
+        self.batches += 1
+        self.items += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        for (_, fut), result in zip(batch, results):
+            if not fut.done():
+                fut.set_result(result)
+
+
+# Global executor instance
+inference_batcher = InferenceBatcher()
@@ -0,0 +1,340 @@
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import insert
+from app.config import settings
+from app.database.database import SensorReading, SessionLocal
+from app.services.metrics import Counter, Gauge
+from app.services.versioning import versions
+
+# Record framing: payload length + CRC32, then the JSON payload
+HEADER = struct.Struct("<II")
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".log"
+OFFSET_FILE = "offset.json"
+
+SPOOLED = Counter("viridion_ingest_spooled_total", "Readings written to the ingest spool")
+REPLAYED = Counter("viridion_ingest_replayed_total", "Spooled readings replayed into the database")
+SPOOL_DROPPED = Counter(
+    "viridion_ingest_spool_dropped_bytes_total", "Unreplayed spool bytes dropped (disk limit / corruption)"
+)
+SPOOL_BACKLOG = Gauge("viridion_ingest_spool_backlog_bytes", "Spooled bytes waiting for replay")
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class IngestSpool:
+    """
+    Append-only, segmented on-disk spool for sensor readings.
+
+    save_combined_reading() appends here instead of dropping a reading when
+    the insert fails or is too slow (which opens a circuit breaker), and for
+    as long as older readings are still waiting, so replay stays in order.
+    A replay thread inserts the backlog in large batches once the breaker
+    cooldown has passed, then atomically advances ``offset.json`` and
+    deletes fully replayed segments. Delivery is at-least-once: a crash
+    between the commit and the offset write replays that batch again.
+
+    Disk usage is capped at ``max_bytes`` by dropping the oldest segment.
+    A new segment is started on every open, so a record torn by a crash is
+    only ever at the end of a sealed segment, where replay skips it.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        segment_bytes: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ):
+        self.directory = Path(directory or settings.ingest_spool_dir)
+        self.segment_bytes = segment_bytes or settings.ingest_spool_segment_bytes
+        self.max_bytes = max_bytes or settings.ingest_spool_max_bytes
+        self.batch_size = batch_size or settings.ingest_spool_replay_batch
+
+        self._lock = threading.RLock()
+        self._opened = False
+        self._segments: Dict[int, int] = {}  # seq -> bytes on disk (ordered by seq)
+        self._active: Optional[int] = None
+        self._writer = None
+        self._offset: Tuple[int, int] = (0, 0)  # (segment seq, byte position)
+
+        # Circuit breaker
+        self._open_until = 0.0
+        self._failures = 0
+
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Stats
+        self.spooled = 0
+        self.replayed = 0
+        self.dropped_bytes = 0
+        self.replay_failures = 0
+        self.last_error: Optional[str] = None
+
+    # ------------------------------------------------------------------
+    # Files
+    # ------------------------------------------------------------------
+    def _segment_path(self, seq: int) -> Path:
+        return self.directory / f"{SEGMENT_PREFIX}{seq:012d}{SEGMENT_SUFFIX}"
+
+    def _open(self):
+        if self._opened:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for path in sorted(self.directory.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}")):
+            seq = int(path.name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+            self._segments[seq] = path.stat().st_size
+
+        offset_path = self.directory / OFFSET_FILE
+        if offset_path.exists():
+            saved = json.loads(offset_path.read_text())
+            self._offset = (saved["segment"], saved["position"])
+
+        # Never append after a possibly torn tail: always write to a new segment
+        self._start_segment(max(self._segments, default=self._offset[0] - 1) + 1)
+        self._clamp_offset()
+        if self._offset[0] == self._active:
+            self._offset = (self._active, 0)
+        for seq in [s for s in self._segments if s < self._offset[0]]:
+            self._delete_segment(seq)
+        self._opened = True
+        backlog = self._backlog_bytes()
+        if backlog:
+            print(f"📼 Ingest spool has {backlog} bytes to replay ({self.directory})")
+
+    def _start_segment(self, seq: int):
+        if self._writer:
+            self._writer.close()
+        self._active = seq
+        self._segments[seq] = 0
+        self._writer = open(self._segment_path(seq), "ab")
+
+    def _delete_segment(self, seq: int):
+        self._segments.pop(seq, None)
+        try:
+            self._segment_path(seq).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _clamp_offset(self):
+        """Point the offset at an existing segment (the next one if it was dropped)."""
+        seq = self._offset[0]
+        if self._segments and seq not in self._segments:
+            later = [s for s in self._segments if s > seq]
+            self._offset = (min(later) if later else max(self._segments), 0)
+
+    def _backlog_bytes(self) -> int:
+        seq, position = self._offset
+        return sum(size for s, size in self._segments.items() if s >= seq) - position
+
+    # ------------------------------------------------------------------
+    # Circuit breaker (MQTT thread)
+    # ------------------------------------------------------------------
+    def should_spool(self) -> bool:
+        """True while the breaker is open or older readings are still spooled."""
+        if not settings.ingest_spool_enabled:
+            return False
+        if time.monotonic() < self._open_until:
+            return True
+        with self._lock:
+            self._open()
+            return self._backlog_bytes() > 0
+
+    def record_insert(self, elapsed_s: float):
+        """Report a successful live insert; a slow one trips the breaker."""
+        if elapsed_s * 1000 > settings.ingest_slow_insert_ms:
+            self.trip(f"slow insert ({elapsed_s * 1000:.0f} ms)")
+        else:
+            self._failures = 0
+
+    def trip(self, reason: str):
+        self._failures += 1
+        cooldown = min(
+            settings.ingest_breaker_base_s * 2 ** (self._failures - 1), settings.ingest_breaker_max_s
+        )
+        self._open_until = time.monotonic() + cooldown
+        self.last_error = reason
+        print(f"🔌 Ingest breaker open for {cooldown:.1f}s ({reason}) — spooling readings to disk")
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+    def append(self, row: Dict):
+        payload = json.dumps(row, default=_encode, separators=(",", ":")).encode()
+        record = HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        with self._lock:
+            self._open()
+            size = self._segments[self._active]
+            if size and size + len(record) > self.segment_bytes:
+                self._start_segment(self._active + 1)
+            self._writer.write(record)
+            self._writer.flush()
+            if settings.ingest_spool_fsync:
+                os.fsync(self._writer.fileno())
+            self._segments[self._active] += len(record)
+            self.spooled += 1
+            self._enforce_limit()
+            SPOOL_BACKLOG.set(self._backlog_bytes())
+        SPOOLED.inc()
+        self._wakeup.set()
+
+    def _enforce_limit(self):
+        while sum(self._segments.values()) > self.max_bytes and len(self._segments) > 1:
+            oldest = min(self._segments)
+            lost = self._segments[oldest] - (self._offset[1] if self._offset[0] == oldest else 0)
+            self._delete_segment(oldest)
+            self._clamp_offset()
+            if lost > 0:
+                self.dropped_bytes += lost
+                SPOOL_DROPPED.inc(lost)
+                print(f"⚠️ Ingest spool over {self.max_bytes} bytes: dropped {lost} unreplayed bytes")
+
+    # ------------------------------------------------------------------
+    # Replay (replay thread)
+    # ------------------------------------------------------------------
+    def _read_batch(self) -> Tuple[List[Dict], Tuple[int, int]]:
+        with self._lock:
+            self._open()
+            seq, position = self._offset
+            segments = {s: size for s, size in self._segments.items() if s >= seq}
+
+        rows: List[Dict] = []
+        for current in sorted(segments):
+            size = segments[current]
+            sealed = current != self._active
+            corrupt = False
+            with open(self._segment_path(current), "rb") as f:
+                f.seek(position)
+                while len(rows) < self.batch_size and position < size:
+                    header = f.read(HEADER.size)
+                    if len(header) < HEADER.size:
+                        corrupt = True
+                        break
+                    length, crc = HEADER.unpack(header)
+                    payload = f.read(length)
+                    end = position + HEADER.size + length
+                    if len(payload) < length or end > size or zlib.crc32(payload) != crc:
+                        corrupt = True
+                        break
+                    rows.append(json.loads(payload))
+                    position = end
+
+            if corrupt and sealed:
+                # Torn tail from a crash (or damage): skip the rest of the segment
+                lost = size - position
+                self.dropped_bytes += lost
+                SPOOL_DROPPED.inc(lost)
+                print(f"⚠️ Ingest spool: skipping {lost} unreadable bytes in segment {current}")
+                position = size
+            if len(rows) >= self.batch_size or position < size or not sealed:
+                return rows, (current, position)
+            seq, position = current + 1, 0  # segment consumed, continue with the next one
+        return rows, (seq, position)
+
+    def _commit_offset(self, offset: Tuple[int, int]):
+        with self._lock:
+            self._offset = offset
+            self._clamp_offset()
+            for seq in [s for s in self._segments if s < self._offset[0] and s != self._active]:
+                self._delete_segment(seq)
+            tmp = self.directory / f"{OFFSET_FILE}.tmp"
+            with open(tmp, "w") as f:
+                json.dump({"segment": self._offset[0], "position": self._offset[1]}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.directory / OFFSET_FILE)
+            SPOOL_BACKLOG.set(self._backlog_bytes())
+
+    def replay_once(self) -> int:
+        """Insert one batch of spooled readings; returns how many were replayed."""
+        rows, offset = self._read_batch()
+        if rows:
+            for row in rows:
+                row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+            with SessionLocal() as db:
+                db.execute(insert(SensorReading), rows)
+                db.commit()
+            self.replayed += len(rows)
+            REPLAYED.inc(len(rows))
+            versions.bump_many("readings", (row["plant_id"] for row in rows))
+        if offset != self._offset:
+            self._commit_offset(offset)
+        return len(rows)
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                self._open()
+                backlog = self._backlog_bytes()
+            if not backlog:
+                self._wakeup.wait(1.0)
+                self._wakeup.clear()
+                continue
+            remaining = self._open_until - time.monotonic()
+            if remaining > 0:
+                self._stop.wait(min(remaining, 1.0))
+                continue
+            try:
+                replayed = self.replay_once()
+                self._failures = 0
+                if replayed:
+                    print(f"📼 Replayed {replayed} spooled readings ({self._backlog_bytes()} bytes left)")
+            except Exception as e:
+                self.replay_failures += 1
+                self.trip(f"replay failed: {str(e).splitlines()[0]}")
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def start(self):
+        if not settings.ingest_spool_enabled or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ingest-spool-replay", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+            self._thread = None
+        with self._lock:
+            if self._writer:
+                self._writer.close()
+                self._writer = None
+            self._opened = False
+            self._segments.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            backlog = self._backlog_bytes() if self._opened else 0
+            segments = len(self._segments)
+        return {
+            "enabled": settings.ingest_spool_enabled,
+            "breaker_open": time.monotonic() < self._open_until,
+            "backlog_bytes": backlog,
+            "segments": segments,
+            "spooled": self.spooled,
+            "replayed": self.replayed,
+            "dropped_bytes": self.dropped_bytes,
+            "replay_failures": self.replay_failures,
+            "last_error": self.last_error,
+        }
+
+
+# Global spool (written by MQTT ingest)
+ingest_spool = IngestSpool()
@@ -0,0 +1,69 @@
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Sequence, Tuple
+from app.config import settings
+
+
+class PredictionCache:
+    """Bounded LRU cache with hit/miss counters (thread-safe)."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def quantize_features(
+    values: Sequence[float], resolution: Optional[float] = None
+) -> Optional[Tuple[Optional[int], ...]]:
+    """Snap features to the sensor resolution so sub-resolution noise maps to one key."""
+    resolution = settings.prediction_cache_resolution if resolution is None else resolution
+    if resolution <= 0:
+        return None
+    return tuple(None if math.isnan(v) else round(v / resolution) for v in values)
+
+
+# Latest-reading id → (Prediction row, result): repeat polls skip model AND insert
+reading_cache = PredictionCache(settings.prediction_cache_size)
+# Quantized features → result: new readings with known features skip the model
+feature_cache = PredictionCache(settings.prediction_cache_size)
@@ -0,0 +1,154 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+from sqlalchemy import insert
+from app.config import settings
+from app.database.database import Prediction, async_session
+
+
+class PredictionRecorder:
+    """
+    Write-behind persistence for Prediction rows.
+
+    record() only appends to an in-memory buffer; a background task inserts
+    the buffer with one multi-row INSERT every ``flush_interval_s`` or as soon
+    as ``batch_size`` rows are waiting. The buffer is flushed on shutdown.
+    If the database is down, rows are kept (up to ``max_pending``, oldest
+    dropped first) and retried on the next flush.
+    """
+
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        flush_interval_s: Optional[float] = None,
+        max_pending: Optional[int] = None,
+    ):
+        self.batch_size = batch_size or settings.prediction_flush_batch_size
+        self.flush_interval_s = flush_interval_s or settings.prediction_flush_interval_s
+        self.max_pending = max_pending or settings.prediction_max_pending
+
+        self._pending: List[Dict] = []
+        self._oldest_at: Optional[float] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._stopping = False
+
+        # Stats
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+        self.flushes = 0
+        self.last_flush_at: Optional[float] = None
+        self.last_flush_ms: Optional[float] = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def start(self):
+        if self._task and not self._task.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._stopping = False
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            # Not cancelled: a flush in progress has taken the rows out of
+            # _pending and must finish (or put them back) before we return
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        if self._pending:
+            await self.flush()
+            if self._pending:
+                print(f"⚠️ {len(self._pending)} predictions could not be saved on shutdown")
+
+    # ------------------------------------------------------------------
+    # Recording (event loop thread)
+    # ------------------------------------------------------------------
+    def record(self, row: Dict):
+        self.record_many([row])
+
+    def record_many(self, rows: List[Dict]):
+        self.start()
+        if not rows:
+            return
+        if not self._pending:
+            self._oldest_at = time.monotonic()
+        self._pending.extend(rows)
+        self.recorded += len(rows)
+
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            del self._pending[:overflow]
+            self.dropped += overflow
+
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    # ------------------------------------------------------------------
+    # Flushing
+    # ------------------------------------------------------------------
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._pending:
+                await self.flush()
+
+    async def flush(self):
+        async with self._flush_lock:
+            rows, self._pending = self._pending, []
+            oldest_at, self._oldest_at = self._oldest_at, None
+            if not rows:
+                return
+
+            started = time.perf_counter()
+            try:
+                async with async_session() as db:
+                    for i in range(0, len(rows), self.batch_size):
+                        await db.execute(insert(Prediction), rows[i:i + self.batch_size])
+                    await db.commit()
+            except Exception as e:
+                # Put the rows back in front of anything recorded meanwhile
+                combined = rows + self._pending
+                overflow = max(0, len(combined) - self.max_pending)
+                self._pending = combined[overflow:]
+                self.dropped += overflow
+                self._oldest_at = oldest_at
+                self.failed_flushes += 1
+                print(f"🚨 Prediction flush failed ({len(rows)} rows kept for retry): {e}")
+                return
+
+            self.written += len(rows)
+            self.flushes += 1
+            self.last_flush_at = time.monotonic()
+            self.last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    # ------------------------------------------------------------------
+    # Stats
+    # ------------------------------------------------------------------
+    def stats(self) -> Dict:
+        now = time.monotonic()
+        return {
+            "pending": len(self._pending),
+            "lag_seconds": round(now - self._oldest_at, 3) if self._pending and self._oldest_at else 0.0,
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_ms": self.last_flush_ms,
+            "seconds_since_flush": round(now - self.last_flush_at, 3) if self.last_flush_at else None,
+        }
+
+
+# Global recorder instance
+prediction_recorder = PredictionRecorder()
@@ -1,8 +1,13 @@
+from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.models.predictor import predictor
-from app.database.database import Prediction, SensorReading
+from app.models.registry import model_registry
+from app.services.feature_buffer import feature_store
+from app.services.inference_executor import inference_batcher
+from app.services.prediction_recorder import prediction_recorder
+from app.services.prediction_cache import feature_cache, quantize_features, reading_cache
+from app.database.database import SensorReading
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from fastapi import HTTPException
@@ -38,28 +43,115 @@ class PredictionService:
                 detail=f"Incomplete sensor data for {plant_id}. Missing required fields (soil_moisture, humidity, or temperature)."
             )
 
-        # Use ML model
-        prediction_result = predictor.predict(
-            soil_moisture=latest_reading.soil_moisture,
-            soil_humidity=latest_reading.humidity,
-            temperature=latest_reading.temperature
+        # Same reading as a previous call → same answer, no new row
+        # Keys carry the model version so a hot-swapped model never serves stale answers
+        reading_key = (plant_id, latest_reading.id, model_registry.version)
+        cached = reading_cache.get(reading_key)
+        if cached is not None:
+            record, cached_result = cached
+            return record, dict(cached_result)
+
+        # Rolling-window features are only computed/keyed if the model uses them
+        model = model_registry.active
+        extra = feature_store.vector(plant_id, limit=model.n_features - len(model.FEATURES))
+
+        feature_key = quantize_features(
+            [latest_reading.soil_moisture, latest_reading.humidity, latest_reading.temperature, *extra]
         )
+        if feature_key:
+            feature_key = (*feature_key, model_registry.version)
+        prediction_result = feature_cache.get(feature_key) if feature_key else None
+        if prediction_result is None:
+            # Use ML model (runs on the inference worker, batched with concurrent calls)
+            prediction_result = await inference_batcher.predict(
+                soil_moisture=latest_reading.soil_moisture,
+                soil_humidity=latest_reading.humidity,
+                temperature=latest_reading.temperature,
+                extra=extra,
+            )
+            if feature_key:
+                feature_cache.put(feature_key, prediction_result)
+        prediction_result = dict(prediction_result)
 
         print("Soil Moisture: ", latest_reading.soil_moisture)
         print("Soil Humidity: ", latest_reading.humidity)
         print("Soil Temperature: " ,latest_reading.temperature)
 
-        # Save prediction to DB
-        new_record = Prediction(
-            should_water=prediction_result["should_water"],
-            confidence=prediction_result["confidence"],
-            soil_moisture=latest_reading.soil_moisture,
-            humidity=latest_reading.humidity,
-            temperature=latest_reading.temperature,
-            timestamp=datetime.now(ZoneInfo(settings.timezone))
-        )
-        db.add(new_record)
-        await db.commit()
-        await db.refresh(new_record)
+        # Log the prediction write-behind: the response does not wait on the DB
+        new_record = {
+            "plant_id": plant_id,
+            "should_water": prediction_result["should_water"],
+            "confidence": prediction_result["confidence"],
+            "soil_moisture": latest_reading.soil_moisture,
+            "humidity": latest_reading.humidity,
+            "temperature": latest_reading.temperature,
+            "timestamp": datetime.now(ZoneInfo(settings.timezone)),
+        }
+        prediction_recorder.record(new_record)
 
+        reading_cache.put(reading_key, (new_record, dict(prediction_result)))
         return new_record, prediction_result
+
+    @staticmethod
+    async def predict_batch_and_save(db: AsyncSession, plant_ids: Optional[List[str]] = None) -> Dict:
+        """
+        Predict for many plants at once.
+
+        One DISTINCT ON query fetches the latest reading per plant, one
+        vectorized model call scores them all and the Prediction rows are
+        handed to the write-behind recorder in one go.
+        """
+        stmt = (
+            select(SensorReading)
+            .distinct(SensorReading.plant_id)
+            .order_by(SensorReading.plant_id, SensorReading.timestamp.desc())
+        )
+        if plant_ids:
+            stmt = stmt.where(SensorReading.plant_id.in_(plant_ids))
+        result = await db.execute(stmt)
+        latest = result.scalars().all()
+
+        found = {r.plant_id for r in latest}
+        missing = [p for p in dict.fromkeys(plant_ids or []) if p not in found]
+        complete = [
+            r for r in latest
+            if r.soil_moisture is not None and r.humidity is not None and r.temperature is not None
+        ]
+        incomplete = sorted(found - {r.plant_id for r in complete})
+
+        model = model_registry.active
+        n_extra = model.n_features - len(model.FEATURES)
+        results = await inference_batcher.predict_many(
+            [
+                (
+                    r.soil_moisture, r.humidity, r.temperature,
+                    *feature_store.vector(r.plant_id, limit=n_extra),
+                )
+                for r in complete
+            ]
+        )
+
+        now = datetime.now(ZoneInfo(settings.timezone))
+        prediction_recorder.record_many(
+            [
+                {
+                    "plant_id": r.plant_id,
+                    "should_water": res["should_water"],
+                    "confidence": res["confidence"],
+                    "soil_moisture": r.soil_moisture,
+                    "humidity": r.humidity,
+                    "temperature": r.temperature,
+                    "timestamp": now,
+                }
+                for r, res in zip(complete, results)
+            ]
+        )
+
+        return {
+            "predictions": [
+                {"plant_id": r.plant_id, "reading_timestamp": r.timestamp, **res}
+                for r, res in zip(complete, results)
+            ],
+            "missing": missing,
+            "incomplete": incomplete,
+        }
@@ -0,0 +1,111 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+from app.config import settings
+
+# Only one profiler samples at a time (admin call or slow-request capture)
+profile_lock = threading.Lock()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    filename = code.co_filename
+    # Trim site-packages / repo prefixes to keep stacks readable
+    for marker in ("site-packages" + os.sep, os.getcwd() + os.sep):
+        index = filename.find(marker)
+        if index != -1:
+            filename = filename[index + len(marker):]
+            break
+    return f"{name} ({filename}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Low-overhead wall-clock sampling profiler for every thread.
+
+    A daemon thread snapshots ``sys._current_frames()`` every ``interval_s``
+    and counts identical stacks, so the event loop, the paho MQTT loop and
+    worker pools are all covered. ``collapsed()`` returns the counts in the
+    folded format used by flamegraph.pl and speedscope
+    (``thread;outer;...;inner count`` per line).
+    """
+
+    def __init__(self, interval_s: Optional[float] = None, max_duration_s: Optional[float] = None):
+        self.interval_s = interval_s or settings.profile_interval_ms / 1000
+        self.max_duration_s = max_duration_s
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.stopped_at = self.stopped_at or time.perf_counter()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval_s):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+            if self.max_duration_s and time.perf_counter() - self.started_at >= self.max_duration_s:
+                break
+        self.stopped_at = time.perf_counter()
+
+    @property
+    def duration_s(self) -> float:
+        end = self.stopped_at or time.perf_counter()
+        return end - self.started_at if self.started_at else 0.0
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self) -> Dict:
+        return {
+            "samples": self.samples,
+            "duration_s": round(self.duration_s, 3),
+            "interval_ms": self.interval_s * 1000,
+            "distinct_stacks": len(self.stacks),
+        }
+
+
+def profile_for(seconds: float, interval_s: Optional[float] = None) -> SamplingProfiler:
+    """Blocking: sample all threads for ``seconds`` (caller holds profile_lock)."""
+    profiler = SamplingProfiler(interval_s)
+    profiler.start()
+    time.sleep(seconds)
+    profiler.stop()
+    return profiler
+
+
+def save_profile(profiler: SamplingProfiler, label: str) -> Path:
+    """Write a collapsed-stack file to settings.profile_dir."""
+    directory = Path(settings.profile_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    safe_label = "".join(c if c.isalnum() or c in "-_" else "_" for c in label)[:80]
+    path = directory / f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{safe_label}.folded"
+    path.write_text(profiler.collapsed())
+    return path
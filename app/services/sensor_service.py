@@ -1,7 +1,12 @@
-from sqlalchemy import select
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional, Dict
-from app.database.database import SensorReading
+from typing import Any, List, Optional, Dict, Tuple
+from app.config import settings
+from app.database.database import SensorReading, get_local_time
+from app.database.schemas import SensorReadingBulkItem
 from app.mqtt.mqtt_handler import get_water_tank_state
 
 
@@ -9,68 +14,40 @@ from app.mqtt.mqtt_handler import get_water_tank_state
 # 🔍 Generic async query functions
 # --------------------------------------------
 
-async def get_soil_history(
-    db: AsyncSession, plant_id: Optional[str] = None, limit: int = 50
-) -> List[SensorReading]:
-    """Fetch soil moisture readings."""
-    stmt = select(SensorReading.soil_moisture, SensorReading.timestamp)
-    if plant_id:
-        stmt = stmt.where(SensorReading.plant_id == plant_id)
-    stmt = stmt.order_by(SensorReading.timestamp.desc()).limit(limit)
-    result = await db.execute(stmt)
-    rows = result.all()[::-1]
-    return [{"timestamp": r[1], "soil_moisture": r[0]} for r in rows if r[0] is not None]
-
-
-async def get_temperature_history(
-    db: AsyncSession, plant_id: Optional[str] = None, limit: int = 50
-) -> List[SensorReading]:
-    """Fetch temperature readings."""
-    stmt = select(SensorReading.temperature, SensorReading.timestamp)
-    if plant_id:
-        stmt = stmt.where(SensorReading.plant_id == plant_id)
-    stmt = stmt.order_by(SensorReading.timestamp.desc()).limit(limit)
-    result = await db.execute(stmt)
-    rows = result.all()[::-1]
-    return [{"timestamp": r[1], "temperature": r[0]} for r in rows if r[0] is not None]
+# Queryable history fields -> SensorReading column
+HISTORY_FIELDS = {
+    "soil_moisture": SensorReading.soil_moisture,
+    "temperature": SensorReading.temperature,
+    "humidity": SensorReading.humidity,
+    "pressure": SensorReading.pressure,
+    "light_level": SensorReading.light_level,
+}
 
 
-async def get_humidity_history(
-    db: AsyncSession, plant_id: Optional[str] = None, limit: int = 50
-) -> List[SensorReading]:
-    """Fetch air humidity readings."""
-    stmt = select(SensorReading.humidity, SensorReading.timestamp)
-    if plant_id:
-        stmt = stmt.where(SensorReading.plant_id == plant_id)
-    stmt = stmt.order_by(SensorReading.timestamp.desc()).limit(limit)
-    result = await db.execute(stmt)
-    rows = result.all()[::-1]
-    return [{"timestamp": r[1], "humidity": r[0]} for r in rows if r[0] is not None]
-
+async def get_history_rows(
+    db: AsyncSession, field: str, plant_id: Optional[str] = None, limit: int = 50
+) -> List[Tuple[datetime, float]]:
+    """
+    Latest ``limit`` readings of one field as (timestamp, value) tuples, oldest first.
 
-async def get_pressure_history(
-    db: AsyncSession, plant_id: Optional[str] = None, limit: int = 50
-) -> List[SensorReading]:
-    """Fetch air pressure readings."""
-    stmt = select(SensorReading.pressure, SensorReading.timestamp)
+    With chunk storage enabled, compacted windows are merged in; only the
+    windows that can still hold one of the newest readings are decoded.
+    """
+    column = HISTORY_FIELDS[field]
+    stmt = select(SensorReading.id, SensorReading.timestamp, column)
     if plant_id:
         stmt = stmt.where(SensorReading.plant_id == plant_id)
     stmt = stmt.order_by(SensorReading.timestamp.desc()).limit(limit)
     result = await db.execute(stmt)
-    rows = result.all()[::-1]
-    return [{"timestamp": r[1], "pressure": r[0]} for r in rows if r[0] is not None]
-
-async def get_light_history(
-    db: AsyncSession, plant_id: Optional[str] = None, limit: int = 50
-) -> List[SensorReading]:
-    """Fetch air pressure readings."""
-    stmt = select(SensorReading.light_level, SensorReading.timestamp)
-    if plant_id:
-        stmt = stmt.where(SensorReading.plant_id == plant_id)
-    stmt = stmt.order_by(SensorReading.timestamp.desc()).limit(limit)
-    result = await db.execute(stmt)
-    rows = result.all()[::-1]
-    return [{"timestamp": r[1], "light_level": r[0]} for r in rows if r[0] is not None]
+    rows = result.all()
+    if settings.chunk_storage_enabled:
+        from app.services import chunk_store  # pulls in numpy — only with chunk storage on
+        newer_than = rows[-1][1] if len(rows) == limit else None
+        chunked = await chunk_store.newest_chunk_rows(
+            db, ("id", "timestamp", field), plant_id, limit, newer_than
+        )
+        rows = chunk_store.merge_newest(rows, chunked, limit)
+    return [(timestamp, value) for _, timestamp, value in rows[::-1] if value is not None]
 
 
 async def get_water_tank_status(plant_id: str = "plant1") -> Dict:
@@ -81,4 +58,112 @@ async def get_water_tank_status(plant_id: str = "plant1") -> Dict:
         "status": state.get("status", "unknown"),
         "plant_id": plant_id,
         "last_update": state.get("last_update")
-    }
\ No newline at end of file
+    }
+
+
+# --------------------------------------------
+# 📦 Bulk ingest
+# --------------------------------------------
+
+_bulk_adapter = TypeAdapter(List[SensorReadingBulkItem])
+
+
+def validate_bulk_readings(
+    rows: List[Any], offset: int = 0
+) -> Tuple[List[dict], List[dict]]:
+    """
+    Validate a batch of raw readings in a single pydantic-core pass.
+
+    Returns (valid_rows, errors). Valid rows are plain dicts ready for a
+    multi-row INSERT; errors carry the reading's position in the upload
+    (shifted by ``offset`` so streamed chunks report global indices).
+    """
+    errors: Dict[int, str] = {}
+    try:
+        items = _bulk_adapter.validate_python(rows)
+    except ValidationError as exc:
+        for err in exc.errors():
+            loc = err.get("loc") or ()
+            index = loc[0] if loc and isinstance(loc[0], int) else -1
+            field = ".".join(str(part) for part in loc[1:])
+            message = f"{field}: {err['msg']}" if field else err["msg"]
+            errors.setdefault(index, message)
+
+        if -1 in errors:
+            # The payload itself is not a list of objects — nothing to salvage
+            return [], [{"index": offset, "message": errors[-1]}]
+
+        # Second pass over the survivors only; cannot fail again
+        items = _bulk_adapter.validate_python(
+            [row for i, row in enumerate(rows) if i not in errors]
+        )
+
+    now = get_local_time()
+    tz = ZoneInfo(settings.timezone)
+    valid = []
+    for item in items:
+        row = item.model_dump()
+        ts = row["timestamp"]
+        if ts is None:
+            row["timestamp"] = now
+        elif ts.tzinfo is None:
+            row["timestamp"] = ts.replace(tzinfo=tz)
+        valid.append(row)
+
+    return valid, [
+        {"index": offset + i, "message": msg} for i, msg in sorted(errors.items())
+    ]
+
+
+async def bulk_insert_readings(
+    db: AsyncSession, rows: List[dict], chunk_size: Optional[int] = None
+) -> int:
+    """
+    Insert validated readings using multi-row INSERTs of ``chunk_size`` rows.
+
+    The caller owns the transaction (one commit per upload).
+    """
+    chunk_size = chunk_size or settings.bulk_ingest_chunk_size
+    for start in range(0, len(rows), chunk_size):
+        await db.execute(insert(SensorReading), rows[start:start + chunk_size])
+    return len(rows)
+
+
+class BulkIngestTracker:
+    """Accumulates the summary of a (possibly streamed) bulk upload."""
+
+    def __init__(self, max_errors: Optional[int] = None):
+        self.max_errors = max_errors if max_errors is not None else settings.bulk_ingest_max_errors
+        self.received = 0
+        self.inserted = 0
+        self.rejected = 0
+        self.plants: set = set()
+        self.first_timestamp: Optional[datetime] = None
+        self.last_timestamp: Optional[datetime] = None
+        self.errors: List[dict] = []
+
+    def add(self, received: int, valid: List[dict], errors: List[dict]):
+        self.received += received
+        self.rejected += received - len(valid)
+        room = self.max_errors - len(self.errors)
+        if room > 0:
+            self.errors.extend(errors[:room])
+
+        for row in valid:
+            self.plants.add(row["plant_id"])
+            ts = row["timestamp"]
+            if self.first_timestamp is None or ts < self.first_timestamp:
+                self.first_timestamp = ts
+            if self.last_timestamp is None or ts > self.last_timestamp:
+                self.last_timestamp = ts
+
+    def summary(self) -> Dict:
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "rejected": self.rejected,
+            "plants": sorted(self.plants),
+            "first_timestamp": self.first_timestamp,
+            "last_timestamp": self.last_timestamp,
+            "errors": self.errors,
+        }
@@ -0,0 +1,71 @@
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Optional, Sequence
+from fastapi.responses import Response
+
+# --------------------------------------------
+# ⚡ Fast JSON for read-heavy endpoints
+# --------------------------------------------
+# orjson is optional (pip install -e ".[fast]"); stdlib json is the fallback.
+# Both produce the same document as FastAPI's response_model path: datetimes
+# as ISO 8601 strings, with UTC written as "Z" (like pydantic).
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+RESPONSE_FORMATS = ("rows", "columnar")
+
+
+def _default(value: Any):
+    if isinstance(value, datetime):
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+    return json.dumps(
+        content, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response rendered with orjson when available.
+
+    Returning it from a route bypasses response_model validation and
+    jsonable_encoder, so it is meant for rows that come straight from the
+    database with already-known types.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def shape_rows(rows: Iterable[Sequence], columns: Sequence[str], format: str = "rows"):
+    """
+    Shape DB row tuples (in ``columns`` order) for the response.
+
+    * ``rows``     → ``[{"col": value, ...}, ...]`` (the classic shape)
+    * ``columnar`` → ``{"count": n, "columns": {"col": [values...], ...}}``
+    """
+    if format == "columnar":
+        rows = list(rows)
+        arrays = zip(*rows) if rows else ([] for _ in columns)
+        return {"count": len(rows), "columns": dict(zip(columns, map(list, arrays)))}
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def rows_response(
+    rows: Iterable[Sequence], columns: Sequence[str], format: str = "rows",
+    headers: Optional[Dict[str, str]] = None,
+):
+    return FastJSONResponse(shape_rows(rows, columns, format), headers=headers)
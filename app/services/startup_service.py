@@ -0,0 +1,141 @@
+import asyncio
+import time
+from typing import Dict, Optional
+from sqlalchemy.exc import DBAPIError
+from app.config import settings
+from app.database.database import Base, engine, run_additive_migrations
+from app.models.registry import model_registry
+from app.mqtt import mqtt_handler
+from app.services.auto_watering import auto_watering
+from app.services.command_pipeline import command_pipeline
+from app.services.ingest_spool import ingest_spool
+
+# Measured from the first import of this module (i.e. app import time)
+PROCESS_STARTED = time.perf_counter()
+
+
+class StartupState:
+    """Tracks the background startup sequence for the health endpoints."""
+
+    def __init__(self):
+        self.db_ready = False
+        self.db_error: Optional[str] = None
+        self.mqtt_started = False
+        self.mqtt_error: Optional[str] = None
+        self.complete = False
+        self.startup_seconds: Optional[float] = None
+        self.steps: Dict[str, float] = {}
+        self.task: Optional[asyncio.Task] = None
+
+    def snapshot(self) -> Dict:
+        return {
+            "complete": self.complete,
+            "startup_seconds": self.startup_seconds,
+            "steps": dict(self.steps),
+            "uptime_seconds": round(time.perf_counter() - PROCESS_STARTED, 1),
+        }
+
+
+startup_state = StartupState()
+
+
+# --------------------------------------------
+# 🗄️ Database (async exponential backoff)
+# --------------------------------------------
+async def wait_for_database():
+    delay = settings.startup_db_base_delay
+    attempts = settings.startup_db_retries
+    for i in range(attempts):
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                await conn.run_sync(run_additive_migrations)
+            startup_state.db_ready = True
+            startup_state.db_error = None
+            print("🗄️ Database ready.")
+            if settings.chunk_storage_enabled:
+                await asyncio.to_thread(start_chunk_compactor)
+            return
+        except (DBAPIError, OSError) as e:
+            startup_state.db_error = str(e).splitlines()[0]
+            print(f"⏳ Waiting for database... ({i+1}/{attempts}, retry in {delay:.1f}s)")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, settings.startup_db_max_delay)
+
+    print("❌ Database connection failed after retries.")
+
+
+# --------------------------------------------
+# 🗜️ Chunk compaction (opt-in)
+# --------------------------------------------
+# chunk_store pulls in numpy, so it is only imported with chunk storage on
+def start_chunk_compactor():
+    from app.services.chunk_store import chunk_compactor
+    chunk_compactor.start()
+
+
+def stop_chunk_compactor():
+    if settings.chunk_storage_enabled:
+        from app.services.chunk_store import chunk_compactor
+        chunk_compactor.stop()
+
+
+# --------------------------------------------
+# 🤖 Model (loaded in a worker thread)
+# --------------------------------------------
+async def load_model():
+    await asyncio.to_thread(model_registry.active.load)
+    model_registry.start_watching()
+
+
+# --------------------------------------------
+# 📡 MQTT
+# --------------------------------------------
+async def start_mqtt_bridge():
+    try:
+        loop = asyncio.get_running_loop()
+        command_pipeline.start(loop)
+        ingest_spool.start()
+        if settings.auto_watering_enabled:
+            auto_watering.start(loop)
+        mqtt_handler.start_mqtt(loop)
+        startup_state.mqtt_started = True
+        print("📡 MQTT bridge initialized.")
+    except Exception as e:
+        startup_state.mqtt_error = str(e)
+        print(f"❌ MQTT bridge failed to start: {e}")
+
+
+async def _timed(name: str, coro):
+    started = time.perf_counter()
+    await coro
+    startup_state.steps[name] = round(time.perf_counter() - started, 3)
+
+
+async def initialize():
+    """Run the startup steps concurrently; the API serves requests meanwhile."""
+    await asyncio.gather(
+        _timed("database", wait_for_database()),
+        _timed("model", load_model()),
+        _timed("mqtt", start_mqtt_bridge()),
+    )
+    startup_state.complete = True
+    startup_state.startup_seconds = round(time.perf_counter() - PROCESS_STARTED, 3)
+    print(f"✅ Startup finished in {startup_state.startup_seconds:.2f}s → {startup_state.steps}")
+
+
+def begin_startup():
+    """Schedule initialize() without blocking the startup hook."""
+    startup_state.task = asyncio.get_running_loop().create_task(initialize())
+    return startup_state.task
+
+
+async def cancel_startup():
+    await model_registry.stop_watching()
+    task = startup_state.task
+    if task and not task.done():
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
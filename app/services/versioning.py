@@ -0,0 +1,93 @@
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, Optional, Tuple
+from fastapi import Request, Response
+from app.config import settings
+
+# --------------------------------------------
+# 🏷️ Version stamps + ETags
+# --------------------------------------------
+# Writers bump a counter per (resource, plant) whenever the data behind a
+# read endpoint changes; readers derive an ETag from it and can answer
+# If-None-Match with 304 before touching the database.
+#
+# Resources:
+#   readings         sensor_readings rows (MQTT ingest, spool replay, uploads)
+#   tank             in-memory water tank state (MQTT)
+#   watering         in-memory watering state (MQTT reports, toggle/bulk)
+#   watering_events  watering_events rows / daily usage
+#
+# Counters live in this process and only see writes made through it. The
+# ETag includes a per-process token, so a restart never produces a false 304,
+# but writes handled by another uvicorn worker, or made by CLI tools such as
+# `viridion backfill-usage`, do not bump this process's stamps. ETags are
+# therefore for single-worker deployments: set ETAGS_ENABLED=false when
+# running several workers, and restart the API after out-of-process writes.
+
+ALL_PLANTS = "*"
+
+
+class VersionStamps:
+    def __init__(self):
+        self._versions: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        self.token = format(time.time_ns() & 0xFFFFFFFFFF, "x")
+
+    def bump(self, resource: str, plant_id: Optional[str] = None):
+        """Mark ``resource`` as changed for ``plant_id`` (and for the all-plants view)."""
+        with self._lock:
+            for key in {(resource, plant_id or ALL_PLANTS), (resource, ALL_PLANTS)}:
+                self._versions[key] = self._versions.get(key, 0) + 1
+
+    def bump_many(self, resource: str, plant_ids: Iterable[Optional[str]]):
+        for plant_id in set(plant_ids):
+            self.bump(resource, plant_id)
+
+    def get(self, resource: str, plant_id: Optional[str] = None) -> int:
+        return self._versions.get((resource, plant_id or ALL_PLANTS), 0)
+
+    def etag(self, resource: str, plant_id: Optional[str] = None, variant: str = "") -> str:
+        """Weak ETag for one representation (``variant``, e.g. the query string)."""
+        version = self.get(resource, plant_id)
+        return f'W/"{self.token}-{version}-{zlib.crc32(variant.encode()):08x}"'
+
+
+versions = VersionStamps()
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    return any(
+        (candidate[2:] if candidate.startswith("W/") else candidate) == opaque
+        for candidate in (c.strip() for c in if_none_match.split(","))
+    )
+
+
+def check_not_modified(
+    request: Request, resource: str, plant_id: Optional[str] = None, variant: str = ""
+) -> Tuple[Optional[str], Optional[Response]]:
+    """
+    ETag for this request and, if the client already has it, a ready
+    ``304 Not Modified`` response to return instead of doing any work.
+
+    ``variant`` adds inputs that are not in the query string (e.g. defaults
+    derived from the clock). Returns (None, None) when ETags are disabled.
+    """
+    if not settings.etags_enabled:
+        return None, None
+    etag = versions.etag(resource, plant_id, f"{request.url.query}|{variant}")
+    if _matches(request.headers.get("if-none-match"), etag):
+        return etag, Response(status_code=304, headers=cache_headers(etag))
+    return etag, None
+
+
+def cache_headers(etag: Optional[str]) -> Dict[str, str]:
+    if etag is None:
+        return {}
+    # no-cache: clients may store the response but must revalidate every time
+    return {"ETag": etag, "Cache-Control": "no-cache"}
@@ -0,0 +1,298 @@
+import asyncio
+import base64
+import binascii
+from collections import defaultdict
+from datetime import date, datetime
+from fnmatch import fnmatchcase
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+from sqlalchemy import distinct, insert, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database.database import (
+    SensorChunk, SensorReading, WateringDailyUsage, WateringEvent, get_local_time,
+)
+from app.mqtt import mqtt_handler
+from app.services.command_pipeline import command_pipeline
+from app.services.versioning import versions
+
+# Usage bucket for events without a plant (recorded before per-plant tracking)
+UNKNOWN_PLANT = "unknown"
+
+DEFAULT_SCHEDULE = {
+    "enabled": True,
+    "duration": 10,
+    "threshold": 30
+}
+
+# In-memory runtime state, per plant
+watering_states: Dict[str, Dict] = {}
+
+
+def get_plant_state(plant_id: str) -> Dict:
+    return watering_states.setdefault(
+        plant_id, {"active": False, "schedule": dict(DEFAULT_SCHEDULE)}
+    )
+
+
+# --------------------------------------------
+# 📝 Recording events + daily usage rollup
+# --------------------------------------------
+def _local_day(timestamp: datetime) -> date:
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(ZoneInfo(settings.timezone))
+    return timestamp.date()
+
+
+def _usage_amount(duration: int, water_amount: Optional[float]) -> float:
+    if water_amount is not None:
+        return water_amount
+    if settings.pump_flow_lpm:
+        return duration / 60 * settings.pump_flow_lpm
+    return 0.0
+
+
+def daily_usage_rows(events: List[Dict]) -> List[Dict]:
+    """Aggregate event rows into watering_daily_usage increments."""
+    usage = defaultdict(lambda: {"events": 0, "total_duration": 0, "water_amount": 0.0})
+    for event in events:
+        key = (event["plant_id"] or UNKNOWN_PLANT, _local_day(event["timestamp"]))
+        bucket = usage[key]
+        bucket["events"] += 1
+        bucket["total_duration"] += event["duration"]
+        bucket["water_amount"] += _usage_amount(event["duration"], event.get("water_amount"))
+    return [{"plant_id": plant_id, "day": day, **totals} for (plant_id, day), totals in usage.items()]
+
+
+async def record_watering_events(db: AsyncSession, events: List[Dict]) -> int:
+    """
+    Insert WateringEvent rows (one multi-row INSERT) and add them to the
+    per-plant daily usage in the same transaction. The caller commits, then
+    bumps the ``watering_events`` version stamp.
+
+    Each event needs ``duration`` and ``triggered_by``; ``plant_id``,
+    ``water_amount`` and ``timestamp`` (defaults to now) are optional.
+    """
+    if not events:
+        return 0
+    now = get_local_time()
+    rows = [
+        {
+            "plant_id": event.get("plant_id"),
+            "timestamp": event.get("timestamp") or now,
+            "duration": event["duration"],
+            "water_amount": event.get("water_amount"),
+            "triggered_by": event["triggered_by"],
+        }
+        for event in events
+    ]
+    await db.execute(insert(WateringEvent), rows)
+
+    stmt = pg_insert(WateringDailyUsage).values(daily_usage_rows(rows))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[WateringDailyUsage.plant_id, WateringDailyUsage.day],
+        set_={
+            "events": WateringDailyUsage.events + stmt.excluded.events,
+            "total_duration": WateringDailyUsage.total_duration + stmt.excluded.total_duration,
+            "water_amount": WateringDailyUsage.water_amount + stmt.excluded.water_amount,
+        },
+    )
+    await db.execute(stmt)
+    return len(rows)
+
+
+# Rebuilds watering_daily_usage from watering_events (idempotent)
+BACKFILL_DAILY_USAGE = """
+INSERT INTO watering_daily_usage (plant_id, day, events, total_duration, water_amount)
+SELECT
+    COALESCE(plant_id, :unknown),
+    (timestamp AT TIME ZONE :tz)::date,
+    count(*),
+    sum(duration),
+    COALESCE(sum(COALESCE(water_amount, duration / 60.0 * CAST(:flow AS double precision))), 0)
+FROM watering_events
+GROUP BY 1, 2
+ON CONFLICT (plant_id, day) DO UPDATE SET
+    events = EXCLUDED.events,
+    total_duration = EXCLUDED.total_duration,
+    water_amount = EXCLUDED.water_amount
+"""
+
+
+def backfill_daily_usage(conn) -> int:
+    """Recompute every (plant, day) aggregate from the events table (sync connection)."""
+    result = conn.execute(
+        text(BACKFILL_DAILY_USAGE),
+        {"unknown": UNKNOWN_PLANT, "tz": settings.timezone, "flow": settings.pump_flow_lpm},
+    )
+    return result.rowcount
+
+
+# --------------------------------------------
+# 📜 History (keyset pagination)
+# --------------------------------------------
+HISTORY_COLUMNS = ("id", "plant_id", "timestamp", "duration", "triggered_by")
+
+
+def encode_cursor(timestamp: datetime, event_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{event_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Raises ValueError for malformed cursors."""
+    try:
+        timestamp, event_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), int(event_id)
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError(str(e)) from e
+
+
+async def get_watering_history_rows(
+    db: AsyncSession, plant_id: Optional[str] = None, limit: int = 50, cursor: Optional[str] = None
+) -> Tuple[List[Tuple], Optional[str]]:
+    """
+    Newest-first events (HISTORY_COLUMNS order) and the cursor for the next
+    page (None on the last page). Uses the (plant_id, timestamp, id) index.
+    """
+    stmt = select(*(getattr(WateringEvent, column) for column in HISTORY_COLUMNS))
+    if plant_id:
+        stmt = stmt.where(WateringEvent.plant_id == plant_id)
+    if cursor:
+        timestamp, event_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(WateringEvent.timestamp, WateringEvent.id) < tuple_(timestamp, event_id))
+    stmt = stmt.order_by(WateringEvent.timestamp.desc(), WateringEvent.id.desc()).limit(limit + 1)
+
+    rows = (await db.execute(stmt)).all()
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], encode_cursor(last[2], last[0])
+
+
+# --------------------------------------------
+# 📊 Usage
+# --------------------------------------------
+async def get_daily_usage(
+    db: AsyncSession, plant_ids: Optional[List[str]], start: date, end: date, daily: bool = False
+) -> Dict:
+    """Totals per plant (and per day with ``daily``) between start and end, inclusive."""
+    stmt = select(
+        WateringDailyUsage.plant_id,
+        WateringDailyUsage.day,
+        WateringDailyUsage.events,
+        WateringDailyUsage.total_duration,
+        WateringDailyUsage.water_amount,
+    ).where(WateringDailyUsage.day >= start, WateringDailyUsage.day <= end)
+    if plant_ids is not None:
+        stmt = stmt.where(WateringDailyUsage.plant_id.in_(plant_ids))
+    stmt = stmt.order_by(WateringDailyUsage.plant_id, WateringDailyUsage.day)
+
+    totals = {"events": 0, "total_duration": 0, "water_amount": 0.0}
+    plants: Dict[str, Dict] = {}
+    for plant_id, day, events, total_duration, water_amount in (await db.execute(stmt)).all():
+        plant = plants.setdefault(plant_id, {"events": 0, "total_duration": 0, "water_amount": 0.0})
+        for target in (plant, totals):
+            target["events"] += events
+            target["total_duration"] += total_duration
+            target["water_amount"] += water_amount
+        if daily:
+            plant.setdefault("days", []).append({
+                "day": day.isoformat(),
+                "events": events,
+                "total_duration": total_duration,
+                "water_amount": round(water_amount, 3),
+            })
+
+    for values in (totals, *plants.values()):
+        values["water_amount"] = round(values["water_amount"], 3)
+    return {"start": start.isoformat(), "end": end.isoformat(), "totals": totals, "plants": plants}
+
+
+class PlantSelectionError(ValueError):
+    """Raised when a bulk watering request selects no valid plants."""
+
+
+# --------------------------------------------
+# 🎯 Plant selection
+# --------------------------------------------
+async def known_plants(db: AsyncSession) -> List[str]:
+    """Plants with stored readings plus any seen live over MQTT."""
+    result = await db.execute(select(distinct(SensorReading.plant_id)))
+    plants = set(result.scalars().all())
+    if settings.chunk_storage_enabled:
+        result = await db.execute(select(distinct(SensorChunk.plant_id)))
+        plants.update(result.scalars().all())
+    plants.update(mqtt_handler.sensor_buffers)
+    plants.update(mqtt_handler.watering_states)
+    return sorted(plants)
+
+
+async def resolve_selector(db: AsyncSession, selector: str) -> List[str]:
+    """``group:<name>`` from settings.plant_groups, otherwise a glob over known plants."""
+    if selector.startswith("group:"):
+        name = selector[len("group:"):]
+        if name not in settings.plant_groups:
+            raise PlantSelectionError(f"Unknown plant group '{name}'")
+        return list(settings.plant_groups[name])
+    return [p for p in await known_plants(db) if fnmatchcase(p, selector)]
+
+
+# --------------------------------------------
+# 💧 Bulk watering
+# --------------------------------------------
+async def bulk_water(
+    db: AsyncSession,
+    targets: List[Tuple[str, int]],
+    stagger_ms: int = 0,
+    wait_for_ack: bool = False,
+    ack_timeout: Optional[float] = None,
+    triggered_by: str = "manual",
+) -> Dict:
+    """
+    Send a watering command per (plant_id, duration) through the command
+    pipeline. Publishes run concurrently, bounded by
+    settings.bulk_watering_concurrency; ack waits are not bounded, so they
+    all overlap. With ``stagger_ms`` command i is held back by i × stagger_ms.
+    One WateringEvent per published command is written in a single INSERT.
+    """
+    semaphore = asyncio.Semaphore(settings.bulk_watering_concurrency)
+
+    async def water_one(index: int, plant_id: str, duration: int) -> Dict:
+        if stagger_ms:
+            await asyncio.sleep(index * stagger_ms / 1000)
+        async with semaphore:
+            try:
+                command = await command_pipeline.publish(plant_id, True, duration)
+            except Exception as e:
+                return {"plant_id": plant_id, "duration": duration, "published": False,
+                        "outcome": "failed", "error": str(e)}
+        if wait_for_ack:
+            return await command_pipeline.wait_ack(command, ack_timeout)
+        return command.summary()
+
+    results = await asyncio.gather(
+        *(water_one(i, plant_id, duration) for i, (plant_id, duration) in enumerate(targets))
+    )
+
+    events = [
+        {"plant_id": r["plant_id"], "duration": r["duration"], "triggered_by": triggered_by}
+        for r in results if r["published"]
+    ]
+    if events:
+        await record_watering_events(db, events)
+        await db.commit()
+        versions.bump_many("watering_events", (e["plant_id"] for e in events))
+    for r in results:
+        if r["published"]:
+            get_plant_state(r["plant_id"])["active"] = True
+            versions.bump("watering", r["plant_id"])
+
+    return {
+        "requested": len(targets),
+        "published": len(events),
+        "acknowledged": sum(1 for r in results if r.get("acknowledged")),
+        "failed": sum(1 for r in results if not r["published"]),
+        "events_recorded": len(events),
+        "results": results,
+    }
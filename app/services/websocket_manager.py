@@ -1,7 +1,9 @@
 import json
+import time
 from typing import Dict, List
 from fastapi import WebSocket
 from datetime import datetime
+from app.services.metrics import WS_CONNECTIONS, WS_FANOUT_SECONDS
 
 
 class ConnectionManager:
@@ -10,6 +12,10 @@ class ConnectionManager:
     def __init__(self):
         # Store active connections per plant_id
         self.active_connections: Dict[str, List[WebSocket]] = {}
+        WS_CONNECTIONS.set_function(self.connection_count)
+
+    def connection_count(self) -> int:
+        return sum(len(connections) for connections in list(self.active_connections.values()))
 
     async def connect(self, websocket: WebSocket, plant_id: str):
         """Accept a new WebSocket connection for a specific plant"""
@@ -44,17 +50,7 @@ class ConnectionManager:
         })
 
         # Send to all connected clients for this plant
-        disconnected = []
-        for connection in self.active_connections[plant_id]:
-            try:
-                await connection.send_text(message)
-            except Exception as e:
-                print(f"⚠️ Error sending to client: {e}")
-                disconnected.append(connection)
-
-        # Remove disconnected clients
-        for connection in disconnected:
-            self.disconnect(connection, plant_id)
+        await self._fan_out(plant_id, message, "sensor_update")
 
     async def send_watering_update(self, plant_id: str, status: dict):
         """Send watering status update to all clients subscribed to a plant"""
@@ -67,16 +63,7 @@ class ConnectionManager:
             "data": status
         })
 
-        disconnected = []
-        for connection in self.active_connections[plant_id]:
-            try:
-                await connection.send_text(message)
-            except Exception as e:
-                print(f"⚠️ Error sending watering update: {e}")
-                disconnected.append(connection)
-
-        for connection in disconnected:
-            self.disconnect(connection, plant_id)
+        await self._fan_out(plant_id, message, "watering_update")
 
     async def send_tank_update(self, plant_id: str, status: dict):
         """Send water tank status update to all clients subscribed to a plant"""
@@ -89,16 +76,23 @@ class ConnectionManager:
             "data": status
         })
 
+        await self._fan_out(plant_id, message, "tank_update")
+
+    async def _fan_out(self, plant_id: str, message: str, kind: str):
+        """Send ``message`` to every client of ``plant_id``; drop clients that fail."""
+        started = time.perf_counter()
         disconnected = []
-        for connection in self.active_connections[plant_id]:
+        for connection in list(self.active_connections.get(plant_id, [])):
             try:
                 await connection.send_text(message)
             except Exception as e:
-                print(f"⚠️ Error sending tank update: {e}")
+                print(f"⚠️ Error sending {kind.replace('_', ' ')}: {e}")
                 disconnected.append(connection)
 
+        # Remove disconnected clients
         for connection in disconnected:
             self.disconnect(connection, plant_id)
+        WS_FANOUT_SECONDS.labels(kind).observe(time.perf_counter() - started)
 
     async def broadcast_all(self, message: dict):
         """Broadcast a message to all connected clients (all plants)"""
@@ -0,0 +1,76 @@
+"""Shared helpers for the benchmark scripts."""
+import json
+import platform
+import statistics
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Sequence
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile (samples need not be sorted)."""
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def latency_summary(samples_s: Sequence[float], items_per_sample: int = 1) -> Dict[str, float]:
+    """p50/p99/mean in microseconds plus items/sec for per-call timings in seconds."""
+    total = sum(samples_s)
+    return {
+        "calls": len(samples_s),
+        "p50_us": round(percentile(samples_s, 50) * 1e6, 2),
+        "p99_us": round(percentile(samples_s, 99) * 1e6, 2),
+        "mean_us": round(statistics.fmean(samples_s) * 1e6, 2) if samples_s else float("nan"),
+        "items_per_sec": round(len(samples_s) * items_per_sample / total, 1) if total else 0.0,
+    }
+
+
+def print_table(rows: List[Dict], columns: Iterable[str]):
+    columns = list(columns)
+    widths = {c: max(len(c), *(len(str(r.get(c, ""))) for r in rows)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    print("  ".join("-" * widths[c] for c in columns))
+    for row in rows:
+        print("  ".join(str(row.get(c, "")).ljust(widths[c]) for c in columns))
+
+
+def write_report(path: str, name: str, results: List[Dict], params: Dict):
+    """Write a JSON report that can be diffed / compared across runs."""
+    report = {
+        "benchmark": name,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "params": params,
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"📝 Report written → {path}")
+
+
+def compare_report(path: str, results: List[Dict], keys: Sequence[str], metrics: Sequence[str]):
+    """Print the relative change of ``metrics`` vs. a previous report, matched on ``keys``."""
+    with open(path) as f:
+        baseline = {tuple(r.get(k) for k in keys): r for r in json.load(f)["results"]}
+
+    rows = []
+    for result in results:
+        old = baseline.get(tuple(result.get(k) for k in keys))
+        if not old:
+            continue
+        row = {k: result.get(k) for k in keys}
+        for metric in metrics:
+            before, after = old.get(metric), result.get(metric)
+            if isinstance(before, (int, float)) and isinstance(after, (int, float)) and before:
+                row[metric] = f"{(after - before) / before * 100:+.1f}%"
+        rows.append(row)
+
+    print(f"\n📊 Change vs. {path}")
+    if rows:
+        print_table(rows, [*keys, *metrics])
+    else:
+        print("   (no matching results)")
@@ -0,0 +1,77 @@
+"""
+Cost of rolling-window feature maintenance vs. window size.
+
+Compares the O(1) incremental RollingWindow (append + mean/min/max/slope)
+against recomputing the same aggregates from the raw window on every sample.
+
+    python -m benchmarks.bench_features --sizes 60 720 3600 14400
+"""
+import argparse
+import random
+import time
+from app.services.feature_buffer import RollingWindow
+from benchmarks._common import latency_summary, print_table, write_report
+
+
+def naive_aggregates(ts, vs):
+    n = len(vs)
+    mean = sum(vs) / n
+    t_mean = sum(ts) / n
+    cov = sum((t - t_mean) * (v - mean) for t, v in zip(ts, vs))
+    var = sum((t - t_mean) ** 2 for t in ts)
+    return mean, min(vs), max(vs), cov / var if var else float("nan")
+
+
+def bench_incremental(size: int, samples: int):
+    window = RollingWindow(capacity=size, window_s=float("inf"))
+    rng = random.Random(0)
+    for i in range(size):
+        window.append(float(i), rng.uniform(0, 100))
+
+    timings = []
+    for i in range(size, size + samples):
+        value = rng.uniform(0, 100)
+        started = time.perf_counter()
+        window.append(float(i), value)
+        window.mean(), window.min(), window.max(), window.slope()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def bench_naive(size: int, samples: int):
+    rng = random.Random(0)
+    ts = [float(i) for i in range(size)]
+    vs = [rng.uniform(0, 100) for _ in range(size)]
+
+    timings = []
+    for i in range(size, size + samples):
+        value = rng.uniform(0, 100)
+        started = time.perf_counter()
+        ts.append(float(i))
+        vs.append(value)
+        del ts[0], vs[0]
+        naive_aggregates(ts, vs)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[60, 360, 720, 3600, 14400])
+    parser.add_argument("--samples", type=int, default=2000, help="Updates timed per size")
+    parser.add_argument("--output", help="Write a JSON report")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        for name, fn in (("incremental", bench_incremental), ("recompute", bench_naive)):
+            samples = args.samples if name == "incremental" else max(50, args.samples // 10)
+            results.append({"window": size, "method": name, **latency_summary(fn(size, samples))})
+
+    print_table(results, ["window", "method", "p50_us", "p99_us", "mean_us", "items_per_sec"])
+    if args.output:
+        write_report(args.output, "features", results, vars(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Prediction latency / throughput benchmarks.
+
+In-process (no database):
+  * GardenPredictor.predict_batch in model mode (--model, .pkl or .npz) and
+    in rule-based fallback mode, across batch sizes
+  * cold start (fresh interpreter: import + model load + first call) vs warm
+  * p50/p99 latency, predictions/sec and peak allocation per call (tracemalloc)
+
+Full HTTP path (--http, needs a local Postgres in DATABASE_URL):
+  * seeds readings, then drives POST /api/predictions/watering through an
+    in-process ASGI client at several concurrency levels
+
+    python -m benchmarks.bench_predictor --model app/models/xgb_watering_model.pkl \\
+        --output before.json
+    python -m benchmarks.bench_predictor --model app/models/xgb_watering_model.npz \\
+        --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from benchmarks._common import compare_report, latency_summary, print_table, write_report
+
+MISSING_MODEL = "/nonexistent/fallback-mode.pkl"
+
+
+def random_features(n: int, rng: random.Random):
+    return [
+        (rng.uniform(0, 100), rng.uniform(0, 100), rng.uniform(-10, 50))
+        for _ in range(n)
+    ]
+
+
+# ------------------------------
+# Cold start (fresh interpreter)
+# ------------------------------
+COLD_CHILD = """
+import json, time
+t0 = time.perf_counter()
+from app.models.predictor import GardenPredictor
+t1 = time.perf_counter()
+p = GardenPredictor({path!r})
+t2 = time.perf_counter()
+p.predict(25.0, 40.0, 24.0)
+t3 = time.perf_counter()
+print(json.dumps({{"import_ms": (t1 - t0) * 1e3, "load_ms": (t2 - t1) * 1e3,
+                  "first_call_ms": (t3 - t2) * 1e3, "status": p.status}}))
+"""
+
+
+def bench_cold(mode: str, path: str, runs: int):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", COLD_CHILD.format(path=path)],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip().splitlines()[-1]
+        samples.append(json.loads(out))
+
+    def avg(key: str) -> float:
+        return round(sum(s[key] for s in samples) / len(samples), 2)
+
+    return {
+        "suite": "cold", "mode": mode, "batch": 1,
+        "import_ms": avg("import_ms"), "load_ms": avg("load_ms"),
+        "first_call_ms": avg("first_call_ms"), "status": samples[-1]["status"],
+    }
+
+
+# ------------------------------
+# Warm, in-process
+# ------------------------------
+def bench_warm(mode: str, predictor, batch: int, calls: int, rng: random.Random):
+    batches = [random_features(batch, rng) for _ in range(min(calls, 50))]
+    for rows in batches[:5]:
+        predictor.predict_batch(rows)  # warm-up
+
+    timings = []
+    for i in range(calls):
+        rows = batches[i % len(batches)]
+        started = time.perf_counter()
+        predictor.predict_batch(rows)
+        timings.append(time.perf_counter() - started)
+
+    # Allocation profile on a separate pass (tracemalloc slows calls down)
+    tracemalloc.start()
+    peaks = []
+    for rows in batches[:20]:
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        predictor.predict_batch(rows)
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+
+    summary = latency_summary(timings, items_per_sample=batch)
+    summary["predictions_per_sec"] = summary.pop("items_per_sec")
+    return {
+        "suite": "warm", "mode": mode, "batch": batch, **summary,
+        "alloc_kib_per_call": round(sum(peaks) / len(peaks) / 1024, 2),
+    }
+
+
+# ------------------------------
+# HTTP path (seeded Postgres)
+# ------------------------------
+def seed_readings(plants: int, per_plant: int):
+    from datetime import timedelta
+    from sqlalchemy import insert
+    from app.database.database import (
+        Base, SensorReading, SessionLocal, get_local_time, run_additive_migrations, sync_engine,
+    )
+
+    Base.metadata.create_all(sync_engine)
+    with sync_engine.begin() as conn:
+        run_additive_migrations(conn)
+
+    rng = random.Random(1)
+    now = get_local_time()
+    rows = [
+        {
+            "plant_id": f"benchplant{p}",
+            "timestamp": now - timedelta(minutes=i),
+            "soil_moisture": rng.uniform(10, 80),
+            "humidity": rng.uniform(20, 90),
+            "temperature": rng.uniform(15, 35),
+        }
+        for p in range(plants)
+        for i in range(per_plant)
+    ]
+    with SessionLocal() as db:
+        db.execute(insert(SensorReading), rows)
+        db.commit()
+    print(f"🌱 Seeded {len(rows)} readings for {plants} plants")
+
+
+async def bench_http(plants: int, requests: int, concurrency: int, use_cache: bool):
+    import httpx
+    from app.main import app
+    from app.services.prediction_cache import feature_cache, reading_cache
+    from app.services.prediction_recorder import prediction_recorder
+
+    transport = httpx.ASGITransport(app=app)
+    timings = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    caches = (reading_cache, feature_cache)
+    sizes = [cache.max_size for cache in caches]
+    for cache in caches:
+        cache.clear()
+        if not use_cache:
+            cache.max_size = 0  # put() becomes a no-op for the whole run
+
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def one(i: int):
+                async with semaphore:
+                    started = time.perf_counter()
+                    response = await client.post(
+                        "/api/predictions/watering", json={"plant_id": f"benchplant{i % plants}"}
+                    )
+                    timings.append(time.perf_counter() - started)
+                    response.raise_for_status()
+
+            await asyncio.gather(*(one(i) for i in range(min(requests, 20))))  # warm-up
+            timings.clear()
+            started = time.perf_counter()
+            await asyncio.gather(*(one(i) for i in range(requests)))
+            wall = time.perf_counter() - started
+    finally:
+        for cache, size in zip(caches, sizes):
+            cache.max_size = size
+
+    await prediction_recorder.flush()
+    summary = latency_summary(timings)
+    summary.pop("items_per_sec")
+    return {
+        "suite": "http", "mode": "cache" if use_cache else "no-cache", "concurrency": concurrency,
+        **summary, "predictions_per_sec": round(requests / wall, 1),
+    }
+
+
+async def bench_http_suite(plants: int, requests: int, levels):
+    # One event loop for every run: the async engine's connections are loop-bound
+    from app.services.prediction_recorder import prediction_recorder
+
+    results = []
+    for concurrency in levels:
+        for use_cache in (False, True):
+            results.append(await bench_http(plants, requests, concurrency, use_cache))
+    await prediction_recorder.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="Model file for model mode (fallback mode always runs)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 64, 512, 4096])
+    parser.add_argument("--calls", type=int, default=500, help="Timed calls per batch size")
+    parser.add_argument("--cold-runs", type=int, default=3)
+    parser.add_argument("--http", action="store_true", help="Also benchmark the HTTP path")
+    parser.add_argument("--plants", type=int, default=20)
+    parser.add_argument("--readings-per-plant", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--no-seed", action="store_true", help="Reuse previously seeded readings")
+    parser.add_argument("--output", help="Write a JSON report")
+    parser.add_argument("--compare", help="Previous JSON report to compare against")
+    args = parser.parse_args()
+
+    from app.models.predictor import GardenPredictor
+
+    modes = [("fallback", MISSING_MODEL)]
+    if args.model:
+        modes.insert(0, ("model", args.model))
+
+    rng = random.Random(0)
+    results = []
+    for mode, path in modes:
+        results.append(bench_cold(mode, path, args.cold_runs))
+        predictor = GardenPredictor(path)
+        for batch in args.batch_sizes:
+            results.append(bench_warm(mode, predictor, batch, args.calls, rng))
+
+    print_table(
+        [r for r in results if r["suite"] == "cold"],
+        ["mode", "import_ms", "load_ms", "first_call_ms", "status"],
+    )
+    print()
+    print_table(
+        [r for r in results if r["suite"] == "warm"],
+        ["mode", "batch", "p50_us", "p99_us", "predictions_per_sec", "alloc_kib_per_call"],
+    )
+
+    if args.http:
+        if not args.no_seed:
+            seed_readings(args.plants, args.readings_per_plant)
+        http_results = asyncio.run(bench_http_suite(args.plants, args.requests, args.concurrency))
+        print()
+        print_table(http_results, ["mode", "concurrency", "p50_us", "p99_us", "predictions_per_sec"])
+        results.extend(http_results)
+
+    if args.output:
+        write_report(args.output, "predictor", results, vars(args))
+    if args.compare:
+        compare_report(
+            args.compare, results, keys=["suite", "mode", "batch", "concurrency"],
+            metrics=["p50_us", "p99_us", "predictions_per_sec", "load_ms", "alloc_kib_per_call"],
+        )
+
+
+if __name__ == "__main__":
+    main()
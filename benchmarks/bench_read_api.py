@@ -0,0 +1,331 @@
+"""
+Read API benchmark against a seeded Postgres (DATABASE_URL).
+
+Seeds synthetic multi-plant time series with COPY (plant ids ``seedplant<N>``,
+one reading per ``--interval-s`` per plant, diurnal temperature, soil moisture
+that dries out and jumps back after each watering), then drives the read
+endpoints through an in-process ASGI client and reports per endpoint:
+
+  * p50/p95/p99 latency, requests/sec and rows/sec (rows in the response)
+  * the query plan of every SELECT the endpoint ran (EXPLAIN ANALYZE, BUFFERS),
+    captured from the engine so it is exactly the SQL the route executed
+
+    python -m benchmarks.bench_read_api --plants 50 --readings-per-plant 20000 --output small.json
+    python -m benchmarks.bench_read_api --no-seed --compare small.json --show-plans
+    python -m benchmarks.bench_read_api --reset   # delete seeded rows
+"""
+import argparse
+import asyncio
+import io
+import math
+import random
+import time
+from datetime import timedelta
+from benchmarks._common import compare_report, percentile, print_table, write_report
+
+SEED_PREFIX = "seedplant"
+
+
+# ------------------------------
+# Seeding (COPY)
+# ------------------------------
+def _copy(cursor, table: str, columns: str, rows):
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(",".join("" if v is None else str(v) for v in row))
+        buffer.write("\n")
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def _plant_series(plant: int, per_plant: int, interval_s: int, end, rng: random.Random):
+    """Yields (reading rows, watering event rows) in chunks for one plant."""
+    start = end - timedelta(seconds=interval_s * per_plant)
+    moisture = rng.uniform(40, 80)
+    dry_rate = rng.uniform(0.002, 0.01) * interval_s / 60
+    plant_id = f"{SEED_PREFIX}{plant}"
+    readings, events = [], []
+    for i in range(per_plant):
+        ts = start + timedelta(seconds=interval_s * i)
+        hour = ts.hour + ts.minute / 60
+        temperature = 22 + 6 * math.sin((hour - 9) / 24 * 2 * math.pi) + rng.gauss(0, 0.5)
+        moisture -= dry_rate * (1 + max(0.0, temperature - 22) / 10)
+        if moisture < 25:
+            duration = rng.choice((10, 20, 30))
+            events.append((plant_id, ts.isoformat(), duration, rng.choice(("manual", "ml_prediction"))))
+            moisture += duration * 1.5
+        readings.append((
+            plant_id, ts.isoformat(), round(temperature, 2),
+            round(min(100.0, max(0.0, 60 - (temperature - 22) * 2 + rng.gauss(0, 2))), 2),
+            round(moisture + rng.gauss(0, 0.3), 2),
+            round(max(0.0, 800 * math.sin((hour - 6) / 12 * math.pi)), 1) if 6 <= hour <= 18 else 0.0,
+            round(101.3 + rng.gauss(0, 0.2), 2),
+        ))
+        if len(readings) >= 100_000:
+            yield readings, events
+            readings, events = [], []
+    yield readings, events
+
+
+def seed(plants: int, per_plant: int, interval_s: int):
+    from app.database.database import (
+        Base, get_local_time, run_additive_migrations, sync_engine,
+    )
+    from app.services import watering_service
+
+    Base.metadata.create_all(sync_engine)
+    with sync_engine.begin() as conn:
+        run_additive_migrations(conn)
+
+    rng = random.Random(1)
+    end = get_local_time()
+    started = time.perf_counter()
+    total_readings = total_events = 0
+    raw = sync_engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        for plant in range(plants):
+            for readings, events in _plant_series(plant, per_plant, interval_s, end, rng):
+                _copy(cursor, "sensor_readings",
+                      "plant_id, timestamp, temperature, humidity, soil_moisture, light_level, pressure",
+                      readings)
+                if events:
+                    _copy(cursor, "watering_events", "plant_id, timestamp, duration, triggered_by", events)
+                total_readings += len(readings)
+                total_events += len(events)
+            raw.commit()
+            print(f"\r🌱 Seeded {plant + 1}/{plants} plants ({total_readings} readings)", end="", flush=True)
+        cursor.execute("ANALYZE sensor_readings")
+        cursor.execute("ANALYZE watering_events")
+        raw.commit()
+    finally:
+        raw.close()
+
+    with sync_engine.begin() as conn:
+        watering_service.backfill_daily_usage(conn)
+    elapsed = time.perf_counter() - started
+    print(f"\n🌱 {total_readings} readings + {total_events} watering events in {elapsed:.1f}s "
+          f"({total_readings / elapsed:,.0f} rows/s)")
+
+
+def reset():
+    from sqlalchemy import text
+    from app.database.database import sync_engine
+
+    with sync_engine.begin() as conn:
+        for table in ("sensor_readings", "watering_events", "watering_daily_usage"):
+            deleted = conn.execute(
+                text(f"DELETE FROM {table} WHERE plant_id LIKE :prefix"), {"prefix": f"{SEED_PREFIX}%"}
+            ).rowcount
+            print(f"🧹 {table}: deleted {deleted} seeded rows")
+
+
+def table_rows() -> int:
+    from sqlalchemy import text
+    from app.database.database import sync_engine
+
+    with sync_engine.connect() as conn:
+        # Planner estimate: exact count(*) is itself a full scan at this scale
+        return int(conn.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE relname = 'sensor_readings'")
+        ).scalar() or 0)
+
+
+# ------------------------------
+# Endpoints
+# ------------------------------
+def endpoints(plants: int, limit: int, include_full_list: bool):
+    plant = f"{SEED_PREFIX}{plants // 2}"
+    cases = [
+        ("soil (plant)", "/api/sensors/soil", {"plant_id": plant, "limit": limit}),
+        ("soil (all)", "/api/sensors/soil", {"limit": limit}),
+        ("soil columnar", "/api/sensors/soil", {"plant_id": plant, "limit": limit, "format": "columnar"}),
+        ("temperature (plant)", "/api/sensors/temperature", {"plant_id": plant, "limit": limit}),
+        ("light (plant)", "/api/sensors/light", {"plant_id": plant, "limit": limit}),
+        ("watering history (plant)", "/api/watering/history", {"plant_id": plant, "limit": 100}),
+        ("watering history (all)", "/api/watering/history", {"limit": 100}),
+        ("watering usage (plant)", "/api/watering/usage", {"plant_id": plant}),
+        ("tank status", "/api/sensors/tank/status", {"plant_id": plant}),
+    ]
+    if include_full_list:
+        cases.append(("list_readings", "/api/sensors/", {}))
+    return cases
+
+
+def _row_count(payload) -> int:
+    if isinstance(payload, list):
+        return len(payload)
+    if isinstance(payload, dict) and "count" in payload:
+        return payload["count"]
+    return 1
+
+
+class QueryCapture:
+    """Records the SELECTs the async engine executes (exact SQL + driver params)."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.statements = []
+        self.enabled = False
+        event.listen(engine.sync_engine, "before_cursor_execute", self._capture)
+
+    def _capture(self, conn, cursor, statement, parameters, context, executemany):
+        if self.enabled and statement.lstrip().upper().startswith("SELECT"):
+            self.statements.append((statement, parameters))
+
+
+async def explain(engine, statements):
+    plans = []
+    async with engine.connect() as conn:
+        for statement, parameters in statements:
+            result = await conn.exec_driver_sql(
+                "EXPLAIN (ANALYZE, BUFFERS, FORMAT TEXT) " + statement, parameters
+            )
+            plans.append({"sql": " ".join(statement.split()), "plan": [r[0] for r in result]})
+        await conn.rollback()
+    return plans
+
+
+def summarize_plan(plans) -> str:
+    if not plans:
+        return "(no query)"
+    lines = plans[0]["plan"]
+    node = lines[0].split("  (")[0].strip()
+    execution = next(
+        (line.split(":")[1].strip() for line in lines if line.startswith("Execution Time")), ""
+    )
+    scans = {
+        kind for line in lines
+        for kind in ("Index Only Scan", "Index Scan", "Bitmap Heap Scan", "Seq Scan") if kind in line
+    }
+    return f"{node} [{', '.join(sorted(scans)) or '-'}] {execution}"
+
+
+async def bench_endpoint(client, name, path, params, requests, concurrency, conditional):
+    timings, rows, sizes = [], [], []
+    semaphore = asyncio.Semaphore(concurrency)
+    etag = None
+
+    async def one():
+        nonlocal etag
+        headers = {"If-None-Match": etag} if conditional and etag else {}
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get(path, params=params, headers=headers)
+            timings.append(time.perf_counter() - started)
+        if response.status_code == 304:
+            rows.append(0)
+            sizes.append(0)
+            return
+        response.raise_for_status()
+        etag = response.headers.get("etag")
+        rows.append(_row_count(response.json()))
+        sizes.append(len(response.content))
+
+    await one()  # warm-up (and first ETag)
+    for samples in (timings, rows, sizes):
+        samples.clear()
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    wall = time.perf_counter() - started
+
+    return {
+        "endpoint": name,
+        "mode": "conditional" if conditional else "full",
+        "concurrency": concurrency,
+        "p50_ms": round(percentile(timings, 50) * 1000, 2),
+        "p95_ms": round(percentile(timings, 95) * 1000, 2),
+        "p99_ms": round(percentile(timings, 99) * 1000, 2),
+        "req_per_sec": round(requests / wall, 1),
+        "rows_per_resp": round(sum(rows) / len(rows), 1),
+        "rows_per_sec": round(sum(rows) / wall, 1),
+        "kib_per_resp": round(sum(sizes) / len(sizes) / 1024, 1),
+    }
+
+
+async def bench_suite(args, cases):
+    import httpx
+    from app.database.database import engine
+    from app.main import app
+
+    capture = QueryCapture(engine)
+    transport = httpx.ASGITransport(app=app)
+    results = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, path, params in cases:
+            capture.statements.clear()
+            capture.enabled = True
+            (await client.get(path, params=params)).raise_for_status()
+            capture.enabled = False
+            plans = await explain(engine, capture.statements) if args.explain else []
+
+            for concurrency in args.concurrency:
+                modes = (False, True) if args.conditional else (False,)
+                for conditional in modes:
+                    result = await bench_endpoint(
+                        client, name, path, params, args.requests, concurrency, conditional
+                    )
+                    result["plan"] = summarize_plan(plans) if args.explain else ""
+                    result["plans"] = plans
+                    results.append(result)
+    await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plants", type=int, default=20)
+    parser.add_argument("--readings-per-plant", type=int, default=50_000)
+    parser.add_argument("--interval-s", type=int, default=60, help="Seconds between readings")
+    parser.add_argument("--no-seed", action="store_true", help="Reuse previously seeded data")
+    parser.add_argument("--reset", action="store_true", help="Delete seeded rows and exit")
+    parser.add_argument("--limit", type=int, default=500, help="History limit parameter")
+    parser.add_argument("--requests", type=int, default=200, help="Timed requests per endpoint")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16])
+    parser.add_argument("--conditional", action="store_true", help="Also measure If-None-Match (304) requests")
+    parser.add_argument("--no-explain", dest="explain", action="store_false")
+    parser.add_argument("--show-plans", action="store_true", help="Print full query plans")
+    parser.add_argument("--full-list-max", type=int, default=200_000,
+                        help="Only benchmark GET /api/sensors/ (unpaginated) up to this many rows")
+    parser.add_argument("--output", help="Write a JSON report")
+    parser.add_argument("--compare", help="Previous JSON report to compare against")
+    args = parser.parse_args()
+
+    if args.reset:
+        reset()
+        return
+    if not args.no_seed:
+        seed(args.plants, args.readings_per_plant, args.interval_s)
+
+    total = table_rows()
+    include_full_list = total <= args.full_list_max
+    print(f"📊 sensor_readings ≈ {total:,} rows"
+          + ("" if include_full_list else f" (skipping unpaginated list_readings > {args.full_list_max:,})"))
+
+    results = asyncio.run(bench_suite(args, endpoints(args.plants, args.limit, include_full_list)))
+    print()
+    print_table(results, ["endpoint", "mode", "concurrency", "p50_ms", "p95_ms", "p99_ms",
+                          "req_per_sec", "rows_per_sec", "kib_per_resp", "plan"])
+
+    if args.show_plans:
+        shown = set()
+        for result in results:
+            if result["endpoint"] in shown:
+                continue
+            shown.add(result["endpoint"])
+            for plan in result["plans"]:
+                print(f"\n🔎 {result['endpoint']}\n   {plan['sql']}")
+                print("\n".join(f"   {line}" for line in plan["plan"]))
+
+    if args.output:
+        write_report(args.output, "read_api", results, {**vars(args), "sensor_readings": total})
+    if args.compare:
+        compare_report(
+            args.compare, results, keys=["endpoint", "mode", "concurrency"],
+            metrics=["p50_ms", "p99_ms", "req_per_sec", "rows_per_sec"],
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Read-endpoint serialization benchmarks (in-process, no database).
+
+For N reading rows, times the work done after the query returns:
+  * response_model — ORM objects validated through list[SensorReadingResponse]
+    and dumped to JSON the way FastAPI does for ``response_model`` routes
+  * dicts          — per-row dicts with isoformat() + stdlib json (old history routes)
+  * fast-rows      — column tuples → FastJSONResponse rows shape
+  * fast-columnar  — column tuples → FastJSONResponse columnar shape
+
+    python -m benchmarks.bench_serialization --rows 500 50000 --output before.json
+    pip install orjson
+    python -m benchmarks.bench_serialization --rows 500 50000 --compare before.json
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from benchmarks._common import compare_report, latency_summary, print_table, write_report
+
+COLUMNS = ("id", "timestamp", "temperature", "humidity", "soil_moisture", "light_level", "pressure")
+
+
+def make_rows(n: int):
+    rng = random.Random(0)
+    start = datetime(2025, 1, 1)
+    return [
+        (
+            i, start + timedelta(seconds=30 * i), rng.uniform(15, 35), rng.uniform(20, 90),
+            rng.uniform(10, 80), rng.uniform(0, 1000), rng.uniform(95, 105),
+        )
+        for i in range(n)
+    ]
+
+
+def encode_response_model(rows):
+    from pydantic import TypeAdapter
+    from app.database.schemas import SensorReadingResponse
+
+    adapter = TypeAdapter(list[SensorReadingResponse])
+    objects = [SimpleNamespace(**dict(zip(COLUMNS, row))) for row in rows]
+
+    def run():
+        validated = adapter.validate_python(objects, from_attributes=True)
+        content = adapter.dump_python(validated, mode="json")
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+    return run
+
+
+def encode_dicts(rows):
+    def run():
+        content = [
+            {"id": r[0], "timestamp": r[1].isoformat(), **dict(zip(COLUMNS[2:], r[2:]))}
+            for r in rows
+        ]
+        return json.dumps(content).encode()
+
+    return run
+
+
+def encode_fast(rows, format):
+    from app.services.serialization import FastJSONResponse, shape_rows
+
+    def run():
+        return FastJSONResponse(shape_rows(rows, COLUMNS, format)).body
+
+    return run
+
+
+def bench(name: str, run, n: int, repeats: int):
+    body = run()  # warm-up
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    summary = latency_summary(timings, items_per_sample=n)
+    return {
+        "path": name, "rows": n,
+        "p50_ms": round(summary["p50_us"] / 1000, 3),
+        "p99_ms": round(summary["p99_us"] / 1000, 3),
+        "rows_per_sec": summary["items_per_sec"],
+        "body_kib": round(len(body) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[500, 50000])
+    parser.add_argument("--repeats", type=int, default=None, help="Timed runs per size (default scales with size)")
+    parser.add_argument("--output", help="Write a JSON report")
+    parser.add_argument("--compare", help="Previous JSON report to compare against")
+    args = parser.parse_args()
+
+    from app.services import serialization
+
+    encoder = "orjson" if serialization.orjson is not None else "stdlib json"
+    print(f"⚡ Fast path encoder: {encoder}\n")
+
+    results = []
+    for n in args.rows:
+        rows = make_rows(n)
+        repeats = args.repeats or max(5, min(200, 200_000 // n))
+        paths = [
+            ("response_model", encode_response_model(rows)),
+            ("dicts", encode_dicts(rows)),
+            ("fast-rows", encode_fast(rows, "rows")),
+            ("fast-columnar", encode_fast(rows, "columnar")),
+        ]
+        baseline = None
+        for name, run in paths:
+            result = bench(name, run, n, repeats)
+            baseline = baseline or result["p50_ms"]
+            result["speedup"] = f"{baseline / result['p50_ms']:.1f}x" if result["p50_ms"] else ""
+            result["encoder"] = encoder if name.startswith("fast") else "stdlib json"
+            results.append(result)
+
+    print_table(results, ["path", "rows", "p50_ms", "p99_ms", "rows_per_sec", "body_kib", "speedup"])
+
+    if args.output:
+        write_report(args.output, "serialization", results, vars(args))
+    if args.compare:
+        compare_report(
+            args.compare, results, keys=["path", "rows"], metrics=["p50_ms", "p99_ms", "rows_per_sec"]
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from app.models.tree_model import CompiledTreeModel
+
+xgboost = pytest.importorskip("xgboost")
+pytest.importorskip("sklearn")  # XGBClassifier is the scikit-learn wrapper
+
+
+def _sensor_rows(rng, n):
+    """Rows spanning the sensor ranges, with some missing values."""
+    X = np.column_stack([
+        rng.uniform(0, 100, n),   # soil moisture %
+        rng.uniform(0, 100, n),   # humidity %
+        rng.uniform(-10, 50, n),  # temperature °C
+    ])
+    X[rng.random(X.shape) < 0.05] = np.nan
+    return X
+
+
+def _labels(X, num_class):
+    moisture = np.nan_to_num(X[:, 0], nan=50.0)
+    if num_class == 2:
+        return (moisture < 35).astype(int)
+    return np.digitize(moisture, np.linspace(0, 100, num_class + 1)[1:-1])
+
+
+@pytest.mark.parametrize("num_class", [2, 4])
+def test_compiled_model_matches_xgboost(tmp_path, num_class):
+    rng = np.random.default_rng(num_class)
+    X_train = _sensor_rows(rng, 2000)
+    original = xgboost.XGBClassifier(n_estimators=30, max_depth=4, random_state=0)
+    original.fit(X_train, _labels(X_train, num_class))
+
+    path = tmp_path / "model.npz"
+    CompiledTreeModel.from_booster(original).save(path)
+    compiled = CompiledTreeModel.load(path)
+
+    X = _sensor_rows(rng, 5000)
+    expected = np.asarray(original.predict_proba(X))
+    actual = compiled.predict_proba(X)
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-6)
+    np.testing.assert_array_equal(compiled.predict(X), original.predict(X))